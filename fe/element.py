@@ -24,18 +24,49 @@ import numpy as np
 from fe.quadrature import GaussLegendre, GaussLegendreLobatto
 from fe.shapes import Lagrange
 
+# Reference element
+class Reference:
+    '''Reference element, holding the quadrature rules and shape functions shared by all the elements of the same order
+    '''
+    def __init__(self, order, rule):
+        self.order = order # order of the element
+        self.ep = GaussLegendreLobatto(order) # evaluation points (Gauss-Legendre-Lobatto)
+        self.ip = rule(order) # integration points and weights (Gauss-Legendre)
+        self.eshape = Lagrange(self.ip.x, self.ep.x) # shape functions at element
+        self.ipi = [] # integration points and weights at faces (x = -1 and x = 1)
+        self.ishape = [] # shape functions at faces
+        for xf in [-1.0, 1.0]:
+            ip = rule(0)
+            ip.x[0] = xf
+            ip.w[0] = 1.0
+            self.ipi.append(ip)
+            self.ishape.append(Lagrange(ip.x, self.ep.x))
+    def __str__(self):
+        return 'Reference DG element of order ' + str(self.order)
+
+_references = {} # reference elements, keyed by (order, rule)
+
+def reference(order, rule = GaussLegendre):
+    '''Get the reference element of given order and integration rule, building it only once
+    '''
+    key = (order, rule)
+    if key not in _references:
+        _references[key] = Reference(order, rule)
+    return _references[key]
+
 # Base class
 class Element:
     def __init__(self, rows, order, cell):
         self.rows = rows # row inidices in global solution vector
         self.order = order # order of the element
-        self.ep = GaussLegendreLobatto(order) # evaluation points (Gauss-Legendre-Lobatto)
-        self.ip = GaussLegendre(order) # integration points and weights (Gauss-Legendre)
-        self.eshape = Lagrange(self.ip.x, self.ep.x) # shape functions at element
+        self.ref = reference(order) # reference element (shared by all elements)
+        self.ep = self.ref.ep # evaluation points (Gauss-Legendre-Lobatto)
+        self.ip = self.ref.ip # integration points and weights (Gauss-Legendre)
+        self.eshape = self.ref.eshape # shape functions at element
+        self.ipi = self.ref.ipi # integration points and weights at interface
+        self.ishape = self.ref.ishape # shape functions at interface
         self.cell = cell # underlying geometric mesh cell
         self.cell.update(self.ip.x) # update geometric data at integration point
-        self.ipi = [] # integration points and weights at interface
-        self.ishape = [] # shape functions at interface
         self.__inormal = [] # interface normal pointing outward
         for b in self.cell.boundaries:
             self.__map(b) # map integration points to the cell
@@ -46,17 +77,13 @@ class Element:
     def __map(self, interface):
         '''Map the coordinates of the (interface) integration point from the interface to the cell reference frame
         '''
-        ip = GaussLegendre(0) # integration points
         if interface == self.cell.boundaries[0]:
-            ip.x[0] = -1.0
+            ip = self.ipi[0] # x = -1
         elif interface == self.cell.boundaries[1]:
-            ip.x[0] = 1.0
+            ip = self.ipi[1] # x = 1
         else:
             raise RuntimeError('Element.eval interface not found!')
-        ip.w[0] = 1.0
         interface.update(ip.x) # update geometric data at integration point
-        self.ipi.append(ip)
-        self.ishape.append(Lagrange(ip.x, self.ep.x))
 
     def __normal(self, interface):
         '''Compute normal of interface pointing outward of element
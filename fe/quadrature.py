@@ -28,37 +28,41 @@ class Legendre:
     def __init__(self):
         pass
 
+    def evalall(self, x, n):
+        '''Evaluate Legendre polynomials of order 0 to n and their first and second derivatives at x (iterative recurrence)
+            x can be a scalar or an array, the polynomials and their derivatives are returned as three (n+1, ...) arrays
+        '''
+        x = np.asarray(x, dtype=float)
+        p = np.zeros((n+1,) + x.shape)
+        dp = np.zeros((n+1,) + x.shape)
+        ddp = np.zeros((n+1,) + x.shape)
+        p[0] = 1.0
+        if n > 0:
+            p[1] = x
+            dp[1] = 1.0
+        if n > 1:
+            ddp[2] = 3.0
+        for k in range(2, n+1):
+            p[k] = ((2*k - 1) * x * p[k-1] - (k-1) * p[k-2]) / k
+            dp[k] = ((2*k - 1) * x * dp[k-1] - k * dp[k-2]) / (k-1)
+        for k in range(3, n+1):
+            ddp[k] = ((2*k - 1) * x * ddp[k-1] - (k+1) * ddp[k-2]) / (k-2)
+        return p, dp, ddp
+
     def eval(self, x, n):
         '''Evaluate Legendre polynomial of order n at x (recurrence)
         '''
-        if n == 0:
-            return 1.0
-        elif n == 1:
-            return x
-        else:
-            return ((2*n - 1) * x * self.eval(x, n-1) - (n-1) * self.eval(x, n-2)) / n
+        return self.evalall(x, n)[0][n]
 
     def evald(self, x, n):
         '''Evaluate Legendre polynomial first derivative of order n at x (recurrence)
         '''
-        if n == 0:
-            return 0.0
-        elif n == 1:
-            return 1.0
-        else:
-            return ((2*n - 1) * x * self.evald(x, n-1) - n * self.evald(x, n-2)) / (n-1)
+        return self.evalall(x, n)[1][n]
 
     def evaldd(self, x, n):
         '''Evaluate Legendre polynomial second derivative of order n at x (recurrence)
         '''
-        if n == 0:
-            return 0.0
-        elif n == 1:
-            return 0.0
-        elif n == 2:
-            return 3.0
-        else:
-            return ((2*n - 1) * x * self.evaldd(x, n-1) - (n+1) * self.evaldd(x, n-2)) / (n-2)
+        return self.evalall(x, n)[2][n]
 
 # Base class
 class Quadrature:
@@ -69,94 +73,130 @@ class Quadrature:
     def __str__(self):
         raise RuntimeError('Quadrature rule not implemented!')
 
+    def _newton(self, xs, fun, name):
+        '''Compute the roots of fun(x) = (f, df), starting from xs, using Newton method on all roots at once
+        '''
+        dx = np.ones(len(xs))
+        its = 0
+        while np.any(np.abs(dx) > 1e-16):
+            f, df = fun(xs)
+            dx = - f / df
+            xs += dx
+            its += 1
+            if its > 100:
+                print(name + ': Newton method did not converge, error =', np.max(np.abs(dx)))
+                break
+        return xs
+
+    def _symmetrize(self, xs):
+        '''Build the symmetric list of roots from the positive roots xs, sorted in decreasing order
+        '''
+        self.x = list(-xs)
+        if np.mod(self.n, 2) != 0:
+            self.x.append(0.0)
+        self.x += list(xs[::-1])
+
 # Gauss-Legendre
 class GaussLegendre(Quadrature):
     '''Gauss-Legendre quadrature rule
+       roots computed using Newton method (method = 'newton') or as the eigenvalues of the Jacobi matrix (method = 'golub-welsch')
        ref https://rosettacode.org/wiki/Numerical_integration/Gauss-Legendre_Quadrature#Python
+       ref https://www.ams.org/journals/mcom/1969-23-106/S0025-5718-69-99647-1/S0025-5718-69-99647-1.pdf
     '''
-    def __init__(self, order):
+    def __init__(self, order, method = 'newton'):
         # Sanity check
         if order < 0:
             raise RuntimeError('GaussLegendre quadrature rules not defined for order less than 0!')
         Quadrature.__init__(self)
         self.n = order + 1
         # Evaluate roots and weights
-        lgd = Legendre()
-        self.__roots(lgd)
-        self.__weights(lgd)
+        if method == 'newton':
+            lgd = Legendre()
+            self.__roots(lgd)
+            self.__weights(lgd)
+        elif method == 'golub-welsch':
+            self.__eigen()
+        else:
+            raise RuntimeError('GaussLegendre method ' + str(method) + ' not implemented!')
     def __str__(self):
         return 'Gauss-Legendre quadrature rule (n = ' + str(self.n) + ')'
 
     def __roots(self, lgd):
         '''Evaluate roots
         '''
-        xs = [] # roots are symmetric, so we only compute half of them
-        for i in range(1, self.n // 2 + 1):
-            x = np.cos(np.pi * (i-0.25) / (self.n + 0.5))
-            dx = 1.0
-            its = 0
-            while np.abs(dx) > 1e-16:
-                dx = - lgd.eval(x, self.n) / lgd.evald(x, self.n)
-                x += dx
-                its += 1
-                if its > 100:
-                    print('GaussLegendre: Newton method did not converge, error =', np.abs(dx))
-            xs.append(x)
-        # add the rest of the roots
-        for x in xs:
-            self.x.append(-x)
-        if np.mod(self.n, 2) != 0:
-            self.x.append(0.0)
-        self.x += reversed(xs)
+        # roots are symmetric, so we only compute half of them
+        def fun(x):
+            p, dp, _ = lgd.evalall(x, self.n)
+            return p[-1], dp[-1]
+        xs = np.cos(np.pi * (np.arange(1, self.n // 2 + 1) - 0.25) / (self.n + 0.5))
+        self._symmetrize(self._newton(xs, fun, 'GaussLegendre'))
 
     def __weights(self, lgd):
         '''Evaluate weights
         '''
-        for x in self.x:
-            self.w.append(2.0 / ((1.0 - x*x) * (lgd.evald(x, self.n)**2)))
+        x = np.array(self.x)
+        self.w = list(2.0 / ((1.0 - x*x) * (lgd.evalall(x, self.n)[1][-1]**2)))
+
+    def __eigen(self):
+        '''Evaluate roots and weights from the eigenvalues and eigenvectors of the Jacobi matrix
+        '''
+        k = np.arange(1, self.n)
+        b = k / np.sqrt(4.0*k*k - 1.0) # off-diagonal of Jacobi matrix
+        x, v = np.linalg.eigh(np.diag(b, 1) + np.diag(b, -1))
+        w = 2.0 * v[0]**2
+        self._symmetrize(0.5 * (x[::-1] - x)[:self.n // 2])
+        self.w = list(0.5 * (w + w[::-1]))
 
 # Gauss-Legendre-Lobatto
 class GaussLegendreLobatto(Quadrature):
     '''Gauss-Legendre-Lobatto quadrature rule (for interpolation points)
+       roots computed using Newton method (method = 'newton') or as the eigenvalues of the modified Jacobi matrix (method = 'golub-welsch')
        ref https://www.ams.org/journals/mcom/1963-17-083/S0025-5718-1963-0158540-4/S0025-5718-1963-0158540-4.pdf
+       ref https://epubs.siam.org/doi/10.1137/1015032
     '''
-    def __init__(self, order):
+    def __init__(self, order, method = 'newton'):
         # Sanity check
         if order < 1:
             raise RuntimeError('GaussLegendreLobatto quadrature rules not defined for order less than 1!')
         Quadrature.__init__(self)
         self.n = order + 1
         # Evaluate roots and weights
-        lgd = Legendre()
-        self.__roots(lgd)
-        self.__weights(lgd)
+        if method == 'newton':
+            lgd = Legendre()
+            self.__roots(lgd)
+            self.__weights(lgd)
+        elif method == 'golub-welsch':
+            self.__eigen()
+        else:
+            raise RuntimeError('GaussLegendreLobatto method ' + str(method) + ' not implemented!')
     def __str__(self):
         return 'Gauss-Legendre-Lobatto quadrature rule (n = ' + str(self.n) + ')'
 
     def __roots(self, lgd):
         '''Evaluate roots
         '''
-        xs = [1.0] # roots are symmetric and always include the bounds, so we only compute half of them
-        for i in range(1, self.n // 2):
-            x = np.cos(np.pi * i / (self.n-1))
-            dx = 1.0
-            its = 0
-            while np.abs(dx) > 1e-16:
-                dx = - lgd.evald(x, self.n-1) / lgd.evaldd(x, self.n-1)
-                x += dx
-                its += 1
-                if its > 100:
-                    print('GaussLegendreLobatto: Newton method did not converge, error =', np.abs(dx))
-            xs.append(x)
-        # add the rest of the roots
-        for x in xs:
-            self.x.append(-x)
-        if np.mod(self.n, 2) != 0:
-            self.x.append(0.0)
-        self.x += reversed(xs)
+        # roots are symmetric and always include the bounds, so we only compute half of them
+        def fun(x):
+            _, dp, ddp = lgd.evalall(x, self.n-1)
+            return dp[-1], ddp[-1]
+        xs = np.cos(np.pi * np.arange(1, self.n // 2) / (self.n-1))
+        self._symmetrize(np.concatenate(([1.0], self._newton(xs, fun, 'GaussLegendreLobatto'))))
 
     def __weights(self, lgd):
         '''Evaluate weights
         '''
-        for x in self.x:
-            self.w.append(2.0 / (self.n * (self.n-1) * (lgd.eval(x, self.n-1)**2)))
+        x = np.array(self.x)
+        self.w = list(2.0 / (self.n * (self.n-1) * (lgd.evalall(x, self.n-1)[0][-1]**2)))
+
+    def __eigen(self):
+        '''Evaluate roots and weights from the eigenvalues and eigenvectors of the Jacobi matrix, modified so that the bounds are roots
+        '''
+        k = np.arange(1, self.n)
+        b = k / np.sqrt(4.0*k*k - 1.0) # off-diagonal of Jacobi matrix
+        b[-1] = np.sqrt((self.n - 1) / (2.0*self.n - 3.0)) # Lobatto modification
+        x, v = np.linalg.eigh(np.diag(b, 1) + np.diag(b, -1))
+        w = 2.0 * v[0]**2
+        xs = 0.5 * (x[::-1] - x)[:self.n // 2]
+        xs[0] = 1.0
+        self._symmetrize(xs)
+        self.w = list(0.5 * (w + w[::-1]))
@@ -17,7 +17,6 @@
 
 ## Shape functions
 # Adrien Crovato
-# TODO optimize
 # TODO 1D only
 
 import numpy as np
@@ -32,12 +31,53 @@ class Shapes:
         raise RuntimeError('Shape function not implemented!')
 
 # Lagrange
+def barycentric(xi):
+    '''Compute the barycentric weights of the interpolation points xi
+        w_i = 1 / prod_j!=i (xi_i - xi_j)
+    '''
+    xi = np.asarray(xi, dtype=float)
+    d = xi[:, None] - xi[None, :]
+    np.fill_diagonal(d, 1.0)
+    return 1.0 / np.prod(d, axis=1)
+
+def interpolation(x, xi, w = None):
+    '''Compute the matrix interpolating from the points xi to the points x (barycentric formula)
+        N(k, i) = w_i / (x_k - xi_i) / sum_j w_j / (x_k - xi_j)
+    '''
+    x = np.asarray(x, dtype=float)
+    xi = np.asarray(xi, dtype=float)
+    if w is None:
+        w = barycentric(xi)
+    d = x[:, None] - xi[None, :]
+    exact = d == 0 # target points coinciding with interpolation points
+    d[exact] = 1.0
+    n = w / d
+    n /= np.sum(n, axis=1, keepdims=True)
+    rows = np.any(exact, axis=1)
+    n[rows] = exact[rows]
+    return n
+
+def differentiation(xi, w = None):
+    '''Compute the (spectral) differentiation matrix at the interpolation points xi
+        D(i, j) = w_j / w_i / (xi_i - xi_j), D(i, i) = -sum_j!=i D(i, j)
+    '''
+    xi = np.asarray(xi, dtype=float)
+    if w is None:
+        w = barycentric(xi)
+    d = xi[:, None] - xi[None, :]
+    np.fill_diagonal(d, 1.0)
+    dm = w[None, :] / w[:, None] / d
+    np.fill_diagonal(dm, 0.0)
+    np.fill_diagonal(dm, -np.sum(dm, axis=1))
+    return dm
+
 class Lagrange(Shapes):
     '''Lagrange shape functions
     '''
     def __init__(self, x, xi):
         Shapes.__init__(self)
         self.n = len(xi)
+        self.w = barycentric(xi) # barycentric weights
         self.__eval(x, xi)
         self.__evald(x, xi)
     def __str__(self):
@@ -46,25 +86,12 @@ class Lagrange(Shapes):
     def __eval(self, x, xi):
         '''Evaluate polynomials at x using interpolation points xi
         '''
-        for k in range(len(x)):
-            n = np.ones(self.n)
-            for i in range(self.n):
-                for j in range(self.n):
-                    if i != j:
-                        n[i] *= (x[k] - xi[j]) / (xi[i] - xi[j])
-            self.sf.append(n)
+        self.mat = interpolation(x, xi, self.w) # interpolation matrix
+        self.sf = self.mat # sf[k] is a view on row k
 
     def __evald(self, x, xi):
-        '''Evaluate polynomial derivatives at x using interpolation points xi 
+        '''Evaluate polynomial derivatives at x using interpolation points xi
+            the derivatives are interpolated from the differentiation matrix, which is exact for polynomials
         '''
-        for k in range(len(x)):
-            dn = np.zeros((1, self.n))
-            for i in range(self.n):
-                for j in range(self.n):
-                    if i != j:
-                        prod = 1.0 / (xi[i] - xi[j])
-                        for l in range(self.n):
-                            if l != i and l != j:
-                                prod *= (x[k] - xi[l]) / (xi[i] - xi[l])
-                        dn[:, i] += prod
-            self.dsf.append(dn)
+        self.dmat = self.mat.dot(differentiation(xi, self.w)) # derivative matrix
+        self.dsf = self.dmat[:, None, :] # dsf[k] is a (1, n) view on row k
@@ -0,0 +1,81 @@
+# -*- coding: utf8 -*-
+# test encoding: à-é-è-ô-ï-€
+
+# Copyright 2021 Adrien Crovato
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+## Checkpoint
+# Adrien Crovato
+
+import os
+import glob
+import time
+import pickle
+
+class Checkpoint:
+    '''Checkpoints of a time integration, saved every freq iterations and/or every wall seconds of wall-clock time
+        each checkpoint is written to a temporary file, which is then renamed, so that a checkpoint is either complete or absent
+        only the keep most recent checkpoints are retained on disk (all of them if keep <= 0)
+        the wall-clock time is measured from the start of the time integration, then from the last save
+    '''
+    def __init__(self, name, freq = 0, wall = 0., keep = 2):
+        self.name = name # base name of file
+        self.freq = freq # save frequency (in iterations, never if 0)
+        self.wall = wall # save period (in seconds of wall-clock time, never if 0)
+        self.keep = keep # number of checkpoints retained (all if <= 0)
+        self.cpu = time.perf_counter() # wall-clock time of start or of last save
+    def __str__(self):
+        return 'Checkpoint (freq = ' + str(self.freq) + ', wall = ' + str(self.wall) + ' s, keep = ' + str(self.keep) + ')'
+
+    def start(self):
+        '''Start measuring the wall-clock time
+        '''
+        self.cpu = time.perf_counter()
+
+    def due(self, nt):
+        '''Check whether a checkpoint must be saved at iteration nt
+        '''
+        return (self.freq > 0 and nt % self.freq == 0) or (self.wall > 0 and time.perf_counter() - self.cpu >= self.wall)
+
+    def save(self, nt, data):
+        '''Write the data of iteration nt to disk atomically, and remove the oldest checkpoints
+        '''
+        fname = self.name + '_{0:06d}'.format(nt) + '.chk'
+        with open(fname + '.tmp', 'wb') as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(fname + '.tmp', fname)
+        if self.keep > 0:
+            for old in self.list()[:-self.keep]:
+                os.remove(old)
+        self.cpu = time.perf_counter()
+        return fname
+
+    def list(self):
+        '''List the checkpoints on disk, from the oldest to the most recent
+        '''
+        return sorted(glob.glob(glob.escape(self.name) + '_[0-9]*.chk'))
+
+    def last(self):
+        '''Return the most recent checkpoint on disk (None if there is none)
+        '''
+        chks = self.list()
+        return chks[-1] if chks else None
+
+def load(fname):
+    '''Read a checkpoint from disk
+    '''
+    with open(fname, 'rb') as f:
+        return pickle.load(f)
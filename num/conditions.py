@@ -19,6 +19,30 @@
 # Adrien Crovato
 # TODO only homogeneous Neumann for now
 
+import numpy as np
+
+_vectorized = {} # whether each function supports arrays (probed at its first call)
+
+def evaluate(fun, x, *args):
+    '''Evaluate a function of the position on an array of positions
+        the function is called once on the whole array (ufunc-style), or on each position if it does not support arrays
+        the support of arrays is probed at the first call of each function (which fails with a TypeError or a ValueError, or does not return an array of positions or a scalar, if not), and stored for the next calls
+    '''
+    x = np.asarray(x, dtype=float)
+    if fun not in _vectorized:
+        try:
+            f = np.asarray(fun(x, *args), dtype=float)
+            _vectorized[fun] = f.shape == x.shape or f.shape == ()
+        except (TypeError, ValueError):
+            _vectorized[fun] = False
+    elif _vectorized[fun]:
+        f = np.asarray(fun(x, *args), dtype=float)
+        if f.shape != x.shape and f.shape != ():
+            raise RuntimeError('Function ' + str(fun) + ' returned an array of shape ' + str(f.shape) + ' for positions of shape ' + str(x.shape) + '!')
+    if _vectorized[fun]:
+        return f if f.shape == x.shape else np.full(x.shape, f)
+    return np.array([fun(xi, *args) for xi in x.flat], dtype=float).reshape(x.shape)
+
 class Initial:
     '''Initial conditions
     '''
@@ -28,16 +52,37 @@ class Initial:
     def __str__(self):
         return 'Initial conditions'
 
-    def eval(self, celements):
+    def eval(self, celements, out = None):
         '''Evaluate the initial conditons on the nodes of the elements
+            the solution is returned as a flat array, ordered by element, variable and node
         '''
-        u = []
-        for c in self.group.cells:
-            xe = celements[c].evalx()
-            for j in range(len(self.funs)):
-                for i in range(len(xe)):
-                    u.append(self.funs[j](xe[i], 0))
-        return u
+        x = np.array([celements[c].evalx() for c in self.group.cells])
+        if out is None:
+            out = np.empty(len(self.funs) * x.size)
+        u = out.reshape(x.shape[0], len(self.funs), x.shape[1])
+        for j in range(len(self.funs)):
+            u[:, j, :] = evaluate(self.funs[j], x, 0)
+        return out
+
+class InitialEnsemble:
+    '''Initial conditions of an ensemble of solutions
+    '''
+    def __init__(self, ics):
+        self.ics = ics # list of initial conditions for each member
+        self.group = ics[0].group # physical group
+    def __str__(self):
+        return 'Initial conditions (' + str(len(self.ics)) + ' members)'
+
+    def eval(self, celements, out = None):
+        '''Evaluate the initial conditons of each member on the nodes of the elements
+            the solution is returned as a (n, n_members) array, ordered by element, variable and node along the first axis
+        '''
+        for m, ic in enumerate(self.ics):
+            um = ic.eval(celements)
+            if out is None:
+                out = np.empty((len(um), len(self.ics)))
+            out[:, m] = um
+        return out
 
 class Boundary:
     '''Boundary conditions
@@ -45,36 +90,60 @@ class Boundary:
     def __init__(self, group, bcs):
         self.group = group # physical group
         self.bcs = bcs # list of boundary conditions for each variable
+        self.__x = None # positions at which the time-independent conditions have been evaluated
+        self.__cache = {} # time-independent conditions at these positions
     def __str__(self):
         return 'Boundary conditions'
 
-    def eval(self, x, t, u):
+    def eval(self, x, t, u, out = None):
         '''Evaluate the boundary conditons at given positions and time
+            x is a (n,) array of positions, u is the (nv, n) array of the solution at these positions, or the (nv, n, n_members) array for an ensemble
+        '''
+        if out is None:
+            out = np.empty(np.shape(u))
+        if self.__x is not x:
+            self.__x = x
+            self.__cache = {v: bc.eval(x, 0., None) for v, bc in enumerate(self.bcs) if bc.steady}
+        for v in range(len(self.bcs)):
+            val = self.__cache[v] if v in self.__cache else self.bcs[v].eval(x, t, u[v])
+            out[v].T[...] = np.transpose(val) # conditions shared by all the members are broadcast
+        return out
+
+    def evald(self, x, t, u):
+        '''Evaluate the derivative of the boundary conditons with respect to the solution at given positions and time
+            the condition on each variable only depends on the same variable, so that the derivatives are returned as a (nv, n) array
         '''
-        ub = [[] for _ in range(len(x))]
-        for i in range(len(x)):
-            for v in range(len(self.bcs)):
-                ub[i].append(self.bcs[v].eval(x[i], t, u[i][v]))
-        return ub
+        return np.array([self.bcs[v].evald(x, t, u[v]) for v in range(len(self.bcs))])
 
 class Dirichlet:
     '''Dirichlet boundary condition
+        a list of functions can be given for an ensemble, the condition being then evaluated for each member
+        a time-independent (steady) condition is evaluated once, and its values are cached by the boundary
     '''
-    def __init__(self, fun):
-        self.fun = fun # function(position, time)
+    def __init__(self, fun, steady = False):
+        self.fun = fun # function(position, time), or list of functions for each member
+        self.steady = steady # time-independent
     def __str__(self):
         return 'Dirichlet boundary condition'
 
     def eval(self, x, t, u):
-        '''Evaluate the Dirichlet boundary conditon at given position and time
+        '''Evaluate the Dirichlet boundary conditon at given positions and time
+            the condition is returned as a (n,) array, or as a (n, n_members) array for an ensemble
         '''
-        return self.fun(x, t)
+        if isinstance(self.fun, list):
+            return np.stack([evaluate(f, x, t) for f in self.fun], axis=-1)
+        return evaluate(self.fun, x, t)
+
+    def evald(self, x, t, u):
+        '''Evaluate the derivative of the Dirichlet boundary conditon with respect to the solution
+        '''
+        return np.zeros(np.shape(x))
 
 class Neumann:
     '''Neumann boundary condition
     '''
     def __init__(self):
-        pass
+        self.steady = False # depends on solution
     def __str__(self):
         return 'Neumann boundary condition'
 
@@ -82,3 +151,8 @@ class Neumann:
         '''Evaluate homegeneous Neumann boundary conditon (return solution at current position and time so that the flux is null)
         '''
         return u
+
+    def evald(self, x, t, u):
+        '''Evaluate the derivative of homegeneous Neumann boundary conditon with respect to the solution
+        '''
+        return np.ones(np.shape(u))
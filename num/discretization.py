@@ -28,6 +28,7 @@ class Discretization:
     def __init__(self, frm, order, flux):
         self.frm = frm # formulation
         self.flux = flux # flux discretization at interface between two cells
+        self.order = order # order of the elements
         # Associate an element to each cell of the field
         self.elements = {} # cell to element map
         for i, c in enumerate(self.frm.field.cells):
@@ -36,121 +37,364 @@ class Discretization:
                 rows.append(list(range((j+i*self.frm.nv)*(order+1), (j+1+i*self.frm.nv)*(order+1))))
             self.elements[c] = Element(rows, order, c)
         self.n = len(self.frm.field.cells) * (order + 1) # number of unknowns
-        # Matrices (constants)
-        self.mass = None
-        self.stif = None
+        self.shape = (len(self.elements), self.frm.nv, order + 1) # shape of solution array (elements, variables, evaluation points)
+        # Reference operators (constants)
+        self.imass = None # inverse of reference mass matrix
+        self.dmat = None # differentiation matrix
+        self.lift = None # face lifting operator
+        self.__operators()
+        # Jacobian determinants (constants, affine cells)
+        self.djac = np.array([e.cell.djac[0] for e in self.elements.values()])
+        # Coordinates of evaluation points (constants)
+        self.x = np.array([e.evalx() for e in self.elements.values()])
+        # Interface connectivity (constants)
+        self.__connectivity()
         # Source term (constants)
         self.source = None
+        # Coloring of elements for finite differences (constants)
+        self.colors = None
+        # Scratch array of the scaled RHS (allocated once)
+        self.scratch = None
     def __str__(self):
         return 'Discretization'
 
-    def __mass(self):
-        '''Compute the mass matrix
-            M(i, j) = sum_k w_k Ni_k Nj_k dj_k
-            since the matrix is constant, it is computed once and for all
-        '''
-        if not self.mass:
-            self.mass = []
-            for e in self.elements.values():
-                # build
-                m = np.zeros((e.ep.n, e.ep.n))
-                for k in range(e.ip.n):
-                    m += e.ip.w[k] * np.outer(e.eshape.sf[k], e.eshape.sf[k]) * e.cell.djac[k]
-                self.mass.append(np.linalg.inv(np.kron(np.eye(self.frm.nv), m)))
-        return self.mass
-
-    def __stif(self):
-        '''Compute the stiffness matrix
-            S(i, j) = sum_k w_k (Ni_k invj_k dNj_k)^T dj_k
-            since the matrix is constant, it is computed once and for all
-        '''
-        if not self.stif:
-            self.stif = []
-            for e in self.elements.values():
-                # build
-                m = np.zeros((e.ep.n, e.ep.n))
-                for k in range(e.ip.n):
-                    m += e.ip.w[k] * np.outer(e.eshape.sf[k], e.cell.ijac[k] * e.eshape.dsf[k]) * e.cell.djac[k]
-                self.stif.append(np.transpose(np.kron(np.eye(self.frm.nv), m)))
-        return self.stif
-
-    def __flux(self, u, t):
-        '''Compute numerical flux on all elements
-        '''
-        # Return element of one interface
-        def getelem(interface, index):
-            ei = self.elements[interface.neighbors[index]]
-            ui = ei.evalu(interface, u) # interpolate u from element evaluation points to interface integration points
-            ni = ei.normal(interface)
-            return ei, ui, ni
-        # Compute the flux on one interface
-        def getflux(u0, u1, n0):
-            fi = [0.] * len(u0)
-            for k in range(len(u0)):
-                fi[k] = self.flux.eval(u0[k], u1[k], n0[0])
-            return fi
-        # Compute numerical flux on all interfaces...
-        fstar = {}
+    def __operators(self):
+        '''Compute the operators on the reference element
+            M(i, j) = sum_k w_k Ni_k Nj_k
+            S(i, j) = sum_k w_k Ni_k dNj_k
+            D = M^-1 * S^T
+            L(i, f) = M^-1 * Ni_f
+            since all the elements have the same order, and the cells are affine, the operators are computed once and for all
+        '''
+        e = next(iter(self.elements.values()))
+        m = np.zeros((e.ep.n, e.ep.n))
+        s = np.zeros((e.ep.n, e.ep.n))
+        for k in range(e.ip.n):
+            m += e.ip.w[k] * np.outer(e.eshape.sf[k], e.eshape.sf[k])
+            s += e.ip.w[k] * np.outer(e.eshape.sf[k], e.eshape.dsf[k])
+        self.imass = np.linalg.inv(m)
+        self.dmat = self.imass.dot(np.transpose(s))
+        self.face = np.array([ishp.sf[0] for ishp in e.ishape]) # shape functions at element faces
+        self.lift = self.imass.dot(np.transpose(self.face))
+
+    def __connectivity(self):
+        '''Build the index arrays linking the interfaces to their neighboring elements
+            the field interfaces are numbered first, then the interfaces of each boundary
+        '''
+        eidx = {c: i for i, c in enumerate(self.elements)} # cell to element index map
+        intfs = list(self.frm.field.interfaces)
+        self.nfi = len(intfs) # number of field interfaces
+        self.bnds = [] # list of (boundary, interface slice, coordinates of interface integration points)
+        for bc in self.frm.bcs:
+            e0s = [self.elements[i.neighbors[0]] for i in bc.group.interfaces]
+            xb = np.array([e0.evalx(i)[0] for e0, i in zip(e0s, bc.group.interfaces)])
+            self.bnds.append((bc, slice(len(intfs), len(intfs) + len(bc.group.interfaces)), xb))
+            intfs += bc.group.interfaces
+        self.ielm = np.zeros((2, len(intfs)), dtype=int) # index of left and right elements
+        self.ifac = np.zeros((2, len(intfs)), dtype=int) # index of interface in left and right elements
+        self.inrm = np.zeros(len(intfs)) # normal pointing outward left element
+        self.iwgt = np.zeros(len(intfs)) # integration weight
+        self.eint = np.zeros((len(self.elements), len(self.face)), dtype=int) # index of interface on each element face
+        self.esgn = np.zeros((len(self.elements), len(self.face))) # sign of interface normal on each element face (1 if outward)
+        for k, i in enumerate(intfs):
+            for j, c in enumerate(i.neighbors):
+                self.ielm[j, k] = eidx[c]
+                self.ifac[j, k] = c.boundaries.index(i)
+                self.eint[self.ielm[j, k], self.ifac[j, k]] = k
+                self.esgn[self.ielm[j, k], self.ifac[j, k]] = 1 - 2 * j
+            e0 = self.elements[i.neighbors[0]]
+            self.inrm[k] = e0.normal(i)[0]
+            self.iwgt[k] = e0.ipi[self.ifac[0, k]].w[0] * i.djac[0]
+        side = (self.esgn > 0).astype(int) # side of neighbor element on interface
+        self.enbr = np.where(self.eint < self.nfi, self.ielm[side, self.eint], -1) # neighbor element across each element face (-1 on boundaries)
+        self.enfc = self.ifac[side, self.eint] # face of neighbor element across each element face
+
+    def line(self):
+        '''Order the elements along the line, and give the faces shared with the previous and the next element in this order
+        '''
+        e, p = np.flatnonzero(np.any(self.enbr < 0, axis=1))[0], -1
+        chain, fprv, fnxt = [], [], []
+        while e >= 0:
+            fp = 0 if self.enbr[e, 0] == p else 1
+            chain.append(e)
+            fprv.append(fp)
+            fnxt.append(1 - fp)
+            p, e = e, self.enbr[e, 1 - fp]
+        if len(chain) != len(self.enbr):
+            raise RuntimeError('Elements do not form a line!')
+        return np.array(chain), np.array(fprv), np.array(fnxt)
+
+    def __trace(self, u, j, k):
+        '''Interpolate solution from element evaluation points to side j of interfaces k
+        '''
+        return np.einsum('ivn...,in->vi...', u[self.ielm[j, k]], self.face[self.ifac[j, k]])
+
+    def __gather(self, u, t, k):
+        '''Gather solution on left and right sides of interfaces k
+        '''
+        u0 = self.__trace(u, 0, k)
+        u1 = np.empty_like(u0)
         # ... in the field
-        for i in self.frm.field.interfaces:
-            e0, u0, n0 = getelem(i, 0)
-            e1, u1, _ = getelem(i, 1)
-            fstar[i] = getflux(u0, u1, n0)
+        fld = k < self.nfi
+        u1[:, fld] = self.__trace(u, 1, k[fld])
         # ... on the boundaries
-        for bc in self.frm.bcs:
-            for i in bc.group.interfaces:
-                e0, u0, n0 = getelem(i, 0)
-                u1 = bc.eval(e0.evalx(i), t, u0)
-                fstar[i] = getflux(u0, u1, n0)
-        # Integrate numerical flux on all element interfaces
-        f = []
-        for e in self.elements.values():
-            fe = [np.zeros(e.ep.n) for _ in range(self.frm.nv)] # flux on element
-            for i,b in enumerate(e.cell.boundaries):
-                fi = fstar[b] # fstar at interface (integration point)
-                ne = e.ishape[i].sf # sf at interface (integration point)
-                w = e.ipi[i].w # weight (integration point)
-                nrm = e.normal(b) # outward normal
-                for k in range(len(ne)):
-                    for v in range(self.frm.nv):
-                        fe[v] += w[k] * b.djac[k] * (fi[k][v] * nrm[0]) * ne[k]
-            f.append(fe)
-        return f
+        for bc, sl, xb in self.bnds:
+            bnd = (k >= sl.start) & (k < sl.stop)
+            if bnd.any():
+                u1[:, bnd] = bc.eval(xb, t, self.__trace(u, 0, np.arange(sl.start, sl.stop)))[:, k[bnd] - sl.start]
+        return u0, u1
+
+    def __flux(self, u, t, k):
+        '''Compute numerical flux on interfaces k
+            for an ensemble, the members of all the interfaces are gathered in one batch
+        '''
+        u0, u1 = self.__gather(u, t, k)
+        nm = u0[0].size // len(k) # number of members
+        f = self.flux.eval_batch(u0.reshape(len(u0), -1), u1.reshape(len(u1), -1), np.repeat(self.inrm[k], nm)).reshape(u0.shape)
+        w = self.iwgt[k] * self.inrm[k]
+        return f * w.reshape(w.shape + (1,) * (f.ndim - 2))
 
     def __source(self):
         '''Compute source term on all elements
             since the term is constant, it is computed once and for all
         '''
-        if not self.source:
-            self.source = []
+        if self.source is None:
+            self.source = np.zeros(self.shape)
             if self.frm.source:
-                for e in self.elements.values():
-                    self.source.append(self.frm.source.eval(e))
-            else:
-                for e in self.elements.values():
-                    self.source.append([[0.] * len(e.evalx()) for _ in range(self.frm.nv)])
+                self.frm.source.eval(self.x, out=np.moveaxis(self.source, 1, 0))
         return self.source
 
-    def compute(self, u, t):
+    def wavespeed(self, u):
+        '''Compute the maximum wave speed on all elements
+        '''
+        ue = np.asarray(u).reshape(self.shape + np.shape(u)[1:])
+        c = self.frm.flux.evalw_batch(np.moveaxis(ue, 1, 0))[1]
+        return np.max(c.reshape(len(c), -1), axis=1)
+
+    def compute(self, u, t, out = None, stiff = True, scale = None):
         '''Compute RHS of equation
             dU/dt + dF/dx + S = 0
             => M * du/dt - S * f + M * s = - f_star
             => du/dt = M^-1 * (S * f - f_star - M * s)
+            since the cells are affine, M = dj * M_ref and S = S_ref
+            => du/dt = 1/dj * (D * f - L * f_star) - s
+            the solution is viewed as a (n_elements, n_variables, order+1) array so that the RHS is evaluated on all elements at once
+            the RHS is written in out if given (or multiplied by scale and added to out, if scale is also given, using a scratch array allocated once), and the stiff source term is left out if stiff is False
+            u can also be a (n, n_members) array holding an ensemble of solutions, in which case the operators are applied to all the members at once
         '''
-        # Compute mass and stiffness matrices on all elements
-        me = self.__mass()
-        se = self.__stif()
-        # Compute numerical fluxes on all elements
-        fe = self.__flux(u, t)
+        ue = np.asarray(u).reshape(self.shape + np.shape(u)[1:])
+        pad = (None,) * (ue.ndim - 3) # trailing ensemble dimension, if any
+        # Compute numerical fluxes on all interfaces, and scatter them to element faces (each face belongs to one interface only)
+        fstar = self.__flux(ue, t, np.arange(len(self.inrm)))
+        fe = np.zeros(self.shape[:2] + (len(self.face),) + ue.shape[3:])
+        fe[self.ielm[0], :, self.ifac[0]] = np.moveaxis(fstar, 0, 1)
+        fe[self.ielm[1, :self.nfi], :, self.ifac[1, :self.nfi]] = -np.moveaxis(fstar[:, :self.nfi], 0, 1)
         # Compute sources on all elements
         sc = self.__source()
+        # Compute physical fluxes on all elements
+        f = np.moveaxis(self.frm.flux.eval_batch(np.moveaxis(ue, 1, 0)), 0, 1)
         # Compute RHS
-        rhs = np.zeros(len(u))
-        i = 0
-        for e in self.elements.values():
-            ue = []
-            for j in range(self.frm.nv):
-                ue.append(np.array(u[e.rows[j]]))
-            rhs[np.concatenate(e.rows)] = me[i].dot(se[i].dot(np.concatenate(self.frm.flux.eval(ue))) - np.concatenate(fe[i])) - np.concatenate(sc[i]) # M^-1 * (S * f - fstar) - s
-            i += 1
-        return rhs
+        if out is None:
+            out = np.empty(np.shape(u))
+        if scale is None:
+            rhs = out.reshape(ue.shape)
+        else:
+            if self.scratch is None or self.scratch.shape != ue.shape:
+                self.scratch = np.empty(ue.shape)
+            rhs = self.scratch
+        if ue.ndim == 3:
+            np.matmul(f, self.dmat.T, out=rhs) # D * f
+            rhs -= np.matmul(fe, self.lift.T) # - L * fstar
+        else:
+            np.matmul(self.dmat, f, out=rhs) # D * [f_1, ..., f_m]
+            rhs -= np.matmul(self.lift, fe) # - L * [fstar_1, ..., fstar_m]
+        rhs /= self.djac[(slice(None), None, None) + pad]
+        rhs -= sc[(...,) + pad] # - s
+        if stiff and self.frm.stiff:
+            rhs -= np.moveaxis(self.frm.stiff.eval(self.x[(...,) + pad], np.moveaxis(ue, 1, 0)), 0, 1)
+        if scale is not None:
+            rhs *= scale
+            out.reshape(ue.shape)[...] += rhs
+        return out
+
+    def jacobian(self, u, t, fd = False):
+        '''Compute the Jacobian of the RHS of equation
+            dR_e/du_e = 1/dj * (D * df/du - L * df_star/du_e) - ds/du
+            dR_e/du_n = - 1/dj * L * df_star/du_n
+            where n is the neighbor of element e across one of its faces, and the numerical flux is linearized by the numerical flux (including the derivative of its wave speed)
+            the Jacobian is block tridiagonal, and is returned as a (n_elements, m, m) array of diagonal blocks, and a (n_elements, 2, m, m) array of blocks coupling each element to its neighbor across each face, where m = n_variables*(order+1)
+            if fd is True, the Jacobian is computed by finite differences instead
+        '''
+        if fd:
+            return self.__jacobian_fd(u, t)
+        ue = np.asarray(u).reshape(self.shape)
+        ne, nv, nn = self.shape
+        # Derivative of physical fluxes on all elements (D * df/du)
+        jd = np.einsum('in,vwen->eviwn', self.dmat, self.frm.flux.evald_batch(np.moveaxis(ue, 1, 0)))
+        jo = np.zeros((ne, len(self.face), nv, nn, nv, nn))
+        # Derivative of numerical fluxes on all interfaces, with respect to the solution on left and right sides
+        k = np.arange(len(self.inrm))
+        u0, u1 = self.__gather(ue, t, k)
+        df = list(self.flux.evald_batch(u0, u1, self.inrm))
+        for bc, sl, xb in self.bnds:
+            df[0][:, :, sl] += df[1][:, :, sl] * bc.evald(xb, t, u0[:, sl])[None, :, :]
+        df[0] *= self.iwgt * self.inrm
+        df[1] *= self.iwgt * self.inrm
+        # Scatter them to the elements on both sides (- L * df_star/du)
+        for j in range(2):
+            kj = k if j == 0 else k[:self.nfi]
+            for i in range(2):
+                ki = kj if i == 0 else kj[kj < self.nfi]
+                blk = -(1 - 2 * j) * np.einsum('ki,vwk,kn->kviwn', self.lift[:, self.ifac[j, ki]].T, df[i][:, :, ki], self.face[self.ifac[i, ki]])
+                if i == j:
+                    np.add.at(jd, self.ielm[j, ki], blk)
+                else:
+                    jo[self.ielm[j, ki], self.ifac[j, ki]] += blk
+        jd /= self.djac[:, None, None, None, None]
+        jo /= self.djac[:, None, None, None, None, None]
+        # Derivative of stiff source term (- ds/du)
+        if self.frm.stiff:
+            idx = np.arange(nn)
+            jd[:, :, idx, :, idx] -= np.transpose(self.frm.stiff.evald(self.x, np.moveaxis(ue, 1, 0)), (3, 2, 0, 1))
+        return jd.reshape(ne, nv * nn, nv * nn), jo.reshape(ne, len(self.face), nv * nn, nv * nn)
+
+    def __coloring(self):
+        '''Color the elements so that no element shares a neighbor with another element of the same color (distance-2 coloring)
+            the coloring is computed once and for all
+        '''
+        if self.colors is None:
+            self.colors = np.full(len(self.enbr), -1)
+            for e in range(len(self.enbr)):
+                nbrs = set(n for n in self.enbr[e] if n >= 0)
+                nbrs |= set(nn for n in list(nbrs) for nn in self.enbr[n] if nn >= 0)
+                used = set(self.colors[list(nbrs)])
+                self.colors[e] = next(c for c in range(len(used) + 1) if c not in used)
+        return self.colors
+
+    def __jacobian_fd(self, u, t, eps = 1e-7):
+        '''Compute the Jacobian of the RHS of equation by finite differences
+            the elements of the same color are perturbed at once, so that the Jacobian is computed with n_colors*n_variables*(order+1) RHS evaluations
+        '''
+        ub = np.asarray(u, dtype=float).reshape(self.shape[0], -1)
+        ne, m = ub.shape
+        col = self.__coloring()
+        r0 = self.compute(u, t).reshape(ne, m)
+        jd = np.zeros((ne, m, m))
+        jo = np.zeros((ne, len(self.face), m, m))
+        for c in range(np.max(col) + 1):
+            ec = col == c
+            for j in range(m):
+                h = np.zeros(ne) # perturbation of each element
+                h[ec] = eps * (1 + np.abs(ub[ec, j]))
+                up = ub.copy()
+                up[:, j] += h
+                dr = self.compute(up.reshape(-1), t).reshape(ne, m) - r0
+                # each element is only influenced by itself or by one neighbor of the perturbed color
+                jd[ec, :, j] = dr[ec] / h[ec, None]
+                for f in range(len(self.face)):
+                    nc = (self.enbr[:, f] >= 0) & ec[self.enbr[:, f]]
+                    jo[nc, f, :, j] = dr[nc] / h[self.enbr[nc, f], None]
+        return jd, jo
+
+    def jvp(self, u, t, v, fd = False):
+        '''Compute the product of the Jacobian of the RHS of equation with a batch of vectors
+            v is a (n,) or a (n, k) array of vectors
+            the product is computed from the Jacobian blocks, or by finite differences (one RHS evaluation per vector) if fd is True
+        '''
+        v = np.asarray(v, dtype=float)
+        if fd:
+            vk = v.reshape(len(v), -1)
+            r0 = self.compute(u, t)
+            jv = np.empty_like(vk)
+            for k in range(vk.shape[1]):
+                h = 1e-7 * (1 + np.linalg.norm(u)) / max(np.linalg.norm(vk[:, k]), np.finfo(float).tiny)
+                jv[:, k] = (self.compute(u + h * vk[:, k], t) - r0) / h
+            return jv.reshape(v.shape)
+        jd, jo = self.jacobian(u, t)
+        ve = v.reshape(len(jd), jd.shape[1], -1)
+        jv = np.matmul(jd, ve)
+        for f in range(len(self.face)):
+            jv += np.matmul(jo[:, f], ve[self.enbr[:, f]]) # blocks of boundary faces are zero
+        return jv.reshape(v.shape)
+
+    def vjp(self, u, t, w, fd = False):
+        '''Compute the product of the transpose of the Jacobian of the RHS of equation with a batch of vectors
+            w is a (n,) or a (n, k) array of vectors
+            the product is computed from the Jacobian blocks, computed by finite differences if fd is True
+        '''
+        w = np.asarray(w, dtype=float)
+        jd, jo = self.jacobian(u, t, fd)
+        we = w.reshape(len(jd), jd.shape[1], -1)
+        wj = np.matmul(np.swapaxes(jd, 1, 2), we)
+        for f in range(len(self.face)):
+            nbr = self.enbr[:, f] >= 0
+            np.add.at(wj, self.enbr[nbr, f], np.matmul(np.swapaxes(jo[nbr, f], 1, 2), we[nbr]))
+        return wj.reshape(w.shape)
+
+    def sparse(self, u, t, fd = False):
+        '''Compute the Jacobian of the RHS of equation as a sparse matrix
+            the non-zero entries are given by the element/interface connectivity, and the matrix is returned in coordinate format (values, rows, columns)
+        '''
+        jd, jo = self.jacobian(u, t, fd)
+        ne, m = jd.shape[:2]
+        idx = np.arange(ne * m).reshape(ne, m) # global index of the unknowns of each element
+        vals = [jd.reshape(-1)]
+        rows = [np.repeat(idx, m, axis=1).reshape(-1)]
+        cols = [np.tile(idx, (1, m)).reshape(-1)]
+        for f in range(len(self.face)):
+            nbr = self.enbr[:, f] >= 0
+            vals.append(jo[nbr, f].reshape(-1))
+            rows.append(np.repeat(idx[nbr], m, axis=1).reshape(-1))
+            cols.append(np.tile(idx[self.enbr[nbr, f]], (1, m)).reshape(-1))
+        return np.concatenate(vals), np.concatenate(rows), np.concatenate(cols)
+
+    def compute_stiff(self, u, out = None):
+        '''Compute the stiff source term part of the RHS of equation
+            du/dt = - s(u)
+        '''
+        ue = np.asarray(u).reshape(self.shape)
+        if out is None:
+            out = np.empty(ue.size)
+        rhs = out.reshape(self.shape)
+        rhs[:] = -np.moveaxis(self.frm.stiff.eval(self.x, np.moveaxis(ue, 1, 0)), 0, 1)
+        return out
+
+    def solve_stiff(self, u, h, tol = 1e-12, maxit = 20):
+        '''Solve the implicit stiff source term equation
+            v + h * s(v) = u
+            using Newton's method, the (n_variables, n_variables) system of each evaluation point being solved independently of the others
+            dv = - (I + h * ds/dv)^-1 * (v + h * s(v) - u)
+        '''
+        ue = np.moveaxis(np.asarray(u).reshape(self.shape), 1, 0)
+        v = ue.copy()
+        eye = np.eye(self.frm.nv)
+        for it in range(maxit):
+            r = v + h * self.frm.stiff.eval(self.x, v) - ue
+            j = eye + h * np.moveaxis(self.frm.stiff.evald(self.x, v), (0, 1), (-2, -1))
+            dv = np.moveaxis(np.linalg.solve(j, -np.moveaxis(r, 0, -1)[..., None])[..., 0], -1, 0)
+            v += dv
+            if np.max(np.abs(dv) / (1 + np.abs(v))) < tol:
+                break
+        else:
+            print('Stiff source term solve did not converge after', maxit, 'iterations!')
+        return np.moveaxis(v, 0, 1).reshape(-1)
+
+    def compute_local(self, u, t, elms):
+        '''Compute RHS of equation on a subset of elements
+            only the solution on these elements and on their neighbors is used
+            the RHS is returned as a (n_elms, n_variables, order+1) array, along with the numerical flux on the faces of the elements, as a (n_elms, n_variables, 2) array
+        '''
+        ue = np.asarray(u).reshape(self.shape)
+        # Compute numerical fluxes on the interfaces of the elements, and gather them on element faces
+        k, idx = np.unique(self.eint[elms], return_inverse=True)
+        fstar = self.__flux(ue, t, k)
+        fe = np.moveaxis(fstar[:, idx.reshape(-1, len(self.face))], 0, 1) * self.esgn[elms][:, None, :]
+        # Compute physical fluxes on the elements
+        f = np.moveaxis(self.frm.flux.eval_batch(np.moveaxis(ue[elms], 1, 0)), 0, 1)
+        # Compute RHS
+        rhs = np.matmul(f, self.dmat.T) - np.matmul(fe, self.lift.T)
+        rhs /= self.djac[elms, None, None]
+        rhs -= self.__source()[elms]
+        if self.frm.stiff:
+            rhs -= np.moveaxis(self.frm.stiff.eval(self.x[elms], np.moveaxis(ue[elms], 1, 0)), 0, 1)
+        return rhs, fe
@@ -29,6 +29,30 @@ class NFlux:
     def __str__(self):
         raise RuntimeError('Flux not implemented!')
 
+    def eval_batch(self, u0, u1, n0):
+        '''Compute the flux at a batch of interfaces
+            u0 and u1 are (nv, n) arrays, n0 is a (n,) array
+        '''
+        return np.transpose([self.eval(u0[:, k], u1[:, k], n0[k]) for k in range(len(n0))])
+
+    def evald_batch(self, u0, u1, n0, eps = 1e-7):
+        '''Compute the derivatives of the flux with respect to the solution at cell 0 and cell 1 at a batch of interfaces
+            u0 and u1 are (nv, n) arrays, n0 is a (n,) array, the derivatives are returned as two (nv, nv, n) arrays
+            fallback using finite differences, to be overriden by the numerical fluxes
+        '''
+        f = self.eval_batch(u0, u1, n0)
+        df = (np.empty((len(u0),) + np.shape(u0)), np.empty((len(u0),) + np.shape(u0)))
+        for j in range(len(u0)):
+            h0 = eps * (1 + np.abs(u0[j]))
+            h1 = eps * (1 + np.abs(u1[j]))
+            up = np.array(u0, dtype=float)
+            up[j] += h0
+            df[0][:, j] = (self.eval_batch(up, u1, n0) - f) / h0
+            up = np.array(u1, dtype=float)
+            up[j] += h1
+            df[1][:, j] = (self.eval_batch(u0, up, n0) - f) / h1
+        return df
+
 # Lax–Friedrichs
 class LaxFried(NFlux):
     '''Lax–Friedrichs flux
@@ -48,3 +72,30 @@ class LaxFried(NFlux):
         c = max([max(abs(lam0)), max(abs(lam1))]) # max. wave speed
         # Evaluate the numerical flux
         return 0.5 * (np.array(self.f.eval(u0)) + np.array(self.f.eval(u1))) + 0.5 * (1 - self.alpha) * c * n0 * (np.array(u0) - np.array(u1))
+
+    def eval_batch(self, u0, u1, n0):
+        '''Compute the flux at a batch of interfaces between two cells using the physical fluxes f and the numerical fluxes nu at cell 0 and cell 1
+            u0 and u1 are (nv, n) arrays, n0 is a (n,) array
+        '''
+        # Compute the physical fluxes and the maximum wave speed
+        f0, c0 = self.f.evalw_batch(u0)
+        f1, c1 = self.f.evalw_batch(u1)
+        c = np.maximum(c0, c1) # max. wave speed
+        # Evaluate the numerical flux
+        return 0.5 * (f0 + f1) + 0.5 * (1 - self.alpha) * c * n0 * (u0 - u1)
+
+    def evald_batch(self, u0, u1, n0):
+        '''Compute the derivatives of the flux with respect to the solution at cell 0 and cell 1 at a batch of interfaces
+            df/du0 = 0.5 * df0/du0 + 0.5 * (1 - alpha) * n0 * (c * I + (u0 - u1) * dc/du0)
+            df/du1 = 0.5 * df1/du1 - 0.5 * (1 - alpha) * n0 * (c * I - (u0 - u1) * dc/du1)
+            where c = max(c0, c1) is the maximum wave speed, whose derivative is taken from the cell with the largest wave speed (cell 0 if equal)
+        '''
+        _, c0 = self.f.evalw_batch(u0)
+        _, c1 = self.f.evalw_batch(u1)
+        c = np.maximum(c0, c1) # max. wave speed
+        dc0 = np.where(c0 >= c1, self.f.evaldw_batch(u0), 0.) # derivative of max. wave speed
+        dc1 = np.where(c0 >= c1, 0., self.f.evaldw_batch(u1))
+        k = 0.5 * (1 - self.alpha) * n0
+        d = k * c * np.eye(len(u0))[:, :, None]
+        du = k * (u0 - u1)
+        return 0.5 * self.f.evald_batch(u0) + d + du[:, None] * dc0[None], 0.5 * self.f.evald_batch(u1) - d + du[:, None] * dc1[None]
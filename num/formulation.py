@@ -21,7 +21,7 @@
 class Formulation:
     '''Formulate a given physics
     '''
-    def __init__(self, msh, fld, nv, flux, ic, bcs, source = None):
+    def __init__(self, msh, fld, nv, flux, ic, bcs, source = None, stiff = None):
         # Grid and groups
         self.msh = msh # mesh
         self.field = fld # field
@@ -29,6 +29,7 @@ class Formulation:
         self.nv = nv # number of variables (physical unknowns)
         self.flux = flux # flux
         self.source = source # source term
+        self.stiff = stiff # stiff source term (depending on the solution)
         # Conditions
         self.ic = ic # initial condition
         self.bcs = bcs # list of boundary conditions
@@ -0,0 +1,72 @@
+# -*- coding: utf8 -*-
+# test encoding: à-é-è-ô-ï-€
+
+# Copyright 2021 Adrien Crovato
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+## Linear algebra
+# Adrien Crovato
+
+import numpy as np
+
+def thomas(lower, diag, upper, rhs):
+    '''Solve a block tridiagonal system using the block Thomas algorithm
+        L_i * x_i-1 + D_i * x_i + U_i * x_i+1 = r_i
+        lower, diag and upper are (n, m, m) arrays of blocks (the first lower and the last upper blocks are not used), rhs is a (n, m) or a (n, m, k) array
+        the system is solved in O(n) operations, each block row being eliminated by LU factorization of the (m, m) pivot block
+    '''
+    n, m = np.shape(diag)[:2]
+    c = np.empty_like(upper) # modified upper blocks
+    x = np.empty(np.shape(rhs)) # modified right-hand side, then solution
+    xr = x.reshape(n, m, -1)
+    rr = np.reshape(rhs, (n, m, -1))
+    # Forward elimination
+    piv = diag[0]
+    for i in range(n):
+        if i > 0:
+            piv = diag[i] - lower[i] @ c[i-1]
+            r = rr[i] - lower[i] @ xr[i-1]
+        else:
+            r = rr[i]
+        sol = np.linalg.solve(piv, np.concatenate((upper[i], r), axis=1))
+        c[i] = sol[:, :m]
+        xr[i] = sol[:, m:]
+    # Back substitution
+    for i in range(n-2, -1, -1):
+        xr[i] -= c[i] @ xr[i+1]
+    return x
+
+def arnoldi(matvec, v, m):
+    '''Estimate the extremal eigenvalues of a matrix using the Arnoldi iteration
+        A * V_k = V_k+1 * H_k
+        matvec is a function returning the product of the matrix with a vector, v is the starting vector, and m is the dimension of the Krylov subspace
+        the eigenvalues of the (m, m) upper Hessenberg matrix H (Ritz values) are returned, the extremal ones converging first
+    '''
+    v = np.asarray(v, dtype=float)
+    m = min(m, len(v))
+    q = np.zeros((m+1, len(v))) # orthonormal basis of the Krylov subspace
+    h = np.zeros((m+1, m)) # upper Hessenberg matrix
+    q[0] = v / np.linalg.norm(v)
+    for j in range(m):
+        w = matvec(q[j])
+        # modified Gram-Schmidt
+        for i in range(j+1):
+            h[i, j] = np.dot(q[i], w)
+            w -= h[i, j] * q[i]
+        h[j+1, j] = np.linalg.norm(w)
+        if h[j+1, j] <= 1e-12 * np.max(np.abs(h[:j+2, j])):
+            m = j + 1 # invariant subspace found
+            break
+        q[j+1] = w / h[j+1, j]
+    return np.linalg.eigvals(h[:m, :m])
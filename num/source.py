@@ -18,6 +18,9 @@
 ## Source term
 # Adrien Crovato
 
+import numpy as np
+from num.conditions import evaluate
+
 class Source:
     '''Source term
     '''
@@ -26,12 +29,103 @@ class Source:
     def __str__(self):
         return 'Source term'
 
-    def eval(self, e):
-        '''Evaluate the source term on the nodes an element
+    def eval(self, x, out = None):
+        '''Evaluate the source term at given positions
+            x is an array of positions, the source is returned as a (nv, ...) array
+        '''
+        if out is None:
+            out = np.empty((len(self.funs),) + np.shape(x))
+        for j in range(len(self.funs)):
+            out[j] = evaluate(self.funs[j], x)
+        return out
+
+class StiffSource:
+    '''Stiff source term, depending on the solution
+        S = S(x, u)
+        the Jacobian dS/du is computed by finite differences if not given
+    '''
+    def __init__(self, fun, jac = None, eps = 1e-7):
+        self.fun = fun # function(positions, solution) returning the (nv, ...) array of the source term
+        self.jac = jac # function(positions, solution) returning the (nv, nv, ...) array of the Jacobian
+        self.eps = eps # relative perturbation for finite differences
+    def __str__(self):
+        return 'Stiff source term'
+
+    def eval(self, x, u):
+        '''Evaluate the source term at given positions
+            x is an array of positions, u is the (nv, ...) array of the solution at these positions
+        '''
+        return np.asarray(self.fun(x, u), dtype=float)
+
+    def evald(self, x, u):
+        '''Evaluate the Jacobian of the source term at given positions
+            the Jacobian is returned as a (nv, nv, ...) array
+        '''
+        if self.jac is not None:
+            return np.asarray(self.jac(x, u), dtype=float)
+        # one-sided finite differences, one (vectorized) evaluation per variable
+        s = self.eval(x, u)
+        ds = np.empty((len(u),) + np.shape(u))
+        for j in range(len(u)):
+            h = self.eps * (1 + np.abs(u[j]))
+            up = np.array(u, dtype=float)
+            up[j] += h
+            ds[:, j] = (self.eval(x, up) - s) / h
+        return ds
+
+class Relaxation(StiffSource):
+    '''Relaxation source term
+        S_j = (u_j - ueq_j(x)) / tau
+        where ueq_j is the equilibrium value of variable j (not relaxed if None) and tau is the relaxation time
+    '''
+    def __init__(self, funs, tau):
+        StiffSource.__init__(self, None)
+        self.funs = funs # list of functions(position) for each variable
+        self.tau = tau # relaxation time
+    def __str__(self):
+        return 'Relaxation source term (tau = ' + str(self.tau) + ')'
+
+    def eval(self, x, u):
+        '''Evaluate the source term at given positions
+        '''
+        s = np.zeros(np.shape(u))
+        for j in range(len(self.funs)):
+            if self.funs[j] is not None:
+                s[j] = (u[j] - evaluate(self.funs[j], x)) / self.tau
+        return s
+
+    def evald(self, x, u):
+        '''Evaluate the Jacobian of the source term at given positions
+        '''
+        ds = np.zeros((len(u),) + np.shape(u))
+        for j in range(len(self.funs)):
+            if self.funs[j] is not None:
+                ds[j, j] = 1 / self.tau
+        return ds
+
+class Friction(StiffSource):
+    '''Quadratic bed friction source term for the shallow water equations
+        S = [0, cf * u|u| / h]
+    '''
+    def __init__(self, cf):
+        StiffSource.__init__(self, None)
+        self.cf = cf # friction coefficient
+    def __str__(self):
+        return 'Friction source term (cf = ' + str(self.cf) + ')'
+
+    def eval(self, x, u):
+        '''Evaluate the source term at given positions
         '''
-        x = e.evalx()
-        s = [[0.] * len(x) for _ in range(len(self.funs))]
-        for i in range(len(x)):
-            for j in range(len(self.funs)):
-                s[j][i] = self.funs[j](x[i])
+        s = np.zeros(np.shape(u))
+        s[1] = self.cf * u[1] * np.abs(u[1]) / u[0]
         return s
+
+    def evald(self, x, u):
+        '''Evaluate the Jacobian of the source term at given positions
+            dS = [0, 0;
+                  -cf * u|u| / h^2, 2 * cf * |u| / h]
+        '''
+        ds = np.zeros((len(u),) + np.shape(u))
+        ds[1, 0] = -self.cf * u[1] * np.abs(u[1]) / (u[0] * u[0])
+        ds[1, 1] = 2 * self.cf * np.abs(u[1]) / u[0]
+        return ds
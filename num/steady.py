@@ -0,0 +1,134 @@
+# -*- coding: utf8 -*-
+# test encoding: à-é-è-ô-ï-€
+
+# Copyright 2021 Adrien Crovato
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+## Steady-state solver
+# Adrien Crovato
+
+import time
+import numpy as np
+from num.timestep import Cfl
+from num.linalg import thomas
+
+class Steady:
+    '''Steady-state solver, marching the solution in pseudo-time until the residual vanishes
+        du/dtau = R(u)
+        each element is advanced with its own pseudo-time step (Courant-Friedrichs-Levy condition) by a multistage scheme
+        u_k = u_0 + alpha_k * dtau * R_smooth(u_k-1)
+        where the residual is smoothed implicitly along the line, i running over the evaluation points sorted by position
+        R_smooth_i - eps * (R_smooth_i-1 - 2 * R_smooth_i + R_smooth_i+1) = R_i
+        close to convergence, the solver can switch to Newton's method with pseudo-transient continuation
+        (I / dtau - dR/du) * du = R(u)
+        where the pseudo-time step increases as the residual decreases
+        ref A. Jameson, W. Schmidt and E. Turkel, Numerical solution of the Euler equations by finite volume methods using Runge-Kutta time-stepping schemes, AIAA paper 81-1259, 1981
+    '''
+    def __init__(self, discretization, writer, gui, cfl = 1., eps = 0., tol = 1e-8, maxit = 10000, newton = None, nprint = 100):
+        self.disc = discretization
+        self.writer = writer
+        self.gui = gui
+        self.ctrl = Cfl(cfl) # pseudo-time step controller
+        self.eps = eps # residual smoothing coefficient
+        self.tol = tol # tolerance on residual drop
+        self.maxit = maxit # maximum number of iterations
+        self.newton = newton # residual drop below which Newton's method is used (never if None)
+        self.nprint = nprint # print frequency
+        self.alpha = [1/4, 1/3, 1/2, 1.] # stage coefficients
+        self.res = [] # residual history
+        self.chain, self.fprv, self.fnxt = self.disc.line() # order of the elements along the line, with the faces shared with the previous and the next element
+        self.order = np.argsort(self.disc.x, axis=None, kind='stable') # order of the evaluation points along the line (coincident points kept in element order)
+    def __str__(self):
+        return 'Steady-state solver (CFL = ' + str(self.ctrl.cfl) + ', smoothing = ' + str(self.eps) + ')'
+
+    def run(self):
+        '''Iterate until the residual has decreased by tol, or for maxit iterations
+        '''
+        # Initial condition
+        print('Setting initial condition...', end='')
+        self.u = np.array(self.disc.frm.ic.eval(self.disc.elements))
+        print('done!')
+        self.t = 0.
+        # Set data structure for GUI
+        if self.gui:
+            self.gui.init(self.disc.elements, self.u)
+        # Pseudo-time loop
+        print('Starting pseudo-time loop using', self)
+        print('{0:>12s}   {1:>12s}'.format('Iter', 'Residual'))
+        cpu = time.perf_counter()
+        log = open(self.writer.name + '_residual.dat', 'w+')
+        log.write('{0:>12s} {1:>15s}\n'.format('Iter', 'Residual'))
+        self.res = []
+        rnwt = None # residual when switching to Newton's method
+        it = 0
+        for it in range(self.maxit + 1):
+            # compute residual, and store it
+            r = self.disc.compute(self.u, self.t)
+            self.res.append(np.sqrt(np.mean(r * r)))
+            log.write('{0:12d} {1:15.6e}\n'.format(it, self.res[-1]))
+            if it % self.nprint == 0:
+                print('{0:12d}   {1:12.6e}'.format(it, self.res[-1]))
+                if self.gui:
+                    self.gui.update(self.u, it, self.maxit)
+            # check convergence
+            if self.res[-1] <= self.tol * self.res[0] or it == self.maxit:
+                break
+            # update solution
+            dtau = self.ctrl.local(self.disc, self.u)
+            if self.newton is not None and self.res[-1] <= self.newton * self.res[0]:
+                rnwt = self.res[-1] if rnwt is None else rnwt
+                self.__newton(r, dtau * rnwt / self.res[-1])
+            else:
+                self.__stages(r, dtau)
+        log.close()
+        cpu = time.perf_counter() - cpu
+        print('{0:12d}   {1:12.6e}'.format(it, self.res[-1]))
+        if self.res[-1] <= self.tol * self.res[0]:
+            print('Converged in', it, 'iterations! Wall-clock time=', cpu, 's')
+        else:
+            print('Not converged after', it, 'iterations! Wall-clock time=', cpu, 's')
+        self.writer.save(it, self.t, self.u, force=True)
+        self.writer.close()
+
+    def __smooth(self, r):
+        '''Smooth the residual implicitly along the line
+            the smoothing operator (with zero-gradient ends) is diagonalized by extending the residual symmetrically, so that the system is solved by FFT
+        '''
+        if self.eps == 0:
+            return r
+        n = len(self.order)
+        rp = np.moveaxis(r.reshape(self.disc.shape), 1, -1).reshape(n, -1)[self.order] # residual on evaluation points sorted by position
+        lam = 1 + 2 * self.eps * (1 - np.cos(np.pi * np.arange(n + 1) / n)) # eigenvalues of the smoothing operator
+        rs = np.fft.irfft(np.fft.rfft(np.concatenate((rp, rp[::-1])), axis=0) / lam[:, None], 2 * n, axis=0)[:n]
+        rp[self.order] = rs
+        return np.moveaxis(rp.reshape(self.disc.shape[0], self.disc.shape[2], -1), -1, 1).reshape(-1)
+
+    def __stages(self, r, dtau):
+        '''Advance the solution in pseudo-time with the multistage scheme
+        '''
+        u0 = self.u.copy()
+        for k in range(len(self.alpha)):
+            if k > 0:
+                r = self.disc.compute(self.u, self.t)
+            du = self.__smooth(r).reshape(self.disc.shape) * (self.alpha[k] * dtau[:, None, None])
+            self.u = u0 + du.reshape(-1)
+
+    def __newton(self, r, dtau):
+        '''Advance the solution in pseudo-time with Newton's method
+        '''
+        m = self.disc.shape[1] * self.disc.shape[2]
+        jd, jo = self.disc.jacobian(self.u, self.t)
+        diag = np.eye(m) / dtau[self.chain, None, None] - jd[self.chain]
+        du = thomas(-jo[self.chain, self.fprv], diag, -jo[self.chain, self.fnxt], r.reshape(-1, m)[self.chain])
+        self.u.reshape(-1, m)[self.chain] += du
@@ -0,0 +1,223 @@
+# -*- coding: utf8 -*-
+# test encoding: à-é-è-ô-ï-€
+
+# Copyright 2021 Adrien Crovato
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+## Time step control
+# Adrien Crovato
+
+import numpy as np
+from num.linalg import arnoldi
+
+# Base class
+class TimeStep:
+    def __init__(self):
+        pass
+    def __str__(self):
+        raise RuntimeError('Time step control not implemented!')
+
+    def compute(self, disc, u, t):
+        '''Compute the time step for the solution u at time t
+        '''
+        raise RuntimeError('Time step control not implemented!')
+
+    def state(self):
+        '''Return the internal state of the controller, saved in checkpoints
+        '''
+        return {}
+
+    def restore(self, state):
+        '''Restore the internal state of the controller from a checkpoint
+        '''
+        for k, v in state.items():
+            setattr(self, k, v)
+
+# Fixed
+class Fixed(TimeStep):
+    '''Fixed time step
+    '''
+    def __init__(self, dt):
+        TimeStep.__init__(self)
+        self.dt = dt # time step
+    def __str__(self):
+        return 'Fixed time step (dt = ' + str(self.dt) + ')'
+
+    def compute(self, disc, u, t):
+        '''Return the fixed time step
+        '''
+        return self.dt
+
+# Courant-Friedrichs-Levy
+class Cfl(TimeStep):
+    '''Adaptive time step based on the Courant-Friedrichs-Levy condition
+        dt = cfl / (2p+1) * min(dx / c)
+        where p is the order of the discretization, and dx and c are the length and the maximum wave speed of each element
+    '''
+    def __init__(self, cfl):
+        TimeStep.__init__(self)
+        self.cfl = cfl # Courant-Friedrichs-Levy number
+    def __str__(self):
+        return 'CFL-adaptive time step (CFL = ' + str(self.cfl) + ')'
+
+    def compute(self, disc, u, t):
+        '''Compute the time step from the maximum wave speed in each element
+        '''
+        return np.min(self.local(disc, u))
+
+    def local(self, disc, u):
+        '''Compute the time step of each element
+        '''
+        c = disc.wavespeed(u)
+        dx = 2 * np.abs(disc.djac)
+        return self.cfl / (2 * disc.order + 1) * dx / np.maximum(c, np.finfo(float).tiny)
+
+class Levels(Cfl):
+    '''Local time step levels based on the Courant-Friedrichs-Levy condition
+        dt = dt_min * 2^L
+        dt_e = dt / 2^l_e <= cfl / (2p+1) * dx_e / c_e
+        where dt is the time step of the coarsest level, and each element takes 2^l_e sub-steps, with l_e < nlev
+        the levels of two neighboring elements differ by one at most
+    '''
+    def __init__(self, cfl, nlev = 4):
+        Cfl.__init__(self, cfl)
+        self.nlev = nlev # maximum number of levels
+        self.levels = None # level of each element
+    def __str__(self):
+        return 'CFL-adaptive local time steps (CFL = ' + str(self.cfl) + ', ' + str(self.nlev) + ' levels)'
+
+    def compute(self, disc, u, t):
+        '''Compute the time step of the coarsest level, and the level of each element
+        '''
+        dt = self.local(disc, u)
+        dtmin = np.min(dt)
+        k = np.minimum(np.floor(np.log2(dt / dtmin) + 1e-12).astype(int), self.nlev - 1) # number of times each element can double the smallest time step
+        e0, e1 = disc.ielm[0, :disc.nfi], disc.ielm[1, :disc.nfi]
+        while 1:
+            kn = k.copy()
+            np.minimum.at(kn, e0, k[e1] + 1)
+            np.minimum.at(kn, e1, k[e0] + 1)
+            if np.array_equal(kn, k):
+                break
+            k = kn
+        self.levels = np.max(k) - k
+        return dtmin * 2**np.max(k)
+
+# Spectral radius
+class Spectral(TimeStep):
+    '''Adaptive time step based on the eigenvalues of the Jacobian of the RHS
+        dt = fac * min_k max{h : |R(h * lam_k)| <= 1}
+        where R is the stability function of the integrator, and lam_k are the extremal eigenvalues of the Jacobian of the RHS at the current solution, estimated by the Arnoldi iteration
+        the Ritz values lie in the field of values of the Jacobian, so that, for a non-normal Jacobian (e.g. upwind flux with an inflow boundary), the time step lies between the limit of the field of values and the limit of the eigenvalues, the latter being unstable in practice
+        the Ritz values with a positive real part (e.g. spurious values of a central flux) are projected on the imaginary axis, since no time step can damp them
+        the time step is computed at the first call, then every nupd calls if nupd > 0, and an error is raised if it is lower than dtmin
+    '''
+    def __init__(self, stability, fac = 0.9, m = 30, nupd = 0, hmax = 100., dtmin = 0.):
+        TimeStep.__init__(self)
+        self.stability = stability # stability function of the integrator, R(z)
+        self.fac = fac # safety factor
+        self.m = m # dimension of the Krylov subspace
+        self.nupd = nupd # number of calls between two updates (never updated if 0)
+        self.hmax = hmax # maximum extent of the stability region
+        self.dtmin = dtmin # minimum time step
+        self.ncall = 0 # number of calls
+        self.dt = None # time step
+        self.lam = None # estimated eigenvalues
+    def __str__(self):
+        return 'Spectral time step (fac = ' + str(self.fac) + ')'
+
+    def compute(self, disc, u, t):
+        '''Compute the time step from the estimated eigenvalues of the Jacobian, if it needs to be updated
+        '''
+        if self.dt is None or (self.nupd > 0 and self.ncall % self.nupd == 0):
+            vals, rows, cols = disc.sparse(u, t)
+            def matvec(v): return np.bincount(rows, vals * v[cols], minlength=len(v))
+            self.lam = arnoldi(matvec, np.random.default_rng(0).random(len(u)) - 0.5, self.m)
+            self.dt = self.fac * self.limit(self.lam)
+            if self.dt < self.dtmin:
+                raise RuntimeError('Spectral time step ' + str(self.dt) + ' is lower than ' + str(self.dtmin) + '!')
+        self.ncall += 1
+        return self.dt
+
+    def state(self):
+        '''Return the time step, the number of calls and the estimated eigenvalues
+        '''
+        return {'dt': self.dt, 'ncall': self.ncall, 'lam': self.lam}
+
+    def limit(self, lam):
+        '''Compute the largest time step such that h * lam_k lies in the stability region for all the eigenvalues
+            the eigenvalues with a positive real part are first projected on the imaginary axis
+            the stability region is sampled along the direction of each eigenvalue, and its boundary is refined by bisection
+        '''
+        lam = np.where(np.real(lam) > 0, 1j * np.imag(lam), lam)
+        lam = lam[np.abs(lam) > 0]
+        if len(lam) == 0:
+            raise RuntimeError('Spectral time step cannot be computed for a zero Jacobian!')
+        r = np.linspace(0, self.hmax, 10001)[1:, None] # sampled distance to the origin
+        stable = np.abs(self.stability(r * lam / np.abs(lam))) <= 1 + 1e-12
+        i = np.argmin(stable, axis=0) # first unstable sample along each direction
+        if np.any(stable[i, range(len(lam))]):
+            raise RuntimeError('Stability region extends beyond ' + str(self.hmax) + ' along the direction of the eigenvalues!')
+        if np.any(i == 0):
+            raise RuntimeError('Stability region does not extend along the direction of eigenvalue ' + str(lam[np.argmin(i)]) + '!')
+        r0 = r[i-1, 0] # stable
+        r1 = r[i, 0] # unstable
+        for _ in range(50):
+            rm = 0.5 * (r0 + r1)
+            s = np.abs(self.stability(rm * lam / np.abs(lam))) <= 1 + 1e-12
+            r0 = np.where(s, rm, r0)
+            r1 = np.where(s, r1, rm)
+        return np.min(r0 / np.abs(lam))
+
+# Proportional-integral
+class Pi(TimeStep):
+    '''Adaptive time step based on a proportional-integral controller of the error of an embedded method
+        dt_n+1 = dt_n * fac * err_n^-(ki+kp) * err_n-1^kp, if the step is accepted (err_n <= 1)
+        dt_n+1 = dt_n * fac * err_n^-1/k, if the step is rejected (err_n > 1)
+        where k is the order of the error estimate plus one, ki = 0.3/k and kp = 0.4/k
+        ref G. Söderlind, Automatic control and adaptive time-stepping, Numerical Algorithms, 2002
+    '''
+    def __init__(self, dt, k, fac = 0.9, facmin = 0.2, facmax = 5.0):
+        TimeStep.__init__(self)
+        self.dt = dt # proposed time step
+        self.k = k # order of the error estimate plus one
+        self.ki = 0.3 / k # integral gain
+        self.kp = 0.4 / k # proportional gain
+        self.fac = fac # safety factor
+        self.facmin = facmin # minimum step size ratio
+        self.facmax = facmax # maximum step size ratio
+        self.err = 1.0 # error of the last accepted step
+    def __str__(self):
+        return 'PI-controlled time step'
+
+    def compute(self, disc, u, t):
+        '''Return the proposed time step
+        '''
+        return self.dt
+
+    def state(self):
+        '''Return the proposed time step and the error of the last accepted step
+        '''
+        return {'dt': self.dt, 'err': self.err}
+
+    def update(self, err, accepted):
+        '''Update the proposed time step from the error of the last step
+        '''
+        err = max(err, 1e-10)
+        if accepted:
+            fac = self.fac * err**-(self.ki + self.kp) * self.err**self.kp
+            self.err = err
+        else:
+            fac = min(1.0, self.fac * err**(-1 / self.k))
+        self.dt *= min(self.facmax, max(self.facmin, fac))
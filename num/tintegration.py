@@ -20,6 +20,9 @@
 
 import time
 import numpy as np
+from num.timestep import TimeStep, Fixed, Cfl, Levels, Pi
+from num.linalg import thomas
+import num.checkpoint as chkp
 
 # Base class
 class TimeIntegration:
@@ -27,25 +30,45 @@ class TimeIntegration:
         self.disc = discretization
         self.writer = writer
         self.gui = gui
+        self.dense = False # dense output
     def __str__(self):
         raise RuntimeError('Time Integration method not implemented!')
 
-    def run(self, dt, tmax):
+    def run(self, dt, tmax, tout = [], checkpoint = None, restart = None):
         '''Perform time integration
+            dt is either a time step (fixed) or a time step controller
+            the time steps are shortened so that the simulation lands exactly on tmax and on each time of tout, where the solution is saved
+            if the method provides a dense output, the solution is interpolated at the times of tout instead
+            the state of the integration (including the state of the writer) is saved if a checkpoint is given, and the integration is resumed from the checkpoint file restart if given
         '''
         # Initial condition
         print('Setting initial condition...', end='')
         self.u = np.array(self.disc.frm.ic.eval(self.disc.elements))
         print('done!')
+        # Time step control
+        ctrl = self.control(dt)
+        tout = sorted([to for to in tout if to < tmax]) + [tmax]
+        self.t = 0.
+        it = 0
+        io = 0 # index of next output time
+        # Restart
+        if restart:
+            data = chkp.load(restart)
+            self.u, self.t, it, io = data['u'], data['t'], data['it'], data['io']
+            self.restore(data['tint'])
+            ctrl.restore(data['ctrl'])
+            if 'wrt' in data:
+                self.writer.restore(data['wrt'])
+            print('Restarting from', restart, 'at iteration', it, 'and time', self.t)
         # Set data structure for GUI
         if self.gui:
             self.gui.init(self.disc.elements, self.u)
         # Time loop
-        print('Starting time loop using', self)
-        print('{0:>12s}   {1:>12s}'.format('Iter', 'Time'))
+        print('Starting time loop using', self, 'and', ctrl)
+        print('{0:>12s}   {1:>12s}   {2:>12s}'.format('Iter', 'Time', 'Step'))
         cpu = time.perf_counter()
-        self.t = 0.
-        it = 0
+        if checkpoint:
+            checkpoint.start()
         while 1:
             # display solution
             if self.gui:
@@ -53,16 +76,64 @@ class TimeIntegration:
             # check for end of the simulation
             if self.t >= tmax:
                 break
+            # compute time step, and shorten it to land on next output time
+            dt = ctrl.compute(self.disc, self.u, self.t)
+            tland = tmax if self.dense else tout[io]
+            land = self.t + dt * (1 + 1e-6) >= tland
+            if land:
+                dt = tland - self.t
             # update solution
-            self.u = self.step(self.u, self.t, dt)
-            self.t += dt
+            self.u, dtt = self.advance(self.u, self.t, dt)
+            self.t = tland if land and dtt == dt else self.t + dtt
             it += 1
-            # save and print
-            self.writer.save(it, self.t, self.u)
-            print('{0:12d}   {1:12.6f}'.format(it, self.t))
+            # save (solution at output times crossed during the step is interpolated) and print
+            force = False
+            while io < len(tout) and tout[io] <= self.t:
+                if tout[io] < self.t:
+                    self.writer.save(it, tout[io], self.interpolate(tout[io]), force=True)
+                else:
+                    force = True
+                io += 1
+            self.writer.save(it, self.t, self.u, force=force)
+            print('{0:12d}   {1:12.6f}   {2:12.6e}'.format(it, self.t, dtt))
+            # save checkpoint
+            if checkpoint and checkpoint.due(it):
+                checkpoint.save(it, {'u': self.u, 't': self.t, 'it': it, 'io': io, 'tint': self.state(), 'ctrl': ctrl.state(), 'wrt': self.writer.state()})
+        self.writer.close()
         cpu = time.perf_counter() - cpu
         print('Computation done! Wall-clock time=', cpu, 's')
 
+    def control(self, dt):
+        '''Get the time step controller
+        '''
+        return dt if isinstance(dt, TimeStep) else Fixed(dt)
+
+    def advance(self, u, t, dt):
+        '''Advance the solution from t to t+dt, and return it along with the time step actually taken
+        '''
+        return self.step(u, t, dt), dt
+
+    def interpolate(self, t):
+        '''Interpolate the solution at time t within the last step (dense output)
+        '''
+        raise RuntimeError('Dense output not implemented for ' + str(self) + '!')
+
+    def state(self):
+        '''Return the internal state of the method, saved in checkpoints
+        '''
+        return {}
+
+    def restore(self, state):
+        '''Restore the internal state of the method from a checkpoint
+        '''
+        for k, v in state.items():
+            setattr(self, k, v)
+
+    def stability(self, z):
+        '''Evaluate the stability function R(z) of the method, such that u(t+dt) = R(z) * u(t) for du/dt = lam * u, with z = lam * dt
+        '''
+        raise RuntimeError('Stability function not implemented for ' + str(self) + '!')
+
 # Backward Euler
 class BEuler(TimeIntegration):
     '''Backward (explicit) Euler time integration method
@@ -78,6 +149,12 @@ class BEuler(TimeIntegration):
         '''
         return u + dt * self.disc.compute(u, t)
 
+    def stability(self, z):
+        '''Evaluate the stability function
+            R(z) = 1 + z
+        '''
+        return 1 + z
+
 # Runge-Kutta
 class Rk4(TimeIntegration):
     '''Runge Kutta order 4
@@ -99,6 +176,12 @@ class Rk4(TimeIntegration):
         k4 = self.disc.compute(v3, t+dt)
         return u + dt/6* ( k1+2*k2+2*k3+k4 )
 
+    def stability(self, z):
+        '''Evaluate the stability function
+            R(z) = 1 + z + z^2/2 + z^3/6 + z^4/24
+        '''
+        return 1 + z * (1 + z/2 * (1 + z/3 * (1 + z/4)))
+
 class SspRk4(TimeIntegration):
     '''Strong-Stability-Preserving Runge Kutta order 4
     '''
@@ -120,3 +203,541 @@ class SspRk4(TimeIntegration):
         v4 = 0.17807995410773*u +  0.82192004589227*v3 + 0.54497475021237*dt*k4
         k5 = self.disc.compute(v4, t+0.93501063100924*dt)
         return 0.00683325884039*u + 0.51723167208978*v2 + 0.12759831133288*v3 + 0.34833675773694*v4 + 0.08460416338212*dt*k4 + 0.22600748319395*dt*k5
+
+    def stability(self, z):
+        '''Evaluate the stability function, by applying the stages to the linear equation
+        '''
+        v1 = 1 + 0.39175222700392*z
+        v2 = 0.44437049406734 + (0.55562950593266 + 0.36841059262959*z)*v1
+        v3 = 0.62010185138540 + (0.37989814861460 + 0.25189177424738*z)*v2
+        v4 = 0.17807995410773 + (0.82192004589227 + 0.54497475021237*z)*v3
+        return 0.00683325884039 + 0.51723167208978*v2 + (0.12759831133288 + 0.08460416338212*z)*v3 + (0.34833675773694 + 0.22600748319395*z)*v4
+
+# Low-storage Runge-Kutta
+class LowStorageRk(TimeIntegration):
+    '''Low-storage (2N) Runge Kutta, Williamson form
+        du = a_i * du + dt * rhs(u, t + c_i*dt)
+        u = u + b_i * du
+        only two registers are kept (the solution and the increment), the scaled RHS being added to the increment by the discretization
+        the increment is stored as b_i * du once the solution is updated, so that the solution is updated in place without temporary array
+    '''
+    def __init__(self, discretization, writer, gui, a, b, c):
+        TimeIntegration.__init__(self, discretization, writer, gui)
+        self.a = a # increment coefficients
+        self.b = b # solution coefficients
+        self.c = c # time coefficients
+        self.du = None # increment register
+
+    def step(self, u, t, dt):
+        '''Compute solution increment at next time step t+dt
+            the solution is updated in place, and returned
+        '''
+        if self.du is None or self.du.shape != u.shape:
+            self.du = np.empty_like(u)
+        for i in range(len(self.b)):
+            if i == 0:
+                self.du[...] = 0.
+            else:
+                self.du *= self.a[i] / self.b[i-1] # a_i * du
+            self.disc.compute(u, t + self.c[i]*dt, out=self.du, scale=dt) # + dt * rhs
+            self.du *= self.b[i]
+            u += self.du
+        return u
+
+    def stability(self, z):
+        '''Evaluate the stability function, by applying the stages to the linear equation
+        '''
+        u = np.ones(np.shape(z), dtype=complex)
+        du = np.zeros(np.shape(z), dtype=complex)
+        for i in range(len(self.b)):
+            du = self.a[i] * du + z * u
+            u = u + self.b[i] * du
+        return u
+
+class LsRk3(LowStorageRk):
+    '''Low-storage Runge Kutta order 3 (3 stages)
+        ref J. H. Williamson, Low-storage Runge-Kutta schemes, Journal of Computational Physics, 1980
+    '''
+    def __init__(self, discretization, writer, gui):
+        a = [0., -5/9, -153/128]
+        b = [1/3, 15/16, 8/15]
+        c = [0., 1/3, 3/4]
+        LowStorageRk.__init__(self, discretization, writer, gui, a, b, c)
+    def __str__(self):
+        return 'Low-storage Runge Kutta order 3 method'
+
+class LsRk4(LowStorageRk):
+    '''Low-storage Runge Kutta order 4 (5 stages)
+        ref M. H. Carpenter and C. A. Kennedy, Fourth-order 2N-storage Runge-Kutta schemes, NASA TM 109112, 1994
+    '''
+    def __init__(self, discretization, writer, gui):
+        a = [0.,
+             -567301805773/1357537059087,
+             -2404267990393/2016746695238,
+             -3550918686646/2091501179385,
+             -1275806237668/842570457699]
+        b = [1432997174477/9575080441755,
+             5161836677717/13612068292357,
+             1720146321549/2090206949498,
+             3134564353537/4481467310338,
+             2277821191437/14882151754819]
+        c = [0.,
+             1432997174477/9575080441755,
+             2526269341429/6820363218574,
+             2006345519317/3224310063776,
+             2802321613138/2924317926251]
+        LowStorageRk.__init__(self, discretization, writer, gui, a, b, c)
+    def __str__(self):
+        return 'Low-storage Runge Kutta order 4 method'
+
+# Embedded Runge-Kutta
+class EmbeddedRk(TimeIntegration):
+    '''Embedded Runge Kutta pair, with first same as last stage
+        u(t+dt) = u(t) + dt * sum_i b_i * k_i
+        e = dt * sum_i (b_i - bh_i) * k_i
+        the time step is adapted by a PI controller to keep the weighted RMS norm of the error estimate below one
+        err = sqrt(1/n * sum_j (e_j / (atol + rtol * max(|u_j(t)|, |u_j(t+dt)|)))^2)
+        the solution can be interpolated within the last step (dense output)
+    '''
+    def __init__(self, discretization, writer, gui, a, b, bh, c, order, rtol, atol):
+        TimeIntegration.__init__(self, discretization, writer, gui)
+        self.a = a # stage coefficients
+        self.b = b # solution coefficients
+        self.e = [bi - bhi for bi, bhi in zip(b, bh)] # error coefficients
+        self.c = c # time coefficients
+        self.order = order # order of the error estimate
+        self.rtol = rtol # relative tolerance
+        self.atol = atol # absolute tolerance
+        self.dense = True
+        self.k = None # stages
+        self.fsal = False # whether the first stage is known from the last step
+        self.ctrl = None # time step controller
+        self.nacc = 0 # number of accepted steps
+        self.nrej = 0 # number of rejected steps
+        self.nrhs = 0 # number of RHS evaluations
+        self.err = 0. # error of last step
+        self.last = None # last step (u(t), u(t+dt), t, dt), for dense output
+
+    def run(self, dt, tmax, tout = [], checkpoint = None, restart = None):
+        '''Perform time integration, dt being either the initial time step or a controller giving it
+        '''
+        TimeIntegration.run(self, dt, tmax, tout, checkpoint, restart)
+        print('Accepted steps:', self.nacc, ', rejected steps:', self.nrej, ', RHS evaluations:', self.nrhs)
+
+    def control(self, dt):
+        '''Get the PI time step controller, starting from the initial time step
+        '''
+        if isinstance(dt, TimeStep):
+            dt = dt.compute(self.disc, self.u, 0.)
+        self.k = None
+        self.fsal = False
+        self.nacc = self.nrej = self.nrhs = 0
+        self.ctrl = Pi(dt, self.order + 1)
+        return self.ctrl
+
+    def state(self):
+        '''Return the stages, the counters and the last step
+        '''
+        return {'k': self.k, 'fsal': self.fsal, 'nacc': self.nacc, 'nrej': self.nrej, 'nrhs': self.nrhs, 'err': self.err, 'last': self.last}
+
+    def step(self, u, t, dt):
+        '''Compute solution increment at next time step t+dt, and the error estimate
+        '''
+        if self.k is None or self.k[0].shape != u.shape:
+            self.k = [np.empty_like(u) for _ in range(len(self.b))]
+            self.fsal = False
+        if not self.fsal:
+            self.disc.compute(u, t, out=self.k[0])
+            self.nrhs += 1
+            self.fsal = True
+        for i in range(1, len(self.b)):
+            v = u.copy()
+            for j in range(i):
+                if self.a[i][j] != 0:
+                    v += (dt * self.a[i][j]) * self.k[j]
+            self.disc.compute(v, t + self.c[i]*dt, out=self.k[i])
+            self.nrhs += 1
+        # the last stage is evaluated at the solution (first same as last)
+        e = np.zeros_like(u)
+        for j in range(len(self.b)):
+            if self.e[j] != 0:
+                e += (dt * self.e[j]) * self.k[j]
+        self.err = np.sqrt(np.mean((e / (self.atol + self.rtol * np.maximum(np.abs(u), np.abs(v))))**2))
+        return v
+
+    def advance(self, u, t, dt):
+        '''Advance the solution from t to at most t+dt, rejecting and reducing the time step until the error is below the tolerance
+        '''
+        while 1:
+            v = self.step(u, t, dt)
+            accepted = self.err <= 1
+            self.ctrl.update(self.err, accepted)
+            if accepted:
+                break
+            self.nrej += 1
+            dt = min(dt, self.ctrl.dt)
+        self.nacc += 1
+        self.last = (u, v, t, dt, list(self.k))
+        self.k[0], self.k[-1] = self.k[-1], self.k[0] # first same as last
+        return v, dt
+
+    def interpolate(self, t):
+        '''Interpolate the solution at time t within the last step (cubic Hermite dense output)
+        '''
+        u0, u1, t0, dt, k = self.last
+        th = (t - t0) / dt
+        return (1 - th) * u0 + th * u1 + th * (th - 1) * ((1 - 2*th) * (u1 - u0) + (th - 1) * dt * k[0] + th * dt * k[-1])
+
+class Bs32(EmbeddedRk):
+    '''Bogacki-Shampine 3(2) embedded Runge Kutta pair
+        ref P. Bogacki and L. F. Shampine, A 3(2) pair of Runge-Kutta formulas, Applied Mathematics Letters, 1989
+    '''
+    def __init__(self, discretization, writer, gui, rtol = 1e-4, atol = 1e-6):
+        a = [[],
+             [1/2],
+             [0., 3/4],
+             [2/9, 1/3, 4/9]]
+        b = [2/9, 1/3, 4/9, 0.]
+        bh = [7/24, 1/4, 1/3, 1/8]
+        c = [0., 1/2, 3/4, 1.]
+        EmbeddedRk.__init__(self, discretization, writer, gui, a, b, bh, c, 2, rtol, atol)
+    def __str__(self):
+        return 'Bogacki-Shampine 3(2) method (rtol = ' + str(self.rtol) + ', atol = ' + str(self.atol) + ')'
+
+class Dp54(EmbeddedRk):
+    '''Dormand-Prince 5(4) embedded Runge Kutta pair
+        ref J. R. Dormand and P. J. Prince, A family of embedded Runge-Kutta formulae, Journal of Computational and Applied Mathematics, 1980
+        ref E. Hairer, S. P. Norsett and G. Wanner, Solving Ordinary Differential Equations I, Springer, 1993 (dense output)
+    '''
+    def __init__(self, discretization, writer, gui, rtol = 1e-4, atol = 1e-6):
+        a = [[],
+             [1/5],
+             [3/40, 9/40],
+             [44/45, -56/15, 32/9],
+             [19372/6561, -25360/2187, 64448/6561, -212/729],
+             [9017/3168, -355/33, 46732/5247, 49/176, -5103/18656],
+             [35/384, 0., 500/1113, 125/192, -2187/6784, 11/84]]
+        b = [35/384, 0., 500/1113, 125/192, -2187/6784, 11/84, 0.]
+        bh = [5179/57600, 0., 7571/16695, 393/640, -92097/339200, 187/2100, 1/40]
+        c = [0., 1/5, 3/10, 4/5, 8/9, 1., 1.]
+        EmbeddedRk.__init__(self, discretization, writer, gui, a, b, bh, c, 4, rtol, atol)
+        self.d = [-12715105075/11282082432, 0., 87487479700/32700410799, -10690763975/1880347072, 701980252875/199316789632, -1453857185/822651844, 69997945/29380423] # dense output coefficients
+    def __str__(self):
+        return 'Dormand-Prince 5(4) method (rtol = ' + str(self.rtol) + ', atol = ' + str(self.atol) + ')'
+
+    def interpolate(self, t):
+        '''Interpolate the solution at time t within the last step (fourth order dense output)
+        '''
+        u0, u1, t0, dt, k = self.last
+        th = (t - t0) / dt
+        r2 = u1 - u0
+        r3 = dt * k[0] - r2
+        r4 = r2 - dt * k[-1] - r3
+        r5 = dt * sum(dj * kj for dj, kj in zip(self.d, k) if dj != 0)
+        return u0 + th * (r2 + (1 - th) * (r3 + th * (r4 + (1 - th) * r5)))
+
+# Local time stepping
+class LocalRk(TimeIntegration):
+    '''Explicit Runge Kutta with local time stepping
+        u_e(t+dt_e) = u_e(t) + dt_e * sum_i b_i * k_i
+        the elements are grouped in levels, those of level l being advanced with the time step dt_e = dt/2^l
+        each level is advanced first, then the next (finer) level takes two sub-steps to catch up
+        the solution of the neighbors of a coarser level is linearly interpolated in time, that of the neighbors of a finer level is extrapolated from their RHS
+        once the finer level has caught up, the numerical flux on the faces shared with it is replaced by the one time-integrated by the finer elements, so that the scheme is conservative
+        ref M. J. Berger and P. Colella, Local adaptive mesh refinement for shock hydrodynamics, Journal of Computational Physics, 1989
+    '''
+    def __init__(self, discretization, writer, gui, a, b, c):
+        TimeIntegration.__init__(self, discretization, writer, gui)
+        self.a = a # stage coefficients
+        self.b = b # solution coefficients
+        self.c = c # time coefficients
+        self.ctrl = None # time step levels controller
+        self.nrhs = 0 # number of element RHS evaluations
+        self.nglb = 0 # number of element RHS evaluations with global time stepping
+
+    def run(self, dt, tmax, tout = [], checkpoint = None, restart = None):
+        '''Perform time integration, dt being a controller giving the local time steps
+        '''
+        TimeIntegration.run(self, dt, tmax, tout, checkpoint, restart)
+        print('Element RHS evaluations:', self.nrhs, '(', self.nglb, 'with global time stepping)')
+
+    def control(self, dt):
+        '''Get the local time step controller
+        '''
+        if isinstance(dt, Levels):
+            self.ctrl = dt
+        elif isinstance(dt, Cfl):
+            self.ctrl = Levels(dt.cfl)
+        else:
+            raise RuntimeError('Local time stepping requires a CFL-based time step control!')
+        self.nrhs = self.nglb = 0
+        return self.ctrl
+
+    def state(self):
+        '''Return the counters
+        '''
+        return {'nrhs': self.nrhs, 'nglb': self.nglb}
+
+    def advance(self, u, t, dt):
+        '''Advance the solution from t to t+dt, with all levels
+        '''
+        ue = u.reshape(self.disc.shape)
+        lvl = self.ctrl.levels
+        # Elements of each level, with their coarser and finer neighbors, and their faces shared with them
+        self.lvls = []
+        for l in range(np.max(lvl) + 1):
+            e = np.flatnonzero(lvl == l)
+            nbr = self.disc.enbr[e]
+            nlvl = np.where(nbr >= 0, lvl[nbr], l)
+            fin = np.unique(nbr[nlvl > l])
+            fnbr = self.disc.enbr[fin]
+            self.lvls.append((e, np.unique(nbr[nlvl < l]), fin, np.union1d(fin, fnbr[fnbr >= 0]), nlvl < l, nlvl > l))
+        # Working solution, solution at the beginning of the last (sub-)step of each element, and start and length of this step
+        self.w = ue.copy()
+        self.uo = ue.copy()
+        self.to = np.zeros(len(ue))
+        self.dto = np.ones(len(ue))
+        # Difference between time-integrated fluxes of finer and coarser elements on shared faces
+        self.dflx = np.zeros(self.disc.shape[:2] + (len(self.disc.face),))
+        self.__level(ue, 0, t, dt)
+        self.nglb += len(self.b) * len(ue) * 2**(len(self.lvls) - 1)
+        return u, dt
+
+    def __level(self, ue, l, t, dt):
+        '''Advance the elements of level l from t to t+dt, then the finer levels
+        '''
+        e, crs, fin, fnbr, fcrs, ffin = self.lvls[l]
+        if len(e):
+            self.uo[e] = ue[e]
+            self.to[e] = t
+            self.dto[e] = dt
+            # RHS on finer neighbors (all at time t, since neighboring levels differ by one at most)
+            if len(fin):
+                self.w[fnbr] = ue[fnbr]
+                kf = self.disc.compute_local(self.w, t, fin)[0]
+                self.nrhs += len(fin)
+            k = []
+            fe = np.zeros((len(e),) + self.dflx.shape[1:]) # time-integrated numerical flux on element faces
+            for i in range(len(self.b)):
+                ts = t + self.c[i] * dt
+                # stage solution on elements, and time-interpolated (or extrapolated) solution on coarser (or finer) neighbors
+                v = ue[e].copy()
+                for j in range(i):
+                    if self.a[i][j] != 0:
+                        v += (dt * self.a[i][j]) * k[j]
+                self.w[e] = v
+                th = ((ts - self.to[crs]) / self.dto[crs])[:, None, None]
+                self.w[crs] = (1 - th) * self.uo[crs] + th * ue[crs]
+                if len(fin):
+                    self.w[fin] = ue[fin] + (ts - t) * kf
+                ki, fi = self.disc.compute_local(self.w, ts, e)
+                k.append(ki)
+                fe += (dt * self.b[i]) * fi
+                self.nrhs += len(e)
+            for i in range(len(self.b)):
+                if self.b[i] != 0:
+                    ue[e] += (dt * self.b[i]) * k[i]
+            # remove flux on faces shared with finer elements, and add flux on faces shared with coarser elements to them
+            r, f = np.nonzero(ffin)
+            self.dflx[e[r], :, f] -= fe[r, :, f]
+            r, f = np.nonzero(fcrs)
+            self.dflx[self.disc.enbr[e[r], f], :, self.disc.enfc[e[r], f]] -= fe[r, :, f]
+        # Advance finer levels
+        if l + 1 < len(self.lvls):
+            self.__level(ue, l + 1, t, dt / 2)
+            self.__level(ue, l + 1, t + dt / 2, dt / 2)
+        # Correct solution with time-integrated flux of finer elements
+        if len(e):
+            r = e[np.any(ffin, axis=1)]
+            ue[r] -= np.matmul(self.dflx[r], self.disc.lift.T) / self.disc.djac[r, None, None]
+            self.dflx[r] = 0.
+
+class LocalSspRk3(LocalRk):
+    '''Strong-Stability-Preserving Runge Kutta order 3 with local time stepping
+        ref C.-W. Shu and S. Osher, Efficient implementation of essentially non-oscillatory shock-capturing schemes, Journal of Computational Physics, 1988
+    '''
+    def __init__(self, discretization, writer, gui):
+        a = [[],
+             [1.],
+             [1/4, 1/4]]
+        b = [1/6, 1/6, 2/3]
+        c = [0., 1., 1/2]
+        LocalRk.__init__(self, discretization, writer, gui, a, b, c)
+    def __str__(self):
+        return 'Local time stepping Strong-Stability-Preserving Runge Kutta order 3 method'
+
+class LocalRk4(LocalRk):
+    '''Runge Kutta order 4 with local time stepping
+    '''
+    def __init__(self, discretization, writer, gui):
+        a = [[],
+             [1/2],
+             [0., 1/2],
+             [0., 0., 1.]]
+        b = [1/6, 1/3, 1/3, 1/6]
+        c = [0., 1/2, 1/2, 1.]
+        LocalRk.__init__(self, discretization, writer, gui, a, b, c)
+    def __str__(self):
+        return 'Local time stepping Runge Kutta order 4 method'
+
+# Implicit-explicit Runge-Kutta
+class ImexRk(TimeIntegration):
+    '''Implicit-explicit Runge Kutta, the flux being integrated explicitly and the stiff source term implicitly
+        v_i = u(t) + dt * sum_j<i a_ij * f(v_j) + dt * sum_j<=i ai_ij * s(v_j)
+        u(t+dt) = u(t) + dt * sum_i b_i * f(v_i) + dt * sum_i bi_i * s(v_i)
+        where f is the RHS without the stiff source term, s is the stiff source term part of the RHS, and the implicit stages are solved independently on each evaluation point
+    '''
+    def __init__(self, discretization, writer, gui, a, b, c, ai, bi):
+        TimeIntegration.__init__(self, discretization, writer, gui)
+        self.a = a # explicit stage coefficients
+        self.b = b # explicit solution coefficients
+        self.c = c # time coefficients
+        self.ai = ai # implicit stage coefficients
+        self.bi = bi # implicit solution coefficients
+
+    def step(self, u, t, dt):
+        '''Compute solution increment at next time step t+dt
+        '''
+        k = [] # explicit stages
+        ki = [] # implicit stages
+        for i in range(len(self.b)):
+            v = u.copy()
+            for j in range(i):
+                if self.a[i][j] != 0:
+                    v += (dt * self.a[i][j]) * k[j]
+                if self.ai[i][j] != 0:
+                    v += (dt * self.ai[i][j]) * ki[j]
+            if self.ai[i][i] != 0:
+                w = self.disc.solve_stiff(v, dt * self.ai[i][i])
+                ki.append((w - v) / (dt * self.ai[i][i]))
+                v = w
+            else:
+                ki.append(self.disc.compute_stiff(v))
+            k.append(self.disc.compute(v, t + self.c[i]*dt, stiff=False))
+        for i in range(len(self.b)):
+            if self.b[i] != 0:
+                u = u + (dt * self.b[i]) * k[i]
+            if self.bi[i] != 0:
+                u = u + (dt * self.bi[i]) * ki[i]
+        return u
+
+class Ars222(ImexRk):
+    '''Ascher-Ruuth-Spiteri (2,2,2) implicit-explicit Runge Kutta order 2 (L-stable)
+        ref U. M. Ascher, S. J. Ruuth and R. J. Spiteri, Implicit-explicit Runge-Kutta methods for time-dependent partial differential equations, Applied Numerical Mathematics, 1997
+    '''
+    def __init__(self, discretization, writer, gui):
+        g = 1 - 1 / np.sqrt(2)
+        d = 1 - 1 / (2 * g)
+        a = [[],
+             [g],
+             [d, 1 - d]]
+        b = [d, 1 - d, 0.]
+        c = [0., g, 1.]
+        ai = [[0.],
+              [0., g],
+              [0., 1 - g, g]]
+        bi = [0., 1 - g, g]
+        ImexRk.__init__(self, discretization, writer, gui, a, b, c, ai, bi)
+    def __str__(self):
+        return 'Ascher-Ruuth-Spiteri (2,2,2) implicit-explicit method'
+
+class Ark4(ImexRk):
+    '''Additive Runge Kutta ARK4(3)6L[2]SA, implicit-explicit order 4 (L-stable)
+        ref C. A. Kennedy and M. H. Carpenter, Additive Runge-Kutta schemes for convection-diffusion-reaction equations, Applied Numerical Mathematics, 2003
+    '''
+    def __init__(self, discretization, writer, gui):
+        a = [[],
+             [1/2],
+             [13861/62500, 6889/62500],
+             [-116923316275/2393684061468, -2731218467317/15368042101831, 9408046702089/11113171139209],
+             [-451086348788/2902428689909, -2682348792572/7519795681897, 12662868775082/11960479115383, 3355817975965/11060851509271],
+             [647845179188/3216320057751, 73281519250/8382639484533, 552539513391/3454668386233, 3354512671639/8306763924573, 4040/17871]]
+        b = [82889/524892, 0., 15625/83664, 69875/102672, -2260/8211, 1/4]
+        c = [0., 1/2, 83/250, 31/50, 17/20, 1.]
+        ai = [[0.],
+              [1/4, 1/4],
+              [8611/62500, -1743/31250, 1/4],
+              [5012029/34652500, -654441/2922500, 174375/388108, 1/4],
+              [15267082809/155376265600, -71443401/120774400, 730878875/902184768, 2285395/8070912, 1/4],
+              [82889/524892, 0., 15625/83664, 69875/102672, -2260/8211, 1/4]]
+        ImexRk.__init__(self, discretization, writer, gui, a, b, c, ai, b)
+    def __str__(self):
+        return 'Additive Runge Kutta 4 implicit-explicit method'
+
+# Backward differentiation formula
+class Bdf(TimeIntegration):
+    '''Backward differentiation formula (implicit), solved with Newton's method
+        u(t+dt) = a_0 * u(t) + a_1 * u(t-dt_old) + g * dt * rhs(u(t+dt), t+dt)
+        => (I - g * dt * drhs/du) * dv = - (v - a_0 * u(t) - a_1 * u(t-dt_old) - g * dt * rhs(v, t+dt))
+        the Jacobian of the RHS is block tridiagonal, so that each Newton iteration is solved directly in O(n_elements) operations (block Thomas algorithm)
+        the coefficients of the second order formula depend on the ratio between consecutive time steps, and the first step is taken with the first order formula
+    '''
+    def __init__(self, discretization, writer, gui, order, tol = 1e-8, maxit = 20):
+        TimeIntegration.__init__(self, discretization, writer, gui)
+        self.order = order # order of the formula
+        self.tol = tol # relative tolerance on Newton's method increment
+        self.maxit = maxit # maximum number of Newton iterations per step
+        self.uold = None # solution at previous time step
+        self.dtold = None # previous time step
+        self.nit = 0 # number of Newton iterations
+        self.chain, self.fprv, self.fnxt = self.disc.line() # order of the elements along the line, with the faces shared with the previous and the next element
+
+    def run(self, dt, tmax, tout = [], checkpoint = None, restart = None):
+        '''Perform time integration
+        '''
+        self.uold = None
+        self.nit = 0
+        TimeIntegration.run(self, dt, tmax, tout, checkpoint, restart)
+        print('Newton iterations:', self.nit)
+
+    def state(self):
+        '''Return the solution at the previous time step, and the counter
+        '''
+        return {'uold': self.uold, 'dtold': self.dtold, 'nit': self.nit}
+
+    def step(self, u, t, dt):
+        '''Compute solution increment at next time step t+dt
+        '''
+        # Coefficients
+        if self.order == 2 and self.uold is not None:
+            w = dt / self.dtold
+            b = (1 + w)**2 / (1 + 2*w) * u - w**2 / (1 + 2*w) * self.uold
+            g = (1 + w) / (1 + 2*w)
+        else:
+            b = u
+            g = 1.
+        # Newton iterations
+        m = self.disc.shape[1] * self.disc.shape[2]
+        v = u.copy()
+        vb = v.reshape(-1, m)
+        for it in range(self.maxit):
+            r = v - b - g * dt * self.disc.compute(v, t + dt)
+            jd, jo = self.disc.jacobian(v, t + dt)
+            jd = np.eye(m) - g * dt * jd[self.chain]
+            jo = -g * dt * jo
+            dv = thomas(jo[self.chain, self.fprv], jd, jo[self.chain, self.fnxt], -r.reshape(-1, m)[self.chain])
+            vb[self.chain] += dv
+            self.nit += 1
+            if np.max(np.abs(dv)) <= self.tol * (1 + np.max(np.abs(v))):
+                break
+        else:
+            print('Newton\'s method did not converge after', self.maxit, 'iterations!')
+        self.uold = u
+        self.dtold = dt
+        return v
+
+class Bdf1(Bdf):
+    '''Backward differentiation formula order 1 (implicit Euler)
+    '''
+    def __init__(self, discretization, writer, gui, tol = 1e-8, maxit = 20):
+        Bdf.__init__(self, discretization, writer, gui, 1, tol, maxit)
+    def __str__(self):
+        return 'Backward differentiation formula order 1 method'
+
+class Bdf2(Bdf):
+    '''Backward differentiation formula order 2
+    '''
+    def __init__(self, discretization, writer, gui, tol = 1e-8, maxit = 20):
+        Bdf.__init__(self, discretization, writer, gui, 2, tol, maxit)
+    def __str__(self):
+        return 'Backward differentiation formula order 2 method'
@@ -18,6 +18,8 @@
 ## Physical flux
 # Adrien Crovato
 
+import numpy as np
+
 # Base class
 class PFlux:
     def __init__(self):
@@ -25,6 +27,49 @@ class PFlux:
     def __str__(self):
         raise RuntimeError('Physical flux not implemented!')
 
+    def eval_batch(self, u):
+        '''Compute the physical flux vector at a batch of points
+            u is a (nv, n...) array, the flux is returned as a (nv, n...) array
+            fallback calling eval on each point, to be overriden by the physics
+        '''
+        u = np.asarray(u)
+        ur = u.reshape(u.shape[0], -1)
+        f = np.array([self.eval(ur[:, k]) for k in range(ur.shape[1])], dtype=float).reshape(ur.shape[1], u.shape[0])
+        return np.transpose(f).reshape(u.shape)
+
+    def evald_batch(self, u):
+        '''Compute the physical flux derivative matrix at a batch of points
+            u is a (nv, n...) array, the flux derivative is returned as a (nv, nv, n...) array
+            fallback calling evald on each point, to be overriden by the physics
+        '''
+        u = np.asarray(u)
+        ur = u.reshape(u.shape[0], -1)
+        df = np.array([self.evald(ur[:, k]) for k in range(ur.shape[1])], dtype=float).reshape(ur.shape[1], u.shape[0], u.shape[0])
+        return np.moveaxis(df, 0, -1).reshape(u.shape[:1] + u.shape)
+
+    def evalw_batch(self, u):
+        '''Compute the physical flux vector and the maximum wave speed at a batch of points
+            u is a (nv, n...) array, the flux is returned as a (nv, n...) array and the wave speed as a (n...) array
+            fallback computing the eigenvalues of the flux derivative matrix, to be overriden by the physics
+        '''
+        lam = np.linalg.eigvals(np.moveaxis(self.evald_batch(u), (0, 1), (-2, -1))) # eigenvalues of flux derivative matrices
+        return self.eval_batch(u), np.max(np.abs(lam), axis=-1)
+
+    def evaldw_batch(self, u, eps = 1e-7):
+        '''Compute the derivative of the maximum wave speed at a batch of points
+            u is a (nv, n...) array, the derivative is returned as a (nv, n...) array
+            fallback using finite differences, to be overriden by the physics
+        '''
+        u = np.array(u, dtype=float)
+        c = self.evalw_batch(u)[1]
+        dc = np.empty(np.shape(u))
+        for j in range(len(u)):
+            h = eps * (1 + np.abs(u[j]))
+            up = u.copy()
+            up[j] += h
+            dc[j] = (self.evalw_batch(up)[1] - c) / h
+        return dc
+
 # Advection
 class Advection(PFlux):
     '''Advection flux
@@ -47,6 +92,28 @@ class Advection(PFlux):
         '''
         return [[self.a]]
 
+    def eval_batch(self, u):
+        '''Compute the physical flux vector at a batch of points
+        '''
+        return self.a * u
+
+    def evald_batch(self, u):
+        '''Compute the physical flux derivative matrix at a batch of points
+        '''
+        return np.full((1,) + np.shape(u), self.a)
+
+    def evalw_batch(self, u):
+        '''Compute the physical flux vector and the maximum wave speed at a batch of points
+            c = |a|
+        '''
+        return self.a * u, np.full(np.shape(u)[1:], abs(self.a))
+
+    def evaldw_batch(self, u):
+        '''Compute the derivative of the maximum wave speed at a batch of points
+            dc = 0
+        '''
+        return np.zeros(np.shape(u))
+
 class Advection2(PFlux):
     '''Advection flux
     '''
@@ -76,6 +143,34 @@ class Advection2(PFlux):
         df[1][1] = self.b
         return df
 
+    def eval_batch(self, u):
+        '''Compute the physical flux vector at a batch of points
+        '''
+        f = np.empty(np.shape(u))
+        f[0] = self.a * u[0]
+        f[1] = self.b * u[1]
+        return f
+
+    def evald_batch(self, u):
+        '''Compute the physical flux derivative matrix at a batch of points
+        '''
+        df = np.zeros((2,) + np.shape(u))
+        df[0, 0] = self.a
+        df[1, 1] = self.b
+        return df
+
+    def evalw_batch(self, u):
+        '''Compute the physical flux vector and the maximum wave speed at a batch of points
+            c = max(|a|, |b|)
+        '''
+        return self.eval_batch(u), np.full(np.shape(u)[1:], max(abs(self.a), abs(self.b)))
+
+    def evaldw_batch(self, u):
+        '''Compute the derivative of the maximum wave speed at a batch of points
+            dc = [0, 0]
+        '''
+        return np.zeros(np.shape(u))
+
 # Burger's
 class Burger(PFlux):
     '''Burger's flux
@@ -97,6 +192,28 @@ class Burger(PFlux):
         '''
         return [[u[0]]]
 
+    def eval_batch(self, u):
+        '''Compute the physical flux vector at a batch of points
+        '''
+        return 0.5 * u * u
+
+    def evald_batch(self, u):
+        '''Compute the physical flux derivative matrix at a batch of points
+        '''
+        return np.array(u)[None]
+
+    def evalw_batch(self, u):
+        '''Compute the physical flux vector and the maximum wave speed at a batch of points
+            c = |u|
+        '''
+        return 0.5 * u * u, np.abs(u[0])
+
+    def evaldw_batch(self, u):
+        '''Compute the derivative of the maximum wave speed at a batch of points
+            dc = sign(u)
+        '''
+        return np.sign(u)
+
 # Euler
 class Euler(PFlux):
     '''Euler flux
@@ -141,6 +258,68 @@ class Euler(PFlux):
         df[2][2] = self.gamma * v
         return df
 
+    def eval_batch(self, u):
+        '''Compute the physical flux vector at a batch of points
+        '''
+        # Pre-pro
+        v = u[1] / u[0] # u = rho * u / rho
+        p = (self.gamma - 1) * (u[2] - 0.5 * u[1] * v) # (gamma - 1) * (E - 0.5 * rho*u*u)
+        # Flux
+        f = np.empty(np.shape(u))
+        f[0] = u[1]
+        f[1] = u[1] * v + p
+        f[2] = (u[2] + p) * v
+        return f
+
+    def evald_batch(self, u):
+        '''Compute the physical flux derivative matrix at a batch of points
+        '''
+        # Pre-pro
+        v = u[1] / u[0] # = rho * u / rho
+        e = u[2] / u[0] # = E / rho
+        # Flux
+        df = np.zeros((3,) + np.shape(u))
+        df[0, 1] = 1.
+        df[1, 0] = 0.5 * (self.gamma - 3) * v * v
+        df[1, 1] = (3 - self.gamma) * v
+        df[1, 2] = self.gamma - 1
+        df[2, 0] = -self.gamma * e * v + (self.gamma - 1) * v * v * v
+        df[2, 1] = self.gamma * e + 1.5 * (1 - self.gamma) * v * v
+        df[2, 2] = self.gamma * v
+        return df
+
+    def evalw_batch(self, u):
+        '''Compute the physical flux vector and the maximum wave speed at a batch of points
+            c = |u| + sqrt(gamma*p/rho)
+        '''
+        # Pre-pro
+        v = u[1] / u[0] # u = rho * u / rho
+        p = (self.gamma - 1) * (u[2] - 0.5 * u[1] * v) # (gamma - 1) * (E - 0.5 * rho*u*u)
+        # Flux
+        f = np.empty(np.shape(u))
+        f[0] = u[1]
+        f[1] = u[1] * v + p
+        f[2] = (u[2] + p) * v
+        return f, np.abs(v) + np.sqrt(self.gamma * p / u[0])
+
+    def evaldw_batch(self, u):
+        '''Compute the derivative of the maximum wave speed at a batch of points
+            dc = sign(u) * [-u/rho, 1/rho, 0] + gamma/(2*a*rho) * [(gamma-1)/2*u^2 - p/rho, (1-gamma)*u, gamma-1]
+            where a = sqrt(gamma*p/rho) is the speed of sound
+        '''
+        # Pre-pro
+        v = u[1] / u[0] # u = rho * u / rho
+        p = (self.gamma - 1) * (u[2] - 0.5 * u[1] * v) # (gamma - 1) * (E - 0.5 * rho*u*u)
+        a = np.sqrt(self.gamma * p / u[0]) # speed of sound
+        s = np.sign(v)
+        k = self.gamma / (2 * a * u[0])
+        # Derivative
+        dc = np.empty(np.shape(u))
+        dc[0] = -s * v / u[0] + k * (0.5 * (self.gamma - 1) * v * v - p / u[0])
+        dc[1] = s / u[0] + k * (1 - self.gamma) * v
+        dc[2] = k * (self.gamma - 1)
+        return dc
+
 class ShallowWater(PFlux):
     '''Shallow water flux
     '''
@@ -170,3 +349,36 @@ class ShallowWater(PFlux):
         df[1][0] = self.g
         df[1][1] = u[1]
         return df
+
+    def eval_batch(self, u):
+        '''Compute the physical flux vector at a batch of points
+        '''
+        f = np.empty(np.shape(u))
+        f[0] = u[0] * u[1]
+        f[1] = self.g * u[0] + 0.5 * u[1] * u[1]
+        return f
+
+    def evald_batch(self, u):
+        '''Compute the physical flux derivative matrix at a batch of points
+        '''
+        df = np.empty((2,) + np.shape(u))
+        df[0, 0] = u[1]
+        df[0, 1] = u[0]
+        df[1, 0] = self.g
+        df[1, 1] = u[1]
+        return df
+
+    def evalw_batch(self, u):
+        '''Compute the physical flux vector and the maximum wave speed at a batch of points
+            c = |u| + sqrt(g*h)
+        '''
+        return self.eval_batch(u), np.abs(u[1]) + np.sqrt(self.g * u[0])
+
+    def evaldw_batch(self, u):
+        '''Compute the derivative of the maximum wave speed at a batch of points
+            dc = [g/(2*sqrt(g*h)), sign(u)]
+        '''
+        dc = np.empty(np.shape(u))
+        dc[0] = 0.5 * self.g / np.sqrt(self.g * u[0])
+        dc[1] = np.sign(u[1])
+        return dc
@@ -0,0 +1,119 @@
+# -*- coding: utf8 -*-
+# test encoding: à-é-è-ô-ï-€
+
+# Copyright 2021 Adrien Crovato
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+## Background writer test
+# Adrien Crovato
+#
+# Solve the Burger's equation on a 1D grid, writing the solution synchronously and in a background thread
+# Check that the solver waits only when all the buffers are in use, that the buffers are reused, and that the errors of the thread are raised
+
+import time
+import numpy as np
+import num.tintegration as numt
+import utils.cases as cases
+import utils.writer as wrtr
+import utils.testing as tst
+
+class Slow(wrtr.Output):
+    '''Record the solution, slowly, or raise an error at a given iteration
+    '''
+    def __init__(self, delay, nerr = -1):
+        wrtr.Output.__init__(self, 'slow', 1)
+        self.delay = delay # time needed to save
+        self.nerr = nerr # iteration at which an error is raised
+        self.nt = [] # iterations
+        self.u = [] # solutions
+        self.bufs = set() # identifiers of the buffers
+    def __str__(self):
+        return 'Slow recorder'
+
+    def save(self, nt, t, u, force = False):
+        '''Record the iteration and the solution, after some delay
+        '''
+        time.sleep(self.delay)
+        if nt == self.nerr:
+            raise ValueError('cannot save iteration ' + str(nt))
+        self.nt.append(nt)
+        self.u.append(np.copy(u))
+        self.bufs.add(id(u))
+
+def main(gui):
+    # Constants
+    l = 10 # domain length
+    n = 50 # number of elements
+    p = 3 # order of discretization
+    u1 = 1.0 # in-out velocity
+    v = ['u'] # physical variables
+    cfl = 0.5 * 1 / (2*p+1) # half of max. Courant-Friedrichs-Levy for stability
+    # Parameters
+    dx = l / n # cell length
+    dt = cfl * dx / abs(u1) # time step
+    tmax = 2.0 # simulation time
+    nbuf = 2 # number of buffers
+    ns = 10 # number of saves
+
+    # Generate discretization, and run with a synchronous and an asynchronous writer
+    disc = cases.burger(u1, l, n, p)
+    wrts = [wrtr.BinaryWriter('sol', 1, v, disc), wrtr.AsyncWriter(wrtr.BinaryWriter('sol_async', 1, v, disc), nbuf=nbuf)]
+    recs = []
+    for wrt in wrts:
+        tint = numt.LsRk4(disc, wrt, gui)
+        tint.run(dt, tmax, tout=[tmax/2])
+        with open(wrt.name + '.bin', 'rb') as f:
+            count, _, desc, _ = wrtr.header(f)
+            recs.append(np.fromfile(f, dtype=wrtr.record(desc), count=count))
+    # Save faster than the writer, modifying the solution after each save
+    u = disc.frm.ic.eval(disc.elements)
+    slow = Slow(0.05)
+    wrt = wrtr.AsyncWriter(slow, nbuf=nbuf)
+    for k in range(ns):
+        wrt.save(k, 0., u)
+        u += 1.
+    wrt.close()
+    nwait = wrt.nwait # number of times the solver waited for a buffer
+    uref = disc.frm.ic.eval(disc.elements)
+    # Raise an error in the thread
+    wrt = wrtr.AsyncWriter(Slow(0., nerr=2), nbuf=nbuf)
+    raised = 0
+    try:
+        for k in range(ns):
+            wrt.save(k, 0., uref)
+            time.sleep(0.01)
+        wrt.close()
+    except RuntimeError as e:
+        raised = isinstance(e.__cause__, ValueError)
+
+    # Test
+    tests = tst.Tests()
+    tests.add(tst.Test('Number of records', len(recs[1]), len(recs[0]), 0.))
+    tests.add(tst.Test('Max(it_async-it)', np.max(np.abs(recs[1]['nt'] - recs[0]['nt'])), 0., 0.))
+    tests.add(tst.Test('Max(u_async-u)', np.max(np.abs(recs[1]['u'] - recs[0]['u'])), 0., 0.))
+    tests.add(tst.Test('Max(u_last-u)', np.max(np.abs(recs[1]['u'][-1].reshape(-1) - tint.u)), 0., 0.))
+    tests.add(tst.Test('Iterations (slow writer)', slow.nt == list(range(ns)), 1, 0.))
+    tests.add(tst.Test('Max(u_saved-u) (slow writer)', max(np.max(np.abs(slow.u[k] - uref - k)) for k in range(ns)), 0., 0.)) # copied before being modified
+    tests.add(tst.Test('Number of buffers', len(slow.bufs), nbuf, 0.))
+    tests.add(tst.Test('Waited for a buffer', nwait > 0, 1, 0.))
+    tests.add(tst.Test('Raised (background thread)', raised, 1, 0.))
+    tests.run()
+
+if __name__=="__main__":
+    if parse().gui:
+        import utils.gui as gui
+        main(gui.Gui())
+        input('<ENTER TO QUIT>')
+    else:
+        main(None)
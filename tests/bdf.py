@@ -0,0 +1,109 @@
+# -*- coding: utf8 -*-
+# test encoding: à-é-è-ô-ï-€
+
+# Copyright 2021 Adrien Crovato
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+## Backward differentiation formula test
+# Adrien Crovato
+#
+# Solve the Burger's equation on a 1D grid using implicit time integration, with time steps larger than the explicit stability limit
+# Check the order of the methods and the number of Newton iterations on the (linear) advection equation, that Newton's method converges in a few iterations per step on the Burger's equation, and the block Thomas algorithm against a dense solver
+
+import numpy as np
+import num.tintegration as numt
+import num.linalg as nla
+import utils.cases as cases
+import utils.writer as wrtr
+import utils.testing as tst
+
+def main(gui):
+    # Constants
+    l = 10 # domain length
+    n = 3 # number of elements
+    p = 5 # order of discretization
+    u1 = 1.0 # in-out velocity
+    v = ['u'] # physical variables
+    cfl = 5 * 1 / (2*p+1) # five times max. Courant-Friedrichs-Levy for stability
+    # Functions
+    def fun(x, t): return -u1 * np.sign(x-l/2)
+    def wave(x, t): return np.sin(np.pi*(x-t))
+    if gui:
+        gui.vars = v
+        gui.frefs = [fun]
+    # Parameters
+    dx = l / n # cell length
+    dt = cfl * dx / abs(u1) # time step
+    tmax = 10.0 # simulation time
+
+    # Generate discretization
+    disc = cases.burger(u1, l, n, p)
+    # Define time integration methods and run
+    wrt = wrtr.Writer('sol', 1, v, disc)
+    tints = [numt.Bdf1(disc, wrt, gui), numt.Bdf2(disc, wrt, gui)]
+    uexact = fun(disc.x, tmax).reshape(-1) # exact solution at element eval point
+    maxdiff = [] # infinite norm
+    nrmdiff = [] # Frobenius norm
+    for tint in tints:
+        tint.run(dt, tmax)
+        maxdiff.append(np.max(np.abs(tint.u - uexact)))
+        nrmdiff.append(np.linalg.norm(tint.u - uexact))
+    nnwt = tints[-1].nit / wrt.nt # number of Newton iterations per step
+    # Compute the order of the methods on the advection equation (self-convergence), with the number of Newton iterations per step
+    disc = cases.advection(wave, 2, 10, 4)
+    order = []
+    nits = []
+    for tint in [numt.Bdf1(disc, None, gui), numt.Bdf2(disc, None, gui)]:
+        sols = []
+        for ns in [40, 80, 160]:
+            tint.uold, tint.nit = None, 0
+            u = disc.frm.ic.eval(disc.elements)
+            for i in range(ns):
+                u = tint.step(u, i * 0.5 / ns, 0.5 / ns)
+            sols.append(u)
+        order.append(np.log2(np.max(np.abs(sols[0] - sols[1])) / np.max(np.abs(sols[1] - sols[2]))))
+        nits.append(tint.nit / ns)
+    # Solve a random block tridiagonal system with the block Thomas algorithm and with a dense solver
+    rng = np.random.default_rng(0)
+    nb, m = 6, 4 # number and size of blocks
+    low, diag, upp = rng.random((nb, m, m)), rng.random((nb, m, m)) + m * np.eye(m), rng.random((nb, m, m))
+    rhs = rng.random((nb, m, 2))
+    mat = np.zeros((nb * m, nb * m))
+    for i in range(nb):
+        mat[i*m:(i+1)*m, i*m:(i+1)*m] = diag[i]
+        if i > 0:
+            mat[i*m:(i+1)*m, (i-1)*m:i*m] = low[i]
+        if i < nb - 1:
+            mat[i*m:(i+1)*m, (i+1)*m:(i+2)*m] = upp[i]
+    xd = np.linalg.solve(mat, rhs.reshape(nb * m, -1)).reshape(rhs.shape)
+    xt = nla.thomas(low, diag, upp, rhs)
+
+    # Test
+    tests = tst.Tests()
+    for i in range(len(tints)):
+        tests.add(tst.Test('Max(u-u_exact) BDF' + str(tints[i].order), maxdiff[i], 0., 1e-2))
+        tests.add(tst.Test('Norm(u-u_exact) BDF' + str(tints[i].order), nrmdiff[i], 0., 1e-2))
+        tests.add(tst.Test('Order BDF' + str(i+1), order[i], i+1, 0.05))
+        tests.add(tst.Test('Newton iterations per step (linear) BDF' + str(i+1), nits[i], 2, 0.))
+    tests.add(tst.Test('Newton iterations per step BDF2 < 6', nnwt < 6, 1, 0.))
+    tests.add(tst.Test('Max(x_thomas-x_dense)', np.max(np.abs(xt - xd)), 0., 1e-12))
+    tests.run()
+
+if __name__=="__main__":
+    if parse().gui:
+        import utils.gui as gui
+        main(gui.Gui())
+        input('<ENTER TO QUIT>')
+    else:
+        main(None)
@@ -0,0 +1,104 @@
+# -*- coding: utf8 -*-
+# test encoding: à-é-è-ô-ï-€
+
+# Copyright 2021 Adrien Crovato
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+## Binary output test
+# Adrien Crovato
+#
+# Solve the Burger's equation on a 1D grid, writing the solution to a single binary file, then restart the integration and append to the same file
+# Check the layout of the file, and append to a file which was not closed (interrupted run), then restart over iterations already saved
+
+import os
+import numpy as np
+import num.tintegration as numt
+import num.checkpoint as chkp
+import utils.cases as cases
+import utils.writer as wrtr
+import utils.testing as tst
+
+def main(gui):
+    # Constants
+    l = 10 # domain length
+    n = 10 # number of elements
+    p = 3 # order of discretization
+    u1 = 1.0 # in-out velocity
+    v = ['u'] # physical variables
+    cfl = 0.5 * 1 / (2*p+1) # half of max. Courant-Friedrichs-Levy for stability
+    # Parameters
+    dx = l / n # cell length
+    dt = cfl * dx / abs(u1) # time step
+    tmax = 4.0 # simulation time
+
+    # Generate discretization
+    disc = cases.burger(u1, l, n, p)
+    # Define time integration method and run while saving checkpoints, then restart from the first checkpoint with a new writer
+    recs = []
+    chk = chkp.Checkpoint('chk', freq=20, keep=10)
+    for restart in [None, 'chk_000020.chk']:
+        wrt = wrtr.BinaryWriter('sol', 4, v, disc, chunk=8)
+        tint = numt.Rk4(disc, wrt, gui)
+        tint.run(dt, tmax, tout=[tmax/3], checkpoint=chk, restart=restart)
+        with open(wrt.fname, 'rb') as f:
+            count, hsize, desc, x = wrtr.header(f)
+            recs.append(np.fromfile(f, dtype=wrtr.record(desc), count=count))
+    fsize = os.path.getsize(wrt.fname) - hsize - len(recs[-1]) * recs[-1].itemsize # size not used by header and records
+    # Write a few records without closing the file (preallocated records left), then append to it
+    if os.path.isfile('part.bin'):
+        os.remove('part.bin')
+    u0 = disc.frm.ic.eval(disc.elements)
+    wrt = wrtr.BinaryWriter('part', 1, v, disc, chunk=8)
+    for k in range(3):
+        wrt.save(k, 0.1 * k, (k + 1) * u0)
+    wrt = wrtr.BinaryWriter('part', 1, v, disc, chunk=8)
+    wrt.save(3, 0.3, 4 * u0)
+    wrt.close()
+    with open('part.bin', 'rb') as f:
+        count, _, desc, _ = wrtr.header(f)
+        part = np.fromfile(f, dtype=wrtr.record(desc), count=count)
+    # Restart from the last iteration saved, saving it again
+    wrt = wrtr.BinaryWriter('part', 1, v, disc, chunk=8)
+    for k in range(3, 6):
+        wrt.save(k, 0.1 * k, (k + 1) * u0)
+    wrt.close()
+    with open('part.bin', 'rb') as f:
+        count, _, desc, _ = wrtr.header(f)
+        over = np.fromfile(f, dtype=wrtr.record(desc), count=count)
+
+    # Test
+    tests = tst.Tests()
+    tests.add(tst.Test('Max(x-x_disc)', np.max(np.abs(x - disc.x)), 0., 0.))
+    tests.add(tst.Test('Number of records', len(recs[0]), recs[0]['nt'][-1] // 4 + 2, 0.)) # every 4 iterations, and forced outputs
+    tests.add(tst.Test('Time of last record', recs[0]['t'][-1], tmax, 0.))
+    tests.add(tst.Test('Max(u_last-u)', np.max(np.abs(recs[0]['u'][-1].reshape(-1) - tint.u)), 0., 0.))
+    tests.add(tst.Test('Number of records (restart)', len(recs[1]), len(recs[0]), 0.))
+    tests.add(tst.Test('Max(u_restart-u)', np.max(np.abs(recs[1]['u'] - recs[0]['u'])), 0., 0.))
+    tests.add(tst.Test('Header size % alignment', hsize % wrtr.BinaryWriter.align, 0, 0.))
+    tests.add(tst.Test('Unused size', fsize, 0, 0.))
+    tests.add(tst.Test('Iterations not saved every 4 iterations', np.sum(recs[0]['nt'] % 4 != 0), 2, 0.)) # forced outputs
+    tests.add(tst.Test('Number of records (interrupted)', len(part), 4, 0.))
+    tests.add(tst.Test('Max(u-u_saved) (interrupted)', np.max(np.abs(part['u'].reshape(4, -1) - np.arange(1, 5)[:, None] * u0)), 0., 0.))
+    tests.add(tst.Test('Unique and increasing iterations (overlapping restart)', np.all(np.diff(over['nt']) > 0), 1, 0.))
+    tests.add(tst.Test('Number of records (overlapping restart)', len(over), 6, 0.))
+    tests.add(tst.Test('Max(u-u_saved) (overlapping restart)', np.max(np.abs(over['u'].reshape(6, -1) - np.arange(1, 7)[:, None] * u0)), 0., 0.))
+    tests.run()
+
+if __name__=="__main__":
+    if parse().gui:
+        import utils.gui as gui
+        main(gui.Gui())
+        input('<ENTER TO QUIT>')
+    else:
+        main(None)
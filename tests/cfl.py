@@ -0,0 +1,88 @@
+# -*- coding: utf8 -*-
+# test encoding: à-é-è-ô-ï-€
+
+# Copyright 2021 Adrien Crovato
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+## CFL-adaptive time step test
+# Adrien Crovato
+#
+# Solve the Burger's equation on a 1D grid, the time step being adapted to the solution by the Courant-Friedrichs-Levy condition
+# Check each time step against the condition, and that the simulation lands on the output times
+
+import numpy as np
+import num.tintegration as numt
+import num.timestep as numts
+import utils.cases as cases
+import utils.writer as wrtr
+import utils.testing as tst
+
+class Recorder(wrtr.Output):
+    '''Record the solution at each iteration
+    '''
+    def __init__(self):
+        wrtr.Output.__init__(self, 'rec', 1)
+        self.t = [0.] # times
+        self.u = [] # solutions
+        self.force = [] # whether each save was forced
+    def __str__(self):
+        return 'Recorder'
+
+    def save(self, nt, t, u, force = False):
+        '''Record the time and the solution
+        '''
+        self.t.append(t)
+        self.u.append(np.copy(u))
+        self.force.append(force)
+
+def main(gui):
+    # Constants
+    l = 10 # domain length
+    n = 10 # number of elements
+    p = 3 # order of discretization
+    u1 = 1.0 # in-out velocity
+    cfl = 0.5 # Courant-Friedrichs-Levy number
+    # Parameters
+    tmax = 2.0 # simulation time
+    tout = [0.5, 1.25] # output times
+
+    # Generate discretization, and run
+    disc = cases.burger(u1, l, n, p)
+    wrt = Recorder()
+    tint = numt.Rk4(disc, wrt, gui)
+    tint.run(numts.Cfl(cfl), tmax, tout=tout)
+    # Compute the time step from the condition, at the beginning of each step
+    dx = disc.x[:, -1] - disc.x[:, 0] # element length
+    def cond(u): return cfl / (2*p+1) * np.min(dx / np.max(np.abs(u.reshape(disc.shape)[:, 0, :]), axis=1))
+    us = [disc.frm.ic.eval(disc.elements)] + wrt.u[:-1]
+    dts = np.diff(wrt.t)
+    dtc = np.array([cond(u) for u in us])
+    land = np.array(wrt.force) # steps shortened to land on an output time
+
+    # Test
+    tests = tst.Tests()
+    tests.add(tst.Test('Max(dt-dt_cfl)/dt_cfl', np.max(np.abs(dts[~land] - dtc[~land]) / dtc[~land]), 0., 1e-12))
+    tests.add(tst.Test('dt <= dt_cfl (landing)', np.all(dts[land] <= dtc[land] * (1 + 1e-6)), 1, 0.))
+    tests.add(tst.Test('Min(dt_cfl) < Max(dt_cfl)', np.min(dtc) / np.max(dtc) < 1 - 1e-3, 1, 0.)) # time step adapted to the solution
+    tests.add(tst.Test('Max(t_out-t)', np.max(np.abs(np.array(wrt.t[1:])[land] - np.array(tout + [tmax]))), 0., 0.))
+    tests.add(tst.Test('t', tint.t, tmax, 0.))
+    tests.run()
+
+if __name__=="__main__":
+    if parse().gui:
+        import utils.gui as gui
+        main(gui.Gui())
+        input('<ENTER TO QUIT>')
+    else:
+        main(None)
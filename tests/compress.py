@@ -0,0 +1,90 @@
+# -*- coding: utf8 -*-
+# test encoding: à-é-è-ô-ï-€
+
+# Copyright 2021 Adrien Crovato
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+## Compression test
+# Adrien Crovato
+#
+# Solve the shallow water equations on a 1D grid, writing the solution to binary files with different encodings, then read the results back
+# Check the error of each encoding, that the compression ratio increases with the loss of information, the kind of the encoded snapshots, and that the snapshots are decoded in any order
+
+import os
+import numpy as np
+import num.tintegration as numt
+import utils.cases as cases
+import utils.writer as wrtr
+import utils.reader as rdr
+import utils.testing as tst
+
+def main(gui):
+    # Constants
+    l = 10 # domain length
+    n = 20 # number of elements
+    p = 2 # order of discretization
+    g = 9.81 # gravity
+    v = ['h', 'u'] # physical variables
+    cfl = 0.5 * 1 / (2*p+1) # half of max. Courant-Friedrichs-Levy for stability
+    # Parameters
+    dx = l / n # cell length
+    dt = cfl * dx / np.sqrt(g * 1.1) # time step
+    tmax = 0.5 # simulation time
+    key = 20 # number of snapshots between two full snapshots
+
+    # Generate discretization, and run with binary writers using different encodings
+    disc = cases.shallow(l, n, p, g)
+    encs = {'full': {}, 'single': {'dtype': '<f4'}, 'lossless': {'delta': 1, 'codec': 'zlib'},
+            'lossy': {'tol': 1e-4, 'delta': 2, 'codec': 'zlib', 'key': key}, 'lossy_lzma': {'tol': 1e-6, 'delta': 2, 'codec': 'lzma', 'key': key}}
+    res = {}
+    for name, enc in encs.items():
+        tint = numt.Rk4(disc, wrtr.BinaryWriter(name, 1, v, disc, **enc), gui)
+        tint.run(dt, tmax)
+        res[name] = rdr.Reader(name + '.bin')
+    def ratio(name): return os.path.getsize('full.bin') / os.path.getsize(name + '.bin') # compression ratio
+    def error(name): return np.max(np.abs(np.asarray(res[name].u) - res['full'].u)) # max. error
+    ufull = res['full'].u
+    tsel = (res['full'].t >= tmax/4) & (res['full'].t <= tmax/2) # selected snapshots
+    tw, _, hw = res['lossy'].select(tmin=tmax/4, tmax=tmax/2, var='h', xmin=l/4, xmax=l/2)
+    # Kind of the snapshots (0: full, n: difference with the prediction from the n previous snapshots)
+    kind = {'lossless': np.minimum(np.arange(len(ufull)) % 100, 1), 'lossy': np.minimum(np.arange(len(ufull)) % key, 2)}
+    # Decode the snapshots backward
+    lossy = rdr.Reader('lossy.bin')
+    ubwd = np.array([lossy.u[i] for i in reversed(range(len(ufull)))])[::-1]
+
+    # Test
+    tests = tst.Tests()
+    tests.add(tst.Test('Number of complete results', sum(len(r.t) == len(res['full'].t) for r in res.values()), len(res), 0.))
+    tests.add(tst.Test('Max(u_single-u)/u', np.max(np.abs(np.asarray(res['single'].u) - ufull) / np.maximum(np.abs(ufull), np.finfo(np.float32).tiny)), 0., np.finfo(np.float32).eps / 2)) # rounded to single precision
+    tests.add(tst.Test('Max(u_lossless-u)', error('lossless'), 0., 0.))
+    tests.add(tst.Test('Max(u_lossy-u) <= tol', error('lossy') <= 1e-4, 1, 0.))
+    tests.add(tst.Test('Max(u_lossy_lzma-u) <= tol', error('lossy_lzma') <= 1e-6, 1, 0.))
+    tests.add(tst.Test('Max(kind-kind_ref) (lossy)', np.max(np.abs(res['lossy'].u.kind - kind['lossy'])), 0, 0.))
+    tests.add(tst.Test('Max(kind-kind_ref) (lossless)', np.max(np.abs(res['lossless'].u.kind - kind['lossless'])), 0, 0.))
+    tests.add(tst.Test('Max(u_backward-u_forward) (lossy)', np.max(np.abs(ubwd - np.asarray(res['lossy'].u))), 0., 0.))
+    tests.add(tst.Test('1.9 < Ratio (single) < 2', 1.9 < ratio('single') < 2, 1, 0.)) # solution in half the bytes, iteration and time in full precision
+    tests.add(tst.Test('Ratio (lossless) > 1', ratio('lossless') > 1, 1, 0.))
+    tests.add(tst.Test('Ratio (lossy_lzma) > Ratio (lossless)', ratio('lossy_lzma') > ratio('lossless'), 1, 0.))
+    tests.add(tst.Test('Ratio (lossy) > Ratio (lossy_lzma)', ratio('lossy') > ratio('lossy_lzma'), 1, 0.)) # larger tolerance
+    tests.add(tst.Test('Max(h_selected-h)', np.max(np.abs(hw - ufull[tsel][:, n//4-1:n//2+1, 0])), 0., 1e-4))
+    tests.add(tst.Test('Number of selected snapshots', len(tw), np.sum(tsel), 0.))
+    tests.run()
+
+if __name__=="__main__":
+    if parse().gui:
+        import utils.gui as gui
+        main(gui.Gui())
+        input('<ENTER TO QUIT>')
+    else:
+        main(None)
@@ -0,0 +1,106 @@
+# -*- coding: utf8 -*-
+# test encoding: à-é-è-ô-ï-€
+
+# Copyright 2021 Adrien Crovato
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+## Conditions test
+# Adrien Crovato
+#
+# Evaluate the initial conditions, boundary conditions and source terms of a 1D grid with functions supporting arrays or not, and compare them to their evaluation on each position
+# Check the number of calls of the functions, and that their errors are not hidden
+
+import math
+import numpy as np
+import phys.flux as pfl
+import num.conditions as numc
+import num.source as nums
+import utils.cases as cases
+import utils.testing as tst
+
+def main(gui):
+    # Constants
+    l = 2 # domain length
+    n = 6 # number of elements
+    p = 3 # order of discretization
+    ncall = {'vec': 0, 'pnt': 0} # number of calls of the functions
+    # Functions
+    def fvec(x, t): # supporting arrays
+        ncall['vec'] += 1
+        return np.sin(np.pi * x) + t
+    def fpnt(x, t): # not supporting arrays (TypeError)
+        ncall['pnt'] += 1
+        return math.cos(x) * (1 + t)
+    def fcnd(x, t): return 1. if x < l / 2 else -1. # not supporting arrays (ValueError)
+    def fcst(x, t): return 0.5 # constant
+    def svec(x): return x * x
+    def spnt(x): return math.exp(-x)
+
+    # Generate discretization and evaluate the conditions
+    disc = cases.discretize(pfl.Advection2(1., 0.5), [fvec, fpnt], [numc.Dirichlet(fcnd), numc.Dirichlet(fvec, steady=True)], [numc.Neumann(), numc.Dirichlet(fcst)], l, n, p, source=nums.Source([svec, spnt]))
+    u = disc.frm.ic.eval(disc.elements)
+    s = disc.frm.source.eval(disc.x)
+    ub = []
+    for bc, sl, xb in disc.bnds:
+        ub.append(bc.eval(xb, 0.3, np.ones((2, len(xb)))))
+    # Evaluate the conditions on each position
+    uref = []
+    for c in disc.frm.ic.group.cells:
+        xe = disc.elements[c].evalx()
+        for f in [fvec, fpnt]:
+            for i in range(len(xe)):
+                uref.append(f(xe[i], 0))
+    sref = np.array([[[f(xi) for xi in xe] for xe in disc.x] for f in [svec, spnt]])
+    ubref = [[[fcnd(xi, 0.3) for xi in disc.bnds[0][2]], [fvec(xi, 0.) for xi in disc.bnds[0][2]]], [[1.] * len(disc.bnds[1][2]), [fcst(xi, 0.3) for xi in disc.bnds[1][2]]]]
+    # Count the number of calls of the functions, once probed
+    ncall['vec'], ncall['pnt'] = 0, 0
+    disc.frm.ic.eval(disc.elements)
+    for bc, sl, xb in disc.bnds:
+        bc.eval(xb, 0.6, np.ones((2, len(xb))))
+    # Check that the errors of the functions are not hidden
+    def ferr(x, t):
+        if t > 0:
+            raise TypeError('invalid time')
+        return 0. * x
+    numc.evaluate(ferr, disc.x, 0.)
+    try:
+        numc.evaluate(ferr, disc.x, 1.)
+        raised = 0
+    except TypeError:
+        raised = 1
+    def fkey(x, t): return {}[t]
+    try:
+        numc.evaluate(fkey, disc.x, 0.)
+        rkey = 0
+    except KeyError:
+        rkey = 1
+
+    # Test
+    tests = tst.Tests()
+    tests.add(tst.Test('Max(u_ic-u_ic,ref)', np.max(np.abs(u - uref)), 0., 1e-15))
+    tests.add(tst.Test('Max(s-s_ref)', np.max(np.abs(s - sref)), 0., 1e-15))
+    tests.add(tst.Test('Max(u_bc-u_bc,ref)', max(np.max(np.abs(ub[i] - ubref[i])) for i in range(2)), 0., 1e-15))
+    tests.add(tst.Test('Calls (vectorized)', ncall['vec'], 1, 0.)) # steady boundary condition cached
+    tests.add(tst.Test('Calls (pointwise)', ncall['pnt'], disc.x.size, 0.))
+    tests.add(tst.Test('Raised (probed function)', raised, 1, 0.))
+    tests.add(tst.Test('Raised (missing key)', rkey, 1, 0.))
+    tests.run()
+
+if __name__=="__main__":
+    if parse().gui:
+        import utils.gui as gui
+        main(gui.Gui())
+        input('<ENTER TO QUIT>')
+    else:
+        main(None)
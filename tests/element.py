@@ -0,0 +1,68 @@
+# -*- coding: utf8 -*-
+# test encoding: à-é-è-ô-ï-€
+
+# Copyright 2021 Adrien Crovato
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+## Reference element test
+# Adrien Crovato
+#
+# Discretize the advection equation on 1D grids of different orders, and compare the quadrature rules and shape functions of the elements to the ones built for each element
+# Check that the elements of the same order share the same reference element
+
+import numpy as np
+import fe.element as elm
+import fe.quadrature as quad
+import fe.shapes as shp
+import utils.cases as cases
+import utils.testing as tst
+
+def main(gui):
+    # Constants
+    l = 2 # domain length
+    n = 6 # number of elements
+    # Functions
+    def sig(x, t): return np.sin(np.pi * (x - t))
+    # Generate discretizations, and compare the data of each element to the data built for this element
+    nref, dmax = 0, 0.
+    refs = []
+    for p in range(1, 6):
+        disc = cases.advection(sig, l, n, p)
+        refs.append(set(id(e.ref) for e in disc.elements.values()))
+        nref += len(refs[-1]) != 1 or elm.reference(p) is not next(iter(disc.elements.values())).ref
+        for e in disc.elements.values():
+            ep = quad.GaussLegendreLobatto(p)
+            ip = quad.GaussLegendre(p)
+            shape = shp.Lagrange(ip.x, ep.x)
+            dmax = max(dmax, np.max(np.abs(np.subtract(e.ep.x, ep.x))), np.max(np.abs(np.subtract(e.ep.w, ep.w))), np.max(np.abs(np.subtract(e.ip.x, ip.x))), np.max(np.abs(np.subtract(e.ip.w, ip.w))))
+            dmax = max(dmax, np.max(np.abs(np.array(e.eshape.sf) - np.array(shape.sf))), np.max(np.abs(np.array(e.eshape.dsf) - np.array(shape.dsf))))
+            for j, xf in enumerate([-1., 1.]):
+                shape = shp.Lagrange([xf], ep.x)
+                dmax = max(dmax, abs(e.ipi[j].x[0] - xf), abs(e.ipi[j].w[0] - 1.), np.max(np.abs(np.array(e.ishape[j].sf) - np.array(shape.sf))))
+            dmax = max(dmax, np.max(np.abs(e.evalx() - ((np.array(ep.x) + 1) * (e.cell.nodes[1].x[0] - e.cell.nodes[0].x[0]) / 2 + e.cell.nodes[0].x[0]))))
+
+    # Test
+    tests = tst.Tests()
+    tests.add(tst.Test('Max(data_ref-data)', dmax, 0., 0.))
+    tests.add(tst.Test('Orders with several references', nref, 0, 0.))
+    tests.add(tst.Test('Number of references', len(set.union(*refs)), len(refs), 0.))
+    tests.run()
+
+if __name__=="__main__":
+    if parse().gui:
+        import utils.gui as gui
+        main(gui.Gui())
+        input('<ENTER TO QUIT>')
+    else:
+        main(None)
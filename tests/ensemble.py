@@ -0,0 +1,87 @@
+# -*- coding: utf8 -*-
+# test encoding: à-é-è-ô-ï-€
+
+# Copyright 2021 Adrien Crovato
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+## Ensemble test
+# Adrien Crovato
+#
+# Solve the advection equation on a 1D grid for an ensemble of inlet signals, all the members being integrated at once
+# Check that the RHS of an ensemble with random solutions is the RHS of each member
+
+import numpy as np
+import num.flux as nfl
+import num.conditions as numc
+import num.formulation as numf
+import num.discretization as numd
+import num.tintegration as numt
+import utils.cases as cases
+import utils.writer as wrtr
+import utils.testing as tst
+
+def main(gui):
+    # Constants
+    l = 10 # domain length
+    a = 3. # advection velocity
+    n = 10 # number of elements
+    p = 4 # order of discretization
+    v = ['u'] # physical variables
+    amps = [0.5, 1.0, 2.0] # amplitude of the inlet signal of each member
+    cfl = 0.5 * 1 / (2*p+1) # half of max. Courant-Friedrichs-Levy for stability
+    # Functions
+    def initial(x, t): return 0. * x
+    def fun(x, t, amp): return amp * np.sin(2*np.pi*(x-a*t)/l*2)
+    # Parameters
+    dx = l / n # cell length
+    dt = cfl * dx / a # time step
+    tmax = round(l / a, 5) # simulation time (l/a)
+
+    # Generate discretizations of each member, then of the ensemble
+    inlets = [lambda x, t, amp=amp: fun(x, t, amp) for amp in amps] # inlet signal of each member
+    discs = [cases.advection(inlet, l, n, p, a, initial=initial) for inlet in inlets]
+    frm = discs[0].frm
+    bcs = [numc.Boundary(frm.bcs[0].group, [numc.Dirichlet(inlets)]), numc.Boundary(frm.bcs[1].group, [numc.Neumann()])]
+    formul = numf.Formulation(frm.msh, frm.field, frm.nv, frm.flux, numc.InitialEnsemble([numc.Initial(frm.field, [initial]) for _ in amps]), bcs)
+    discs = [numd.Discretization(formul, p, nfl.LaxFried(frm.flux, 0.))] + discs
+    # Compute the RHS of the ensemble and of each member, with random solutions
+    rng = np.random.default_rng(0)
+    ue = rng.random((len(discs[1].frm.ic.eval(discs[1].elements)), len(amps))) - 0.5
+    rens = discs[0].compute(ue, 0.3)
+    dens = max(np.max(np.abs(rens[:, m] - discs[m+1].compute(ue[:, m], 0.3))) for m in range(len(amps))) / np.max(np.abs(rens))
+    # Define time integration method and run
+    sols = []
+    for disc in discs:
+        wrt = wrtr.Writer('sol', 10**9, v, disc)
+        tint = numt.Rk4(disc, wrt, None)
+        tint.run(dt, tmax)
+        sols.append(tint.u)
+
+    # Test
+    tests = tst.Tests()
+    tests.add(tst.Test('Number of members', sols[0].shape[1], len(amps), 0.))
+    tests.add(tst.Test('Max(R_ensemble-R)/R', dens, 0., 1e-14))
+    for m in range(len(amps)):
+        uexact = fun(disc.x, tmax, amps[m]).reshape(-1) # exact solution at element eval point
+        tests.add(tst.Test('Max(u-u_member) ' + str(m), np.max(np.abs(sols[0][:, m] - sols[m+1])) / amps[m], 0., 1e-14)) # round-off only (matrix products are not evaluated in the same order with a member axis)
+        tests.add(tst.Test('Max(u-u_exact) ' + str(m), np.max(np.abs(sols[0][:, m] - uexact)) / amps[m], 0., 7e-2))
+    tests.run()
+
+if __name__=="__main__":
+    if parse().gui:
+        import utils.gui as gui
+        main(gui.Gui())
+        input('<ENTER TO QUIT>')
+    else:
+        main(None)
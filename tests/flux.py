@@ -0,0 +1,112 @@
+# -*- coding: utf8 -*-
+# test encoding: à-é-è-ô-ï-€
+
+# Copyright 2021 Adrien Crovato
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+## Flux test
+# Adrien Crovato
+#
+# Evaluate the physical fluxes, their derivatives and their maximum wave speed on a batch of random states, and compare them to their evaluation on each state
+# Check the batch evaluation of a physical flux only evaluated on one state
+# Evaluate the Lax–Friedrichs flux and its derivatives on a batch of random interfaces, and compare them to its evaluation on each interface and to finite differences
+
+import numpy as np
+import phys.flux as pfl
+import num.flux as nfl
+import utils.testing as tst
+
+class Pointwise(pfl.PFlux):
+    '''Physical flux only evaluated on one state, using another physical flux
+    '''
+    def __init__(self, flux):
+        pfl.PFlux.__init__(self)
+        self.f = flux # physical flux
+    def __str__(self):
+        return 'Pointwise ' + str(self.f)
+
+    def eval(self, u):
+        return self.f.eval(u)
+
+    def evald(self, u):
+        return self.f.evald(u)
+
+class PointwiseLaxFried(nfl.LaxFried):
+    '''Lax–Friedrichs flux only evaluated at one interface, its derivatives being computed by finite differences
+    '''
+    def __init__(self, flux, alpha):
+        nfl.LaxFried.__init__(self, flux, alpha)
+    def __str__(self):
+        return 'Pointwise Lax–Friedrichs flux'
+
+    def eval_batch(self, u0, u1, n0):
+        return nfl.NFlux.eval_batch(self, u0, u1, n0)
+
+    def evald_batch(self, u0, u1, n0):
+        return nfl.NFlux.evald_batch(self, u0, u1, n0)
+
+def states(name, shape, rng):
+    '''Generate a batch of random states, away from vacuum and from sign changes of the velocity
+    '''
+    r = rng.random((3,) + shape)
+    s = np.where(rng.random(shape) < 0.5, -1., 1.) # sign of velocity
+    if name == 'Advection':
+        return r[:1] - 0.5
+    if name == 'Advection2':
+        return r[:2] - 0.5
+    if name == 'Burger':
+        return s * (0.2 + r[:1])
+    if name == 'Euler':
+        rho = 1. + 0.5 * r[0]
+        return np.array([rho, s * rho * (0.1 + 0.5 * r[1]), 2.5 + r[2]])
+    return np.array([1. + r[0], s * (0.1 + r[1])])
+
+def main(gui):
+    # Physical fluxes
+    flxs = {'Advection': pfl.Advection(1.3), 'Advection2': pfl.Advection2(1.2, -0.6), 'Burger': pfl.Burger(), 'Euler': pfl.Euler(1.4), 'ShallowWater': pfl.ShallowWater(9.81)}
+    shape = (4, 5) # shape of batch
+    rng = np.random.default_rng(0)
+    # Evaluate the fluxes on a batch and on each state
+    tests = tst.Tests()
+    for name, flx in flxs.items():
+        u = states(name, shape, rng)
+        ur = u.reshape(len(u), -1)
+        f = np.transpose([flx.eval(ur[:, k]) for k in range(ur.shape[1])]).reshape(u.shape)
+        df = np.moveaxis([flx.evald(ur[:, k]) for k in range(ur.shape[1])], 0, -1).reshape((len(u),) + u.shape)
+        c = np.array([np.max(np.abs(np.linalg.eigvals(np.array(flx.evald(ur[:, k]))))) for k in range(ur.shape[1])]).reshape(shape)
+        fw, cw = flx.evalw_batch(u)
+        # ... and on a batch with the fallbacks (finite differences for the derivative of the wave speed)
+        pnt = Pointwise(flx)
+        fwp, cwp = pnt.evalw_batch(u)
+        dcf = pnt.evaldw_batch(u)
+        tests.add(tst.Test('Max(f_batch-f) ' + name, max(np.max(np.abs(g - f)) for g in [flx.eval_batch(u), fw, pnt.eval_batch(u), fwp]), 0., 0.))
+        tests.add(tst.Test('Max(df_batch-df) ' + name, max(np.max(np.abs(g - df)) for g in [flx.evald_batch(u), pnt.evald_batch(u)]), 0., 0.))
+        tests.add(tst.Test('Max(c_batch-c)/c ' + name, max(np.max(np.abs(g - c) / c) for g in [cw, cwp]), 0., 1e-14))
+        tests.add(tst.Test('Max(dc_fd-dc) ' + name, np.max(np.abs(dcf - flx.evaldw_batch(u))), 0., 1e-6))
+        # Evaluate the Lax–Friedrichs flux on a batch and on each interface
+        u0, u1 = states(name, (20,), rng), states(name, (20,), rng)
+        n0 = np.where(rng.random(20) < 0.5, -1., 1.)
+        nflx, npnt = nfl.LaxFried(flx, 0.3), PointwiseLaxFried(flx, 0.3)
+        dfs, dfp = nflx.evald_batch(u0, u1, n0), npnt.evald_batch(u0, u1, n0)
+        tests.add(tst.Test('Max(f*_batch-f*) ' + name, np.max(np.abs(nflx.eval_batch(u0, u1, n0) - npnt.eval_batch(u0, u1, n0))), 0., 1e-14))
+        tests.add(tst.Test('Max(df*_fd-df*) ' + name, max(np.max(np.abs(dfs[j] - dfp[j])) for j in range(2)), 0., 1e-6))
+    tests.run()
+
+if __name__=="__main__":
+    if parse().gui:
+        import utils.gui as gui
+        main(gui.Gui())
+        input('<ENTER TO QUIT>')
+    else:
+        main(None)
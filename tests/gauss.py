@@ -18,7 +18,7 @@
 ## Gauss quadrature rules test
 # Adrien Crovato
 #
-# Test the Gaussian quadratures for order 4 (n = 5)
+# Test the Gaussian quadratures for order 4 (n = 5), computed with Newton and Golub-Welsch methods
 
 import fe.quadrature as quad
 import utils.testing as tst
@@ -33,18 +33,18 @@ def tables():
     return xgl, wgl, xgll, wgll
 
 def main():
-    # Create a Gauss-Legendre and a Gauss-Legendre-Lobatto quadrature rules
-    gl = quad.GaussLegendre(4)
-    gll = quad.GaussLegendreLobatto(4)
-
     # Test the positions and weights against tabulated data
     xgl, wgl, xgll, wgll = tables()
     tests = tst.Tests()
-    for i in range(5):
-        tests.add(tst.Test('GL x['+str(i)+']', gl.x[i], xgl[i], 1e-6))
-        tests.add(tst.Test('GL w['+str(i)+']', gl.w[i], wgl[i], 1e-6))
-        tests.add(tst.Test('GLL x['+str(i)+']', gll.x[i], xgll[i], 1e-6))
-        tests.add(tst.Test('GLL w['+str(i)+']', gll.w[i], wgll[i], 1e-6))
+    for method in ['newton', 'golub-welsch']:
+        # Create a Gauss-Legendre and a Gauss-Legendre-Lobatto quadrature rules
+        gl = quad.GaussLegendre(4, method)
+        gll = quad.GaussLegendreLobatto(4, method)
+        for i in range(5):
+            tests.add(tst.Test(method + ' GL x['+str(i)+']', gl.x[i], xgl[i], 1e-6))
+            tests.add(tst.Test(method + ' GL w['+str(i)+']', gl.w[i], wgl[i], 1e-6))
+            tests.add(tst.Test(method + ' GLL x['+str(i)+']', gll.x[i], xgll[i], 1e-6))
+            tests.add(tst.Test(method + ' GLL w['+str(i)+']', gll.w[i], wgll[i], 1e-6))
     tests.run()
 
 if __name__=="__main__":
@@ -0,0 +1,90 @@
+# -*- coding: utf8 -*-
+# test encoding: à-é-è-ô-ï-€
+
+# Copyright 2021 Adrien Crovato
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+## Implicit-explicit methods test
+# Adrien Crovato
+#
+# Solve the advection equation with a stiff relaxation source term on a 1D grid using implicit-explicit Runge-Kutta methods, starting away from equilibrium
+# Check the solution with analytical and finite-difference Jacobians of the source term, and the order of the methods with a non-stiff source term
+
+import numpy as np
+import num.source as nsrc
+import num.tintegration as numt
+import num.timestep as numts
+import utils.cases as cases
+import utils.writer as wrtr
+import utils.testing as tst
+
+def main(gui):
+    # Constants
+    l = 2 # domain length
+    a = 1. # advection velocity
+    tau = 1e-4 # relaxation time
+    n = 20 # number of elements
+    p = 3 # order of discretization
+    v = ['u'] # physical variables
+    cfl = 0.5 # Courant-Friedrichs-Levy number (time step is not limited by the relaxation time)
+    # Functions
+    k = a * tau * np.pi
+    def ueq(x): return np.sin(np.pi*x) # equilibrium solution
+    def fun(x, t): return (np.sin(np.pi*x) - k * np.cos(np.pi*x)) / (1 + k*k) # steady solution
+    def u0(x, t): return 0. * x # away from equilibrium, the transient decaying as exp(-t/tau)
+    if gui:
+        gui.vars = v
+        gui.frefs = [fun]
+    # Parameters
+    tmax = 0.5 # simulation time
+
+    # Define time integration methods and run, with analytical and finite-difference Jacobians of the stiff source terms
+    srcs = [nsrc.Relaxation([ueq], tau), nsrc.StiffSource(lambda x, u: (u - ueq(x)) / tau)] # stiff source terms
+    tints = [numt.Ars222, numt.Ark4]
+    maxdiff = {} # infinite norm
+    for src, jac in zip(srcs, ['analytical', 'finite-difference']):
+        disc = cases.advection(fun, l, n, p, a, initial=u0, stiff=src)
+        wrt = wrtr.Writer('sol', 10**9, v, disc)
+        for tcls in tints:
+            tint = tcls(disc, wrt, gui)
+            tint.run(numts.Cfl(cfl), tmax)
+            maxdiff[tcls.__name__ + ' ' + jac] = np.max(np.abs(tint.u - fun(disc.x, tmax).reshape(-1)))
+    # Compute the order of the methods with a non-stiff source term (self-convergence)
+    disc = cases.advection(fun, l, n, p, a, initial=u0, stiff=nsrc.Relaxation([ueq], 0.1))
+    order = []
+    for tcls in tints:
+        tint = tcls(disc, None, gui)
+        sols = []
+        for ns in [100, 200, 400]:
+            u = disc.frm.ic.eval(disc.elements)
+            for i in range(ns):
+                u = tint.step(u, i * tmax / ns, tmax / ns)
+            sols.append(u)
+        order.append(np.log2(np.max(np.abs(sols[0] - sols[1])) / np.max(np.abs(sols[1] - sols[2]))))
+
+    # Test
+    tests = tst.Tests()
+    for key in maxdiff:
+        tests.add(tst.Test('Max(u-u_exact) ' + key, maxdiff[key], 0., 1e-7))
+    tests.add(tst.Test('Order Ars222', order[0], 2, 0.05))
+    tests.add(tst.Test('Order Ark4', order[1], 4, 0.05))
+    tests.run()
+
+if __name__=="__main__":
+    if parse().gui:
+        import utils.gui as gui
+        main(gui.Gui())
+        input('<ENTER TO QUIT>')
+    else:
+        main(None)
@@ -0,0 +1,117 @@
+# -*- coding: utf8 -*-
+# test encoding: à-é-è-ô-ï-€
+
+# Copyright 2021 Adrien Crovato
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+## Linearization test
+# Adrien Crovato
+#
+# Compute the Jacobian of the RHS of the advection equation on a 1D grid analytically and by finite differences, and check the Jacobian-vector products
+# Compute the Jacobian of the RHS of the Burger's and Euler equations analytically and by finite differences, the wave speed of the Lax–Friedrichs flux depending on the solution
+
+import numpy as np
+import phys.flux as pfl
+import num.flux as nfl
+import num.conditions as numc
+import num.formulation as numf
+import num.discretization as numd
+import utils.lmesh as lmsh
+import utils.cases as cases
+import utils.testing as tst
+
+def main(gui):
+    # Constants
+    l = 2 # domain length
+    n = 8 # number of elements
+    p = 3 # order of discretization
+    a = 1.3 # advection velocity
+    v = ['u'] # physical variables
+    k = 4 # number of vectors
+    # Functions
+    def initial(x, t): return np.sin(np.pi * x)
+    def inlet(x, t): return 0.
+
+    # Generate mesh and get groups
+    msh = lmsh.run(l, n, 2.)
+    fld = msh.groups[0] # field
+    inl = msh.groups[1] # inlet
+    oul = msh.groups[2] # outlet
+    # Generate formulation
+    pflx = pfl.Advection(a) # physical advection flux
+    ic = numc.Initial(fld, [initial]) # initial condition
+    bcs = [numc.Boundary(inl, [numc.Dirichlet(inlet)]), numc.Boundary(oul, [numc.Neumann()])] # inlet-outlet bc
+    formul = numf.Formulation(msh, fld, len(v), pflx, ic, bcs)
+    # Generate discretization
+    nflx = nfl.LaxFried(pflx, 0.) # Lax–Friedrichs flux (0: full-upwind, 1: central)
+    disc = numd.Discretization(formul, p, nflx)
+    # Assemble the Jacobian analytically and by colored finite differences
+    np.random.seed(0)
+    u = np.random.rand(disc.n)
+    jac = np.zeros((disc.n, disc.n))
+    jfd = np.zeros((disc.n, disc.n))
+    vals, rows, cols = disc.sparse(u, 0.)
+    np.add.at(jac, (rows, cols), vals)
+    vals, rows, cols = disc.sparse(u, 0., fd=True)
+    np.add.at(jfd, (rows, cols), vals)
+    # Compute the Jacobian-vector products
+    vec = np.random.rand(disc.n, k)
+    wec = np.random.rand(disc.n, k)
+    jv = disc.jvp(u, 0., vec)
+    jvfd = disc.jvp(u, 0., vec, fd=True)
+    wj = disc.vjp(u, 0., wec)
+    # Assemble the Jacobian of nonlinear problems, with a random solution
+    def assemble(disc, u):
+        jacs = []
+        for fd in [False, True]:
+            jacs.append(np.zeros((len(u), len(u))))
+            vals, rows, cols = disc.sparse(u, 0., fd=fd)
+            np.add.at(jacs[-1], (rows, cols), vals)
+        return np.max(np.abs(jacs[1] - jacs[0])) / np.max(np.abs(jacs[0]))
+    dburg = assemble(cases.burger(1., l, n, p, alpha=0.2), np.random.rand(disc.n) - 0.5)
+    def rho(x, t): return 1. + 0. * x
+    def mom(x, t): return 0. * x
+    def ene(x, t): return 2.5 + 0. * x
+    disc = cases.discretize(pfl.Euler(1.4), [rho, mom, ene], [numc.Neumann()] * 3, [numc.Neumann()] * 3, l, n, p, alpha=0.2)
+    ue = np.random.rand(*disc.shape)
+    ue[:, 0] = 1. + ue[:, 0] # density
+    ue[:, 1] = ue[:, 1] - 0.5 # momentum
+    ue[:, 2] = 2.5 + ue[:, 2] # energy
+    deul = assemble(disc, ue.reshape(-1))
+    # Compute the derivative of the wave speed analytically and by finite differences
+    dwav = []
+    for pflx, uw in [(pfl.Burger(), [[-0.7, 0.4]]), (pfl.Euler(1.4), [[1.2, 0.8], [-0.3, 0.5], [2.7, 2.6]]), (pfl.ShallowWater(9.81), [[1.1, 0.9], [-0.4, 0.6]])]:
+        dc = pflx.evaldw_batch(np.array(uw))
+        dwav.append(np.max(np.abs(pfl.PFlux.evaldw_batch(pflx, np.array(uw)) - dc)) / np.max(np.abs(dc)))
+
+    # Test
+    tests = tst.Tests()
+    tests.add(tst.Test('Number of colors', np.max(disc.colors) + 1, 3, 0.))
+    tests.add(tst.Test('Max(J_fd-J)', np.max(np.abs(jfd - jac)) / np.max(np.abs(jac)), 0., 1e-6))
+    tests.add(tst.Test('Max(J*v-J_dense*v)', np.max(np.abs(jv - jac @ vec)), 0., 1e-10))
+    tests.add(tst.Test('Max(J*v_fd-J*v)', np.max(np.abs(jvfd - jv)) / np.max(np.abs(jv)), 0., 1e-6))
+    tests.add(tst.Test('Max(w*J.v-w.J*v)', np.max(np.abs(np.sum(wj * vec, axis=0) - np.sum(wec * jv, axis=0))), 0., 1e-10))
+    tests.add(tst.Test('Max(J_fd-J) Burger', dburg, 0., 1e-6))
+    tests.add(tst.Test('Max(J_fd-J) Euler', deul, 0., 1e-6))
+    for i, name in enumerate(['Burger', 'Euler', 'ShallowWater']):
+        tests.add(tst.Test('Max(dc_fd-dc) ' + name, dwav[i], 0., 1e-6))
+    tests.run()
+
+if __name__=="__main__":
+    if parse().gui:
+        import utils.gui as gui
+        main(gui.Gui())
+        input('<ENTER TO QUIT>')
+    else:
+        main(None)
@@ -19,6 +19,7 @@
 # Adrien Crovato
 #
 # Test the Lagrange shape functions for order p (n = p+1)
+# Compare the shape functions and their derivatives (barycentric formulas) to the product formulas, for orders 1 to 8
 
 import numpy as np
 import fe.quadrature as quad
@@ -26,6 +27,26 @@ import fe.shapes as shp
 import utils.testing as tst
 from run import parse
 
+def product(x, xi):
+    '''Evaluate the shape functions and their derivatives at x using interpolation points xi (product formulas)
+        N_i(x) = prod_j!=i (x - xi_j) / (xi_i - xi_j)
+        dN_i(x) = sum_j!=i 1 / (xi_i - xi_j) prod_l!=i,j (x - xi_l) / (xi_i - xi_l)
+    '''
+    n = len(xi)
+    sf = np.ones((len(x), n))
+    dsf = np.zeros((len(x), n))
+    for k in range(len(x)):
+        for i in range(n):
+            for j in range(n):
+                if i != j:
+                    sf[k, i] *= (x[k] - xi[j]) / (xi[i] - xi[j])
+                    prod = 1.0 / (xi[i] - xi[j])
+                    for l in range(n):
+                        if l != i and l != j:
+                            prod *= (x[k] - xi[l]) / (xi[i] - xi[l])
+                    dsf[k, i] += prod
+    return sf, dsf
+
 def main():
     # Create evaluation and interpolation points
     p = 4 # order
@@ -34,6 +55,17 @@ def main():
     # Create shape functions
     shape = shp.Lagrange(x, xi)
     print(shape)
+    # Compare to the product formulas, on points including the interpolation points
+    tests = tst.Tests()
+    for q in range(1, 9):
+        xq = quad.GaussLegendreLobatto(q).x
+        xe = np.concatenate((x, quad.GaussLegendre(q).x))
+        shpq = shp.Lagrange(xe, xq)
+        sf, dsf = product(xe, xq)
+        tests.add(tst.Test('Max(N-N_ref) p = ' + str(q), np.max(np.abs(np.array(shpq.sf) - sf)), 0., 1e-14))
+        tests.add(tst.Test('Max(dN-dN_ref)/dN_ref p = ' + str(q), np.max(np.abs(np.array(shpq.dsf).reshape(dsf.shape) - dsf)) / np.max(np.abs(dsf)), 0., 1e-13))
+        tests.add(tst.Test('Max(dN*x^p-p*x^(p-1)) p = ' + str(q), np.max(np.abs(np.array(shpq.dsf).reshape(dsf.shape).dot(np.power(xq, q)) - q * np.power(xe, q-1))), 0., 1e-12))
+    tests.run()
     # Store and plot
     if parse().gui:
         import matplotlib.pyplot as plt
@@ -0,0 +1,98 @@
+# -*- coding: utf8 -*-
+# test encoding: à-é-è-ô-ï-€
+
+# Copyright 2021 Adrien Crovato
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+## Low-storage Runge-Kutta methods test
+# Adrien Crovato
+#
+# Integrate the advection equation on a 1D grid using low-storage Runge-Kutta methods, and check their order and their stability function
+# Check that the RHS is written in (or scaled and added to) a given array, and that the solution is updated in place, without allocating the scaled RHS at each stage
+
+import numpy as np
+import num.tintegration as numt
+import utils.cases as cases
+import utils.testing as tst
+
+def main(gui):
+    # Constants
+    l = 2 # domain length
+    n = 10 # number of elements
+    p = 4 # order of discretization
+    # Functions
+    def initial(x, t): return np.sin(np.pi*x)
+    def inlet(x, t): return 0. * x
+    # Parameters
+    tmax = 0.5 # simulation time
+    dt = 0.01 # time step (stability function)
+
+    # Generate discretization, and assemble the Jacobian of the (linear) RHS
+    disc = cases.advection(inlet, l, n, p, initial=initial)
+    u0 = disc.frm.ic.eval(disc.elements)
+    vals, rows, cols = disc.sparse(u0, 0.)
+    jac = np.zeros((len(u0), len(u0)))
+    np.add.at(jac, (rows, cols), vals)
+    # Integrate with fixed time steps, and check one step against the stability function
+    tints = [numt.LsRk3(disc, None, gui), numt.LsRk4(disc, None, gui)]
+    order = [] # order of solution
+    maxdiff = [] # difference between one step and the stability function
+    for tint in tints:
+        # global error (self-convergence)
+        sols = []
+        for ns in [200, 400, 800]:
+            u = u0.copy()
+            for i in range(ns):
+                u = tint.step(u, i * tmax / ns, tmax / ns)
+            sols.append(u)
+        order.append(np.log2(np.max(np.abs(sols[0] - sols[1])) / np.max(np.abs(sols[1] - sols[2]))))
+        # R(dt*J) * u, with the coefficients of R computed from its values on the unit circle
+        z = np.exp(2j * np.pi * np.arange(8) / 8)
+        c = np.fft.fft(tint.stability(z)).real / len(z)
+        ur = c[-1] * u0
+        for cj in c[-2::-1]:
+            ur = cj * u0 + dt * jac.dot(ur)
+        maxdiff.append(np.max(np.abs(tint.step(u0.copy(), 0., dt) - ur)))
+    # Compute the RHS in a given array, and scaled and added to a given array
+    rhs = disc.compute(u0, 0.)
+    out = np.full(len(u0), np.nan)
+    res = disc.compute(u0, 0., out=out)
+    dout = np.max(np.abs(out - rhs)) if res is out else np.inf
+    out = np.random.default_rng(0).random(len(u0))
+    dadd = np.max(np.abs(disc.compute(u0, 0., out=np.copy(out), scale=0.3) - (out + 0.3 * rhs))) / np.max(np.abs(rhs))
+    # Perform two steps, and keep the solution and the scratch array
+    u = u0.copy()
+    u1 = tints[-1].step(u, 0., dt)
+    scratch = disc.scratch
+    u2 = tints[-1].step(u1, dt, dt)
+
+    # Test
+    tests = tst.Tests()
+    tests.add(tst.Test('Order LsRk3', order[0], 3, 0.05))
+    tests.add(tst.Test('Order LsRk4', order[1], 4, 0.05))
+    tests.add(tst.Test('Max(u-R(dt*J)*u) LsRk3', maxdiff[0], 0., 1e-14))
+    tests.add(tst.Test('Max(u-R(dt*J)*u) LsRk4', maxdiff[1], 0., 1e-14))
+    tests.add(tst.Test('Max(R_out-R)', dout, 0., 0.))
+    tests.add(tst.Test('Max(R_add-R)/R', dadd, 0., 1e-15))
+    tests.add(tst.Test('Solution updated in place', u1 is u and u2 is u, 1, 0.))
+    tests.add(tst.Test('Scratch array reused', scratch is not None and disc.scratch is scratch, 1, 0.))
+    tests.run()
+
+if __name__=="__main__":
+    if parse().gui:
+        import utils.gui as gui
+        main(gui.Gui())
+        input('<ENTER TO QUIT>')
+    else:
+        main(None)
@@ -0,0 +1,86 @@
+# -*- coding: utf8 -*-
+# test encoding: à-é-è-ô-ï-€
+
+# Copyright 2021 Adrien Crovato
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+## Local time stepping test
+# Adrien Crovato
+#
+# Solve the advection equation on a graded 1D grid using local time stepping
+# Compare the solution to global time stepping, with one level (same scheme) and with the smallest time step, and check the conservation of mass
+# Check that the number of element RHS evaluations is the one of the levels of the elements, and lower than with global time stepping
+
+import numpy as np
+import num.tintegration as numt
+import num.timestep as numts
+import utils.cases as cases
+import utils.writer as wrtr
+import utils.testing as tst
+
+def main(gui):
+    # Constants
+    l = 2 # domain length
+    a = 1. # advection velocity
+    n = 40 # number of elements
+    r = 8. # ratio between last and first element lengths
+    p = 3 # order of discretization
+    v = ['u'] # physical variables
+    cfl = 0.5 # Courant-Friedrichs-Levy number
+    # Functions
+    def fun(x, t): return np.exp(-((x-a*t-0.6)/0.1)**2)
+    if gui:
+        gui.vars = v
+        gui.frefs = [fun]
+    # Parameters
+    tmax = 0.5 # simulation time
+
+    # Generate discretization
+    disc = cases.advection(fun, l, n, p, a, r)
+    # Define time integration method and run with 4 levels, then with 1 level (global time stepping)
+    wrt = wrtr.Writer('sol', 10**9, v, disc)
+    tint = numt.LocalSspRk3(disc, wrt, gui)
+    tint.run(numts.Levels(cfl, 4), tmax)
+    nlvl = len(tint.lvls) # number of levels
+    ns = len(tint.b) # number of stages
+    rlvl = sum(2**k * (ns * len(lvl[0]) + len(lvl[2])) for k, lvl in enumerate(tint.lvls)) / (ns * disc.shape[0] * 2**(nlvl - 1)) # ratio of element RHS evaluations per step (elements of each level, and their finer neighbors)
+    glb = numt.LocalSspRk3(disc, wrt, gui)
+    glb.run(numts.Levels(cfl, 1), tmax)
+    # Compare local Runge-Kutta with one level to global Runge-Kutta
+    rk4 = numt.Rk4(disc, wrt, gui)
+    rk4.run(numts.Cfl(cfl), tmax)
+    lrk4 = numt.LocalRk4(disc, wrt, gui)
+    lrk4.run(numts.Levels(cfl, 1), tmax)
+
+    # Test
+    uexact = fun(disc.x, tmax).reshape(-1) # exact solution at element eval point
+    w = np.sum(np.linalg.inv(disc.imass), axis=0) # integration weights at element eval points
+    mass = [np.sum(u.reshape(disc.shape) * w * disc.djac[:, None, None]) for u in [disc.frm.ic.eval(disc.elements), tint.u]] # initial and final mass
+    tests = tst.Tests()
+    tests.add(tst.Test('Number of levels', nlvl, int(np.log2(r)) + 1, 0.)) # the largest element can double the smallest time step log2(r) times
+    tests.add(tst.Test('Max(u-u_exact)', np.max(np.abs(tint.u - uexact)), 0., 5e-3))
+    tests.add(tst.Test('Max(u-u_global)/Max(u-u_exact)', np.max(np.abs(tint.u - glb.u)) / np.max(np.abs(tint.u - uexact)), 0., 0.05)) # time error small compared to space error
+    tests.add(tst.Test('Max(u_LocalRk4-u_Rk4)', np.max(np.abs(lrk4.u - rk4.u)), 0., 1e-14))
+    tests.add(tst.Test('Mass', mass[1], mass[0], 1e-9))
+    tests.add(tst.Test('Element RHS evaluations ratio', tint.nrhs / tint.nglb, rlvl, 1e-12))
+    tests.add(tst.Test('Element RHS evaluations ratio < 1', tint.nrhs / tint.nglb < 1, 1, 0.))
+    tests.run()
+
+if __name__=="__main__":
+    if parse().gui:
+        import utils.gui as gui
+        main(gui.Gui())
+        input('<ENTER TO QUIT>')
+    else:
+        main(None)
@@ -0,0 +1,101 @@
+# -*- coding: utf8 -*-
+# test encoding: à-é-è-ô-ï-€
+
+# Copyright 2021 Adrien Crovato
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+## Probe test
+# Adrien Crovato
+#
+# Solve the shallow water equations on a 1D grid, sampling the solution at a few positions and along a line, then read the time series back
+# Restart the integration from a checkpoint, and solve the steady equations, with a probe
+
+import os
+import numpy as np
+import num.tintegration as numt
+import num.checkpoint as chkp
+import num.steady as nst
+import utils.cases as cases
+import utils.writer as wrtr
+import utils.probe as prb
+import utils.reader as rdr
+import utils.testing as tst
+
+def main(gui):
+    # Constants
+    l = 10 # domain length
+    n = 20 # number of elements
+    p = 2 # order of discretization
+    g = 9.81 # gravity
+    v = ['h', 'u'] # physical variables
+    cfl = 0.5 * 1 / (2*p+1) # half of max. Courant-Friedrichs-Levy for stability
+    # Parameters
+    dx = l / n # cell length
+    dt = cfl * dx / np.sqrt(g * 1.1) # time step
+    tmax = 0.5 # simulation time
+
+    # Generate discretization
+    disc = cases.shallow(l, n, p, g)
+    # Define time integration method and run, with probes (passing the solution to a binary writer) and a line probe
+    xp = [0.33 * l, disc.x[n//2, 1], disc.x[n//2, -1], l] # arbitrary position, evaluation point, interface and boundary
+    fp = [0., 1., 2.] # frequencies of Fourier transform
+    probe = prb.Probe('probe', 1, v, disc, xp, fdft=fp, writer=wrtr.BinaryWriter('sol', 1, v, disc))
+    tint = numt.Rk4(disc, probe, gui)
+    tint.run(dt, tmax)
+    line = prb.Line('line', 1, v, disc, l/4, 3*l/4, 11)
+    tint = numt.Rk4(disc, line, gui)
+    tint.run(dt, tmax)
+    # Read results, and interpolate the full solution at the first position (polynomial fit through the evaluation points)
+    res = rdr.Reader('sol.bin')
+    hp = rdr.Reader('probe.bin').u[:, :, 0, 0] # height at probes
+    hl = rdr.Reader('line.bin').select(var='h', xmin=l/2, xmax=l/2)[2] # height at middle of line
+    e = int(xp[0] // dx) # element holding the first position
+    h0 = [np.polyval(np.polyfit(res.x[e], hk, p), xp[0]) for hk in res.u[:, e, 0]]
+    def trapz(f): return np.sum(0.5 * (f[1:] + f[:-1]) * np.diff(res.t)) # trapezoidal rule
+    dft = trapz(hp[:, 0] * np.exp(-2j * np.pi * fp[-1] * res.t)) # Fourier transform of the height at the first position
+    # Run while saving checkpoints, then restart from the oldest checkpoint retained
+    chk = chkp.Checkpoint('chk', freq=5, keep=2)
+    for old in chk.list():
+        os.remove(old)
+    full = prb.Probe('probe_full', 1, v, disc, xp, fdft=fp)
+    numt.Rk4(disc, full, gui).run(dt, tmax, checkpoint=chk)
+    rst = prb.Probe('probe_full', 1, v, disc, xp, fdft=fp)
+    numt.Rk4(disc, rst, gui).run(dt, tmax, restart=chk.list()[0])
+    # Solve the steady equations for a few iterations, the residual being written next to the samples
+    if os.path.isfile('probe_steady_residual.dat'):
+        os.remove('probe_steady_residual.dat')
+    nst.Steady(disc, prb.Probe('probe_steady', 1, v, disc, xp), gui, maxit=2).run()
+
+    # Test
+    tests = tst.Tests()
+    tests.add(tst.Test('Number of samples', len(hp), len(res.t), 0.))
+    tests.add(tst.Test('Max(h_probe-h) (arbitrary)', np.max(np.abs(hp[:, 0] - h0)), 0., 1e-12))
+    tests.add(tst.Test('Max(h_probe-h) (evaluation point)', np.max(np.abs(hp[:, 1] - res.u[:, n//2, 0, 1])), 0., 0.))
+    tests.add(tst.Test('Max(h_probe-h) (interface)', np.max(np.abs(hp[:, 2] - res.u[:, n//2, 0, -1])), 0., 0.))
+    tests.add(tst.Test('Max(h_probe-h) (boundary)', np.max(np.abs(hp[:, 3] - res.u[:, -1, 0, -1])), 0., 0.))
+    tests.add(tst.Test('Mean(h_probe)', probe.dft[0, 0, 0].real / tmax, trapz(hp[:, 0]) / tmax, 1e-12))
+    tests.add(tst.Test('|DFT(h_probe)|', np.abs(probe.dft[-1, 0, 0]), np.abs(dft), 1e-12))
+    tests.add(tst.Test('Max(h_line-h)', np.max(np.abs(hl[:, 0, 0] - res.u[:, n//2-1, 0, -1])), 0., 0.))
+    tests.add(tst.Test('Max(DFT_restart-DFT)', np.max(np.abs(rst.dft - full.dft)), 0., 0.))
+    tests.add(tst.Test('Max(DFT_full-DFT)', np.max(np.abs(full.dft - probe.dft)), 0., 0.))
+    tests.add(tst.Test('Residual file', os.path.isfile('probe_steady_residual.dat'), 1, 0.))
+    tests.run()
+
+if __name__=="__main__":
+    if parse().gui:
+        import utils.gui as gui
+        main(gui.Gui())
+        input('<ENTER TO QUIT>')
+    else:
+        main(None)
@@ -0,0 +1,87 @@
+# -*- coding: utf8 -*-
+# test encoding: à-é-è-ô-ï-€
+
+# Copyright 2021 Adrien Crovato
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+## Reader test
+# Adrien Crovato
+#
+# Solve the shallow water equations on a 1D grid, writing the solution to binary and text files, then read the results back
+# Check that the file is memory-mapped and that selections are views, that converted text files match the binary file, and that an interrupted last record is ignored
+
+import os
+import numpy as np
+import num.tintegration as numt
+import utils.cases as cases
+import utils.writer as wrtr
+import utils.reader as rdr
+import utils.testing as tst
+
+def main(gui):
+    # Constants
+    l = 10 # domain length
+    n = 20 # number of elements
+    p = 2 # order of discretization
+    g = 9.81 # gravity
+    v = ['h', 'u'] # physical variables
+    cfl = 0.5 * 1 / (2*p+1) # half of max. Courant-Friedrichs-Levy for stability
+    # Parameters
+    dx = l / n # cell length
+    dt = cfl * dx / np.sqrt(g * 1.1) # time step
+    tmax = 0.5 # simulation time
+
+    # Generate discretization, and run with binary and text writers
+    disc = cases.shallow(l, n, p, g)
+    for wrt in [wrtr.BinaryWriter('sol', 2, v, disc), wrtr.Writer('sol', 2, v, disc)]:
+        tint = numt.Rk4(disc, wrt, gui)
+        tint.run(dt, tmax, tout=[tmax/2])
+    # Read results, and convert text files to a binary file in a directory
+    res = rdr.Reader('sol.bin')
+    os.makedirs('sol_txt', exist_ok=True)
+    txt = rdr.Reader(os.path.dirname(rdr.convert('sol', p, os.path.join('sol_txt', 'sol'))))
+    tw, xw, hw = res.select(tmin=tmax/4, tmax=tmax/2, var='h', xmin=l/4, xmax=l/2)
+    tsel = (res.t >= tmax/4) & (res.t <= tmax/2) # selected snapshots
+    # Interrupt the last record
+    with open('sol.bin', 'rb') as f:
+        data = f.read()
+    with open('part.bin', 'wb') as f:
+        f.write(data[:len(data) - res.data.itemsize // 2])
+    part = rdr.Reader('part.bin')
+
+    # Test
+    tests = tst.Tests()
+    tests.add(tst.Test('Memory-mapped', isinstance(res.data, np.memmap), 1, 0.))
+    tests.add(tst.Test('Number of snapshots', res.u.shape[0], len(txt.t), 0.))
+    tests.add(tst.Test('Max(u_last-u)', np.max(np.abs(res.u[-1].reshape(-1) - tint.u)), 0., 0.))
+    tests.add(tst.Test('Time of output', res.t[np.flatnonzero(res.t == tmax/2)[0]], tmax/2, 0.))
+    tests.add(tst.Test('Max(it_text-it)', np.max(np.abs(txt.it - res.it)), 0, 0.))
+    tests.add(tst.Test('Max(t_text-t)', np.max(np.abs(txt.t - res.t)), 0., 5e-7)) # 6 decimals
+    tests.add(tst.Test('Max(x_text-x)', np.max(np.abs(txt.x - res.x)), 0., 5e-7))
+    tests.add(tst.Test('Max(u_text-u)', np.max(np.abs(txt.u - res.u)), 0., 5e-7))
+    tests.add(tst.Test('Selection is a view', np.shares_memory(hw, res.u), 1, 0.))
+    tests.add(tst.Test('Number of selected snapshots', len(tw), np.sum(tsel), 0.))
+    tests.add(tst.Test('Number of selected elements', len(xw), n/4 + 2, 0.))
+    tests.add(tst.Test('Max(h_selected-h)', np.max(np.abs(hw - res.u[tsel][:, n//4-1:n//2+1, 0])), 0., 0.))
+    tests.add(tst.Test('Number of snapshots (interrupted)', len(part.t), len(res.t) - 1, 0.))
+    tests.add(tst.Test('Max(u_interrupted-u)', np.max(np.abs(part.u - res.u[:-1])), 0., 0.))
+    tests.run()
+
+if __name__=="__main__":
+    if parse().gui:
+        import utils.gui as gui
+        main(gui.Gui())
+        input('<ENTER TO QUIT>')
+    else:
+        main(None)
@@ -0,0 +1,111 @@
+# -*- coding: utf8 -*-
+# test encoding: à-é-è-ô-ï-€
+
+# Copyright 2021 Adrien Crovato
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+## Checkpoint and restart test
+# Adrien Crovato
+#
+# Solve the Burger's equation on a 1D grid, saving checkpoints, then restart the integration from one of them
+# Check that all the checkpoints are retained if keep is not positive, and that the wall-clock time is measured from the start of the integration
+# Check that the binary file written with delta encoding by a restarted integration is the one of the full integration if the state of the writer is restored
+
+import os
+import numpy as np
+import num.tintegration as numt
+import num.checkpoint as chkp
+import utils.cases as cases
+import utils.writer as wrtr
+import utils.testing as tst
+
+def main(gui):
+    # Constants
+    l = 10 # domain length
+    n = 10 # number of elements
+    p = 3 # order of discretization
+    u1 = 1.0 # in-out velocity
+    v = ['u'] # physical variables
+    cfl = 0.5 * 1 / (2*p+1) # half of max. Courant-Friedrichs-Levy for stability
+    # Parameters
+    dx = l / n # cell length
+    dt = cfl * dx / abs(u1) # time step
+    tmax = 4.0 # simulation time
+
+    # Generate discretization
+    disc = cases.burger(u1, l, n, p)
+    # Define time integration methods, run while saving checkpoints, then restart from the oldest checkpoint retained
+    wrt = wrtr.Writer('sol', 1000, v, disc)
+    tints = [numt.Dp54, numt.Bdf2, numt.LsRk4]
+    nchks = [] # number of checkpoints retained
+    maxdiff = [] # infinite norm of the difference between the restarted and the full integrations
+    for tint in tints:
+        chk = chkp.Checkpoint('chk_' + tint.__name__, freq=5, keep=3)
+        for old in chk.list():
+            os.remove(old)
+        full = tint(disc, wrt, gui)
+        full.run(dt, tmax, tout=[0.75*tmax], checkpoint=chk)
+        nchks.append(len(chk.list()))
+        rst = tint(disc, wrt, gui)
+        rst.run(dt, tmax, tout=[0.75*tmax], restart=chk.list()[0])
+        maxdiff.append(np.max(np.abs(rst.u - full.u)))
+    # Retain all the checkpoints
+    chk = chkp.Checkpoint('chk_all', freq=5, keep=-1)
+    for old in chk.list():
+        os.remove(old)
+    numt.LsRk4(disc, wrt, gui).run(dt, tmax, checkpoint=chk)
+    data = chkp.load(chk.last())
+    nall = len(chk.list()) - data['it'] // 5 # number of checkpoints missing
+    # Save checkpoints every minute of wall-clock time, the checkpoint being created long before the integration
+    chk = chkp.Checkpoint('chk_wall', wall=60., keep=0)
+    for old in chk.list():
+        os.remove(old)
+    chk.cpu -= 3600.
+    numt.LsRk4(disc, wrt, gui).run(dt, tmax, checkpoint=chk)
+    nwall = len(chk.list())
+    # Write the solution to a binary file with delta encoding, then restart from a checkpoint, with and without the state of the writer
+    chk = chkp.Checkpoint('chk_delta', freq=5, keep=-1)
+    for old in chk.list() + ['sol_delta.bin']:
+        if os.path.isfile(old):
+            os.remove(old)
+    bwrt = wrtr.BinaryWriter('sol_delta', 2, v, disc, delta=1)
+    numt.LsRk4(disc, bwrt, gui).run(dt, tmax, checkpoint=chk)
+    data = chkp.load(chk.list()[1])
+    del data['wrt']
+    nowrt = chkp.Checkpoint('chk_nowrt').save(data['it'], data) # same checkpoint, without the state of the writer
+    files = []
+    for restart in [None, chk.list()[1], nowrt]:
+        if restart:
+            numt.LsRk4(disc, bwrt, gui).run(dt, tmax, restart=restart)
+        with open(bwrt.fname, 'rb') as f:
+            files.append(f.read())
+
+    # Test
+    tests = tst.Tests()
+    for i in range(len(tints)):
+        tests.add(tst.Test('Number of checkpoints ' + tints[i].__name__, nchks[i], 3, 0.))
+        tests.add(tst.Test('Max(u_restart-u) ' + tints[i].__name__, maxdiff[i], 0., 0.))
+    tests.add(tst.Test('Number of missing checkpoints (keep=-1)', nall, 0, 0.))
+    tests.add(tst.Test('Binary file of restart == full (writer state restored)', files[1] == files[0], 1, 0.))
+    tests.add(tst.Test('Binary file of restart == full (writer state discarded)', files[2] == files[0], 0, 0.))
+    tests.add(tst.Test('Number of checkpoints (wall=60s)', nwall, 0, 0.))
+    tests.run()
+
+if __name__=="__main__":
+    if parse().gui:
+        import utils.gui as gui
+        main(gui.Gui())
+        input('<ENTER TO QUIT>')
+    else:
+        main(None)
@@ -0,0 +1,155 @@
+# -*- coding: utf8 -*-
+# test encoding: à-é-è-ô-ï-€
+
+# Copyright 2021 Adrien Crovato
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+## Right-hand side test
+# Adrien Crovato
+#
+# Compute the RHS of the advection, Burger's, Euler and shallow water equations on a 1D grid, with a random solution, and compare it to the RHS computed element by element
+# Check the interface connectivity, the reference operators against the matrices of each element, and the numerical fluxes only evaluated at one point
+
+import numpy as np
+import phys.flux as pfl
+import num.flux as nfl
+import num.conditions as numc
+import num.discretization as numd
+import num.source as nums
+import utils.cases as cases
+import utils.testing as tst
+
+class Central(nfl.NFlux):
+    '''Central flux, only evaluated at one point
+    '''
+    def __init__(self, flux):
+        nfl.NFlux.__init__(self, flux)
+    def __str__(self):
+        return 'Central flux'
+
+    def eval(self, u0, u1, n0):
+        return 0.5 * (np.array(self.f.eval(u0)) + np.array(self.f.eval(u1)))
+
+def matrices(e):
+    '''Compute the mass and stiffness matrices of an element
+        M(i, j) = sum_k w_k Ni_k Nj_k dj_k
+        S(i, j) = sum_k w_k (Ni_k invj_k dNj_k)^T dj_k
+    '''
+    m = np.zeros((e.ep.n, e.ep.n))
+    s = np.zeros((e.ep.n, e.ep.n))
+    for k in range(e.ip.n):
+        m += e.ip.w[k] * np.outer(e.eshape.sf[k], e.eshape.sf[k]) * e.cell.djac[k]
+        s += e.ip.w[k] * np.outer(e.eshape.sf[k], e.cell.ijac[k] * e.eshape.dsf[k]) * e.cell.djac[k]
+    return m, s
+
+def reference(disc, u, t):
+    '''Compute the RHS element by element, with the mass and stiffness matrices of each element and the fluxes evaluated at each point
+        du/dt = M^-1 * (S * f - f_star) - s
+    '''
+    frm = disc.frm
+    nv = frm.nv
+    # Compute the numerical flux on all interfaces, in the field and on the boundaries
+    fstar = {}
+    for i in frm.field.interfaces:
+        e0, e1 = disc.elements[i.neighbors[0]], disc.elements[i.neighbors[1]]
+        u0, u1 = e0.evalu(i, u), e1.evalu(i, u)
+        fstar[i] = [disc.flux.eval(u0[k], u1[k], e0.normal(i)[0]) for k in range(len(u0))]
+    for bc in frm.bcs:
+        for i in bc.group.interfaces:
+            e0 = disc.elements[i.neighbors[0]]
+            u0, x0 = e0.evalu(i, u), e0.evalx(i)
+            u1 = [[bc.bcs[v].eval(np.array([x0[k]]), t, np.array([u0[k][v]]))[0] for v in range(nv)] for k in range(len(u0))]
+            fstar[i] = [disc.flux.eval(u0[k], u1[k], e0.normal(i)[0]) for k in range(len(u0))]
+    # Compute the RHS on each element
+    rhs = np.zeros(len(u))
+    for e in disc.elements.values():
+        m, s = matrices(e)
+        fe = [np.zeros(e.ep.n) for _ in range(nv)]
+        for j, b in enumerate(e.cell.boundaries):
+            for k in range(e.ipi[j].n):
+                for v in range(nv):
+                    fe[v] += e.ipi[j].w[k] * b.djac[k] * fstar[b][k][v] * e.normal(b)[0] * e.ishape[j].sf[k]
+        f = frm.flux.eval([np.array(u[e.rows[v]]) for v in range(nv)])
+        sc = [[frm.source.funs[v](x) if frm.source else 0. for x in e.evalx()] for v in range(nv)]
+        rows = np.concatenate(e.rows)
+        rhs[rows] = np.linalg.inv(np.kron(np.eye(nv), m)).dot(np.kron(np.eye(nv), s).T.dot(np.concatenate(f)) - np.concatenate(fe)) - np.concatenate(sc)
+    return rhs
+
+def main(gui):
+    # Constants
+    l = 2 # domain length
+    n = 8 # number of elements
+    t = 0.7 # time
+    # Functions
+    def sig(x, t): return np.sin(np.pi * (x - t))
+    def rho(x, t): return 1. + 0. * x
+    def mom(x, t): return 0. * x
+    def ene(x, t): return 2.5 + 0. * x
+    # Generate discretizations, on a graded grid for the advection equation, and random solutions
+    discs = {'Advection': cases.advection(sig, l, n, 3, a=1.3, r=3., alpha=0.3),
+             'Advection2': cases.discretize(pfl.Advection2(1.2, -0.6), [sig] * 2, [numc.Dirichlet(sig), numc.Neumann()], [numc.Neumann(), numc.Dirichlet(sig)], l, n, 2, source=nums.Source([np.cos, np.exp])),
+             'Burger': cases.burger(1., l, n, 2),
+             'Euler': cases.discretize(pfl.Euler(1.4), [rho, mom, ene], [numc.Neumann()] * 3, [numc.Neumann()] * 3, l, n, 3, alpha=0.2),
+             'ShallowWater': cases.shallow(l, n, 4)}
+    discs['Central'] = numd.Discretization(discs['Euler'].frm, 3, Central(discs['Euler'].frm.flux))
+    rng = np.random.default_rng(0)
+    def random(disc):
+        '''Perturb the initial solution randomly
+        '''
+        u0 = disc.frm.ic.eval(disc.elements)
+        return u0 + 0.1 * (rng.random(len(u0)) - 0.5)
+    # Count the interfaces whose neighbors, positions or normals are not consistent with the mesh
+    ncon = 0
+    for disc in discs.values():
+        intfs = list(disc.frm.field.interfaces) + [i for bc in disc.frm.bcs for i in bc.group.interfaces]
+        xi = np.array([i.cg[0] for i in intfs])
+        xc = np.mean(disc.x, axis=1) # center of elements
+        for j, k in [(0, np.arange(len(intfs))), (1, np.arange(disc.nfi))]:
+            ncon += np.sum(np.abs(disc.x[disc.ielm[j, k], disc.ifac[j, k] * disc.order] - xi[k]) > 1e-14)
+        ncon += np.sum(disc.inrm != np.sign(xi - xc[disc.ielm[0]]))
+        e, f = np.nonzero(disc.enbr >= 0)
+        ncon += np.sum(disc.enbr[disc.enbr[e, f], disc.enfc[e, f]] != e)
+        ncon += np.sum(disc.enbr < 0) != len(intfs) - disc.nfi
+    # Compute the operators from the matrices of each element of the graded grid
+    disc = discs['Advection']
+    dops = 0.
+    for i, e in enumerate(disc.elements.values()):
+        m, s = matrices(e)
+        im = np.linalg.inv(m)
+        face = np.transpose([e.ishape[j].sf[0] for j in range(len(e.ishape))])
+        dops = max(dops, np.max(np.abs(im * disc.djac[i] - disc.imass)) / np.max(np.abs(disc.imass)),
+                   np.max(np.abs(im.dot(s.T) * disc.djac[i] - disc.dmat)) / np.max(np.abs(disc.dmat)),
+                   np.max(np.abs(im.dot(face) * disc.djac[i] - disc.lift)) / np.max(np.abs(disc.lift)))
+    # Compute the RHS, and the RHS element by element
+    derr = {}
+    for name, disc in discs.items():
+        u = random(disc)
+        rref = reference(disc, u, t)
+        derr[name] = np.max(np.abs(disc.compute(u, t) - rref)) / np.max(np.abs(rref))
+
+    # Test
+    tests = tst.Tests()
+    tests.add(tst.Test('Inconsistent interfaces', ncon, 0, 0.))
+    tests.add(tst.Test('Max(dj*M^-1-M_ref^-1, dj*M^-1*S^T-D, dj*M^-1*N_f-L)', dops, 0., 1e-13))
+    for name in discs:
+        tests.add(tst.Test('Max(R-R_ref)/R_ref ' + name, derr[name], 0., 1e-13))
+    tests.run()
+
+if __name__=="__main__":
+    if parse().gui:
+        import utils.gui as gui
+        main(gui.Gui())
+        input('<ENTER TO QUIT>')
+    else:
+        main(None)
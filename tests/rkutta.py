@@ -0,0 +1,107 @@
+# -*- coding: utf8 -*-
+# test encoding: à-é-è-ô-ï-€
+
+# Copyright 2021 Adrien Crovato
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+## Embedded Runge-Kutta methods test
+# Adrien Crovato
+#
+# Solve the advection equation on a 1D grid using embedded Runge-Kutta pairs, and check their order, the order of their error estimate and the error of the adaptive integration
+
+import os
+import numpy as np
+import num.tintegration as numt
+import utils.cases as cases
+import utils.writer as wrtr
+import utils.reader as rdr
+import utils.testing as tst
+
+def main(gui):
+    # Constants
+    l = 2 # domain length
+    n = 10 # number of elements
+    p = 4 # order of discretization
+    v = ['u'] # physical variables
+    tol = 1e-8 # relative and absolute tolerances
+    # Functions
+    def fun(x, t): return np.sin(np.pi*(x-t))
+    if gui:
+        gui.vars = v
+        gui.frefs = [fun]
+    # Parameters
+    tmax = 0.5 # simulation time
+    tout = [0.25] # output time (between two steps)
+    nsave = 10**9 # save frequency (only output times are saved)
+
+    # Remove results of previous runs (binary files are appended)
+    for name in ['ref'] + [tcls.__name__ for tcls in [numt.Bs32, numt.Dp54]]:
+        if os.path.isfile(name + '.bin'):
+            os.remove(name + '.bin')
+    # Generate discretization
+    disc = cases.advection(fun, l, n, p)
+    u0 = disc.frm.ic.eval(disc.elements)
+    # Compute reference solution (time integration error is negligible)
+    tint = numt.Rk4(disc, wrtr.BinaryWriter('ref', nsave, v, disc), gui)
+    tint.run(2.5e-4, tmax, tout=tout)
+    uref = rdr.Reader('ref.bin').u
+    # Integrate with fixed time steps, with adaptive time steps, and check errors
+    tints = [numt.Bs32, numt.Dp54]
+    order = [] # order of solution
+    eorder = [] # order of error estimate
+    maxdiff = [] # error at output time and at final time
+    nacc = [] # number of accepted steps
+    for tcls in tints:
+        tint = tcls(disc, wrtr.BinaryWriter(tcls.__name__, nsave, v, disc), gui, tol, tol)
+        # global error with fixed time steps (self-convergence)
+        sols = []
+        for ns in [200, 400, 800]:
+            u = u0
+            for i in range(ns):
+                tint.fsal = False
+                u = tint.step(u, i * tmax / ns, tmax / ns)
+            sols.append(u)
+        order.append(np.log2(np.max(np.abs(sols[0] - sols[1])) / np.max(np.abs(sols[1] - sols[2]))))
+        # local error estimate
+        err = []
+        for dt in [2e-4, 1e-4]:
+            tint.fsal = False
+            tint.step(u0, 0., dt)
+            err.append(tint.err)
+        eorder.append(np.log2(err[0] / err[1]))
+        # adaptive time steps, with dense output
+        tint.run(1e-3, tmax, tout=tout)
+        maxdiff.append(np.max(np.abs(rdr.Reader(tcls.__name__ + '.bin').u - uref).reshape(len(tout) + 1, -1), axis=1))
+        nacc.append(tint.nacc)
+
+    # Test
+    tests = tst.Tests()
+    tests.add(tst.Test('Order Bs32', order[0], 3, 0.1))
+    tests.add(tst.Test('Order Dp54', order[1], 5, 0.1))
+    tests.add(tst.Test('Order of error estimate Bs32', eorder[0], 3, 0.05))
+    tests.add(tst.Test('Order of error estimate Dp54', eorder[1], 5, 0.05))
+    tests.add(tst.Test('Max(u-u_ref)/(n_steps*tol) Bs32', maxdiff[0][-1] / (nacc[0] * tol), 0., 1.))
+    tests.add(tst.Test('Max(u_dense-u_ref)/(n_steps*tol) Bs32', maxdiff[0][0] / (nacc[0] * tol), 0., 1.))
+    tests.add(tst.Test('Max(u-u_ref)/tol Dp54', maxdiff[1][-1] / tol, 0., 1.))
+    tests.add(tst.Test('Max(u_dense-u_ref)/tol Dp54', maxdiff[1][0] / tol, 0., 1.))
+    tests.add(tst.Test('Time', tint.t, tmax, 0.))
+    tests.run()
+
+if __name__=="__main__":
+    if parse().gui:
+        import utils.gui as gui
+        main(gui.Gui())
+        input('<ENTER TO QUIT>')
+    else:
+        main(None)
@@ -0,0 +1,115 @@
+# -*- coding: utf8 -*-
+# test encoding: à-é-è-ô-ï-€
+
+# Copyright 2021 Adrien Crovato
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+## Spectral time step test
+# Adrien Crovato
+#
+# Compute the time step of the advection equation on a 1D graded grid from the eigenvalues of the Jacobian of the RHS, using an upwind and a central flux
+# Check the time step against the limit of the exact eigenvalues, and the powers of the amplification matrix of the integrator
+
+import numpy as np
+import num.tintegration as numt
+import num.timestep as numts
+import utils.cases as cases
+import utils.testing as tst
+
+def growth(stability, dt, jac, nstp):
+    '''Compute the maximum norm of the powers of the amplification matrix R(dt * J), up to nstp, and the norm of its last power
+        the coefficients of the stability polynomial are computed from its values on the unit circle
+    '''
+    z = np.exp(2j * np.pi * np.arange(8) / 8)
+    c = np.fft.fft(stability(z)).real / len(z)
+    amp = c[-1] * np.eye(len(jac))
+    for cj in c[-2::-1]:
+        amp = cj * np.eye(len(jac)) + dt * jac @ amp
+    pwr = np.eye(len(jac))
+    gmax = 1.
+    for _ in range(nstp):
+        pwr = amp @ pwr
+        gmax = max(gmax, np.linalg.norm(pwr, 2))
+        if gmax > 1e6:
+            break
+    return gmax, np.linalg.norm(pwr, 2)
+
+def main(gui):
+    # Constants
+    l = 10 # domain length
+    a = 3. # advection velocity
+    n = 20 # number of elements
+    r = 4. # ratio between the largest and the smallest elements
+    p = 3 # order of discretization
+    # Functions
+    def initial(x, t): return 0. * x
+    def fun(x, t): return np.sin(2*np.pi*(x-a*t)/l*2)
+    # Parameters
+    nstp = 3000 # number of steps over which the powers of the amplification matrix are computed
+
+    # Compute the time step for upwind (alpha = 0) and central (alpha = 1) fluxes, and compare it to the limit of the eigenvalues of the assembled Jacobian
+    ratio = {} # ratio between the time step and the limit of the eigenvalues
+    gmax = {} # maximum norm of the powers of the amplification matrix
+    gend = {} # norm of the last power of the amplification matrix
+    for alpha in [0., 1.]:
+        disc = cases.advection(fun, l, n, p, a, r, alpha, initial=initial)
+        u = disc.frm.ic.eval(disc.elements)
+        vals, rows, cols = disc.sparse(u, 0.)
+        jac = np.zeros((len(u), len(u)))
+        np.add.at(jac, (rows, cols), vals)
+        for tint in [numt.Rk4(disc, None, gui), numt.LsRk4(disc, None, gui)]:
+            ctrl = numts.Spectral(tint.stability)
+            dt = ctrl.compute(disc, u, 0.)
+            key = tint.__class__.__name__ + ' alpha=' + str(alpha)
+            ratio[key] = dt / ctrl.limit(np.linalg.eigvals(jac))
+            gmax[key], gend[key] = growth(tint.stability, dt, jac, nstp)
+        if alpha == 0.:
+            # the upwind Jacobian is far from normal, and a time step based on its exact eigenvalues is unstable
+            geig = growth(ctrl.stability, ctrl.fac * ctrl.limit(np.linalg.eigvals(jac)), jac, nstp)[0]
+        else:
+            # the stability region of the forward Euler method does not extend along the imaginary axis
+            try:
+                numts.Spectral(numt.BEuler(disc, None, gui).stability).compute(disc, u, 0.)
+                raised = 0
+            except RuntimeError:
+                raised = 1
+    # Check that the time step is bounded from below
+    try:
+        numts.Spectral(tint.stability, dtmin=1.).compute(disc, u, 0.)
+        floor = 0
+    except RuntimeError:
+        floor = 1
+
+    # Test
+    tests = tst.Tests()
+    tests.add(tst.Test('dt/dt_eig < fac Rk4 alpha=0.0', ratio['Rk4 alpha=0.0'] < ctrl.fac, 1, 0.)) # Ritz values of the non-normal Jacobian
+    tests.add(tst.Test('dt/dt_eig < fac LsRk4 alpha=0.0', ratio['LsRk4 alpha=0.0'] < ctrl.fac, 1, 0.))
+    tests.add(tst.Test('dt/dt_eig Rk4 alpha=1.0', ratio['Rk4 alpha=1.0'], ctrl.fac, 1e-6))
+    tests.add(tst.Test('dt/dt_eig LsRk4 alpha=1.0', ratio['LsRk4 alpha=1.0'], ctrl.fac, 1e-6))
+    for key in ratio:
+        tests.add(tst.Test('Max(|R^k|) ' + key, gmax[key], 0., 1e3))
+    tests.add(tst.Test('|R^nstp| Rk4 alpha=0.0', gend['Rk4 alpha=0.0'], 0., 1e-12))
+    tests.add(tst.Test('|R^nstp| LsRk4 alpha=0.0', gend['LsRk4 alpha=0.0'], 0., 1e-12))
+    tests.add(tst.Test('Max(|R^k|) eigenvalues alpha=0.0 > 1e6', geig > 1e6, 1, 0.))
+    tests.add(tst.Test('Raised for BEuler alpha=1.0', raised, 1, 0.))
+    tests.add(tst.Test('Raised for dt < dt_min', floor, 1, 0.))
+    tests.run()
+
+if __name__=="__main__":
+    if parse().gui:
+        import utils.gui as gui
+        main(gui.Gui())
+        input('<ENTER TO QUIT>')
+    else:
+        main(None)
@@ -0,0 +1,97 @@
+# -*- coding: utf8 -*-
+# test encoding: à-é-è-ô-ï-€
+
+# Copyright 2021 Adrien Crovato
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+## Steady-state solver test
+# Adrien Crovato
+#
+# Solve the steady shallow water equations (lake at rest over a bump) on a 1D grid
+# Check that the solver converges before maxit, and in a few iterations once it has switched to Newton's method
+# Check that no iteration is performed if maxit is 0, and that coincident evaluation points are sorted in element order
+
+import numpy as np
+import phys.flux as pfl
+import num.source as nsrc
+import num.conditions as numc
+import num.steady as nst
+import utils.cases as cases
+import utils.writer as wrtr
+import utils.testing as tst
+
+def main(gui):
+    # Constants
+    l = 10 # domain length
+    g = 9.81 # acceleration due to gravity
+    h = 1.0 # steady state water height
+    w = [0.1, 3, 0.5] # height, position and width of initial wave
+    z = [0.3, 1.0] # height and width of bed bump
+    n = 20 # number of elements
+    p = 4 # order of discretization
+    v = ['h', 'u'] # physical variables
+    cfl = 2. # Courant-Friedrichs-Levy number (pseudo-time step)
+    eps = 0.5 # residual smoothing coefficient
+    # Functions
+    # bed
+    def zb(x): return z[0] * np.exp(-((x-l/2)/z[1])**2)
+    # source term function (bed slope * g)
+    def gdzb(x): return -2 * g * (x-l/2) / z[1]**2 * zb(x)
+    # initial and boundary conditions
+    def h0(x, t): return h - zb(x) + w[0] * np.exp(-((x-w[1])/w[2])**2)
+    def u0(x, t): return 0.0
+    def hl(x, t): return h - zb(x)
+    def ul(x, t): return 0.0
+    funs = [hl, ul]
+    if gui:
+        gui.vars = v
+        gui.frefs = funs
+
+    # Generate discretization
+    bcs = [numc.Dirichlet(hl, steady=True), numc.Dirichlet(ul, steady=True)] # lake at rest
+    disc = cases.discretize(pfl.ShallowWater(g), [h0, u0], bcs, bcs, l, n, p, source=nsrc.Source([lambda x: 0., gdzb]))
+    # Define steady-state solver, switching to Newton's method when the residual has decreased by two orders of magnitude
+    wrt = wrtr.Writer('sol', 1, v, disc)
+    solver = nst.Steady(disc, wrt, gui, cfl, eps, tol=1e-10, newton=1e-2)
+    solver.run()
+    # Run without iterating
+    solver0 = nst.Steady(disc, wrt, gui, cfl, eps, maxit=0)
+    solver0.run()
+    uini = disc.frm.ic.eval(disc.elements)
+    nnwt = len(solver.res) - np.argmax(np.array(solver.res) < 1e-2 * solver.res[0]) # number of iterations using Newton's method
+    # Check the order of coincident evaluation points (shared by two elements)
+    xs = disc.x.reshape(-1)[solver.order]
+    same = np.diff(xs) == 0
+
+    # Test
+    ue = solver.u.reshape(disc.shape)
+    tests = tst.Tests()
+    tests.add(tst.Test('Residual drop', solver.res[-1] / solver.res[0], 0., 1e-10))
+    tests.add(tst.Test('Max(h-h_exact)', np.max(np.abs(ue[:, 0, :] - hl(disc.x, 0))), 0., 1e-4))
+    tests.add(tst.Test('Max(u-u_exact)', np.max(np.abs(ue[:, 1, :])), 0., 1e-4))
+    tests.add(tst.Test('Converged before maxit', len(solver.res) - 1 < solver.maxit, 1, 0.))
+    tests.add(tst.Test('Newton iterations < 20', nnwt < 20, 1, 0.))
+    tests.add(tst.Test('Residuals (maxit=0)', len(solver0.res), 1, 0.))
+    tests.add(tst.Test('Max(u-u_0) (maxit=0)', np.max(np.abs(solver0.u - uini)), 0., 0.))
+    tests.add(tst.Test('Coincident points', np.sum(same), n - 1, 0.))
+    tests.add(tst.Test('Coincident points in element order', np.all(np.diff(solver.order)[same] > 0), 1, 0.))
+    tests.run()
+
+if __name__=="__main__":
+    if parse().gui:
+        import utils.gui as gui
+        main(gui.Gui())
+        input('<ENTER TO QUIT>')
+    else:
+        main(None)
@@ -0,0 +1,66 @@
+# -*- coding: utf8 -*-
+# test encoding: à-é-è-ô-ï-€
+
+# Copyright 2021 Adrien Crovato
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+## Test cases
+# Adrien Crovato
+#
+# Discretize the physical problems shared by the tests
+# The tests of the solver components (time integration, output, restart, ...) solve the same few problems: the mesh, conditions, formulation and discretization are built here once, so that each of these tests only sets up what it checks
+# The tests of the physical problems (advect, advect2, burger, euler, shallow) remain self-contained, as examples of a complete setup
+
+import numpy as np
+import phys.flux as pfl
+import num.flux as nfl
+import num.conditions as numc
+import num.formulation as numf
+import num.discretization as numd
+import utils.lmesh as lmsh
+
+def discretize(pflx, ics, left, right, l, n, p, r = 1., alpha = 0., source = None, stiff = None):
+    '''Discretize a physical problem on a 1D grid of length l with n elements of order p, graded so that the last element is r times longer than the first one
+        ics is the list of initial conditions (functions of position and time) of each variable, left and right are the lists of boundary conditions of each variable at the inlet and at the outlet
+        the numerical flux is the Lax–Friedrichs flux (alpha = 0: full-upwind, 1: central)
+    '''
+    msh = lmsh.run(l, n, r)
+    fld = msh.groups[0] # field
+    inl = msh.groups[1] # inlet
+    oul = msh.groups[2] # outlet
+    formul = numf.Formulation(msh, fld, len(ics), pflx, numc.Initial(fld, ics), [numc.Boundary(inl, left), numc.Boundary(oul, right)], source, stiff)
+    return numd.Discretization(formul, p, nfl.LaxFried(pflx, alpha))
+
+def advection(fun, l, n, p, a = 1., r = 1., alpha = 0., initial = None, stiff = None):
+    '''Discretize the advection equation, the signal fun (function of position and time) entering at the inlet
+        fun is also the initial condition, unless initial is given
+    '''
+    return discretize(pfl.Advection(a), [fun if initial is None else initial], [numc.Dirichlet(fun)], [numc.Neumann()], l, n, p, r, alpha, stiff=stiff)
+
+def burger(u1, l, n, p, w = None, alpha = 0.):
+    '''Discretize the Burger's equation, with a stationary shock from u1 to -u1 at the middle of the domain
+        the initial shock is linearly smoothed over a width 2*w (the length of one element by default)
+    '''
+    w = l / n if w is None else w
+    def initial(x, t): return np.where(np.abs(x-l/2) > w, -u1 * np.sign(x-l/2), -u1/w * (x-l/2))
+    def inout(x, t): return -u1 * np.sign(x-l/2)
+    return discretize(pfl.Burger(), [initial], [numc.Dirichlet(inout, steady=True)], [numc.Dirichlet(inout, steady=True)], l, n, p, alpha=alpha)
+
+def shallow(l, n, p, g = 9.81, alpha = 0.):
+    '''Discretize the shallow water equations, with a hump of water at the middle of the domain (at rest)
+        the conditions at the inlet and at the outlet are homogeneous Neumann conditions
+    '''
+    def h(x, t): return 1. + 0.1 * np.exp(-(x-l/2)**2)
+    def u(x, t): return 0. * x
+    return discretize(pfl.ShallowWater(g), [h, u], [numc.Neumann()] * 2, [numc.Neumann()] * 2, l, n, p, alpha=alpha)
@@ -38,6 +38,7 @@ class Gui:
         self.x = [] # coordinates of element evaluation points
         self.xs = [] # coordinates of element sampling points
         self.sf = [] # element shape functions
+        sf = {} # shape functions at sampling points (shared by elements of the same order)
         for c,e in self.c2e.items():
             xc = []
             for n in c.nodes:
@@ -45,7 +46,9 @@ class Gui:
             self.xn.append(xc)
             self.x.append(e.evalx())
             self.xs.append(np.linspace(c.nodes[0].x[0], c.nodes[1].x[0], self.ns))
-            self.sf.append(shp.Lagrange(np.linspace(-1, 1, self.ns), e.ep.x).sf)
+            if e.order not in sf:
+                sf[e.order] = shp.Lagrange(np.linspace(-1, 1, self.ns), e.ep.x).sf
+            self.sf.append(sf[e.order])
         # Plot initial solution with style
         self.figs = []
         plt.ion()
@@ -69,12 +72,8 @@ class Gui:
         ur = [[] for _ in range(len(self.vars))] # reference soution at sampling points
         for v in range(len(self.vars)):
             for i,e in enumerate(self.c2e.values()):
-                ue = [[], []]
-                for k in range(self.ns):
-                    ue[0].append(self.frefs[v](self.xs[i][k], t)) # reference solution
-                    ue[1].append(self.sf[i][k].dot(u[e.rows[v]])) # interpolated solution
-                ur[v].append(ue[0])
-                us[v].append(ue[1])
+                ur[v].append([self.frefs[v](xs, t) for xs in self.xs[i]]) # reference solution
+                us[v].append(self.sf[i].dot(u[e.rows[v]])) # interpolated solution
         # Plot
         for v in range(len(self.vars)):
             ax = self.figs[v].gca()
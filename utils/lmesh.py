@@ -23,15 +23,18 @@ import msh.node as node
 import msh.cell as cell
 import msh.group as group
 
-def run(l, n):
+def run(l, n, r = 1.):
     '''Create a 1D (line) domain of length l and divide it in n cells
+        the cells are geometrically graded so that the last one is r times longer than the first one
     '''
     # Create nodes and elements
     print('Creating 1D line mesh...', end='')
+    q = r**(1/(n-1)) if n > 1 else 1. # ratio between the lengths of two consecutive cells
     nods = []
     cels = []
     for i in range(n+1):
-        nods.append(node.Node(i+1, [i*l/n, 0, 0]))
+        x = i*l/n if q == 1 else l*(q**i-1)/(q**n-1)
+        nods.append(node.Node(i+1, [x, 0, 0]))
     cels.append(cell.Point(1, [nods[0]]))
     cels.append(cell.Point(2, [nods[-1]]))
     for i in range(n):
@@ -0,0 +1,112 @@
+# -*- coding: utf8 -*-
+# test encoding: à-é-è-ô-ï-€
+
+# Copyright 2021 Adrien Crovato
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+## Probes
+# Adrien Crovato
+
+import types
+import numpy as np
+from fe.shapes import Lagrange
+from utils.writer import Output, BinaryWriter
+
+class Probe(Output):
+    '''Sample the solution at given positions, and write the time series to a binary file
+        the element holding each position and the Lagrange interpolation weights are computed once, so that each sample costs O(n_probes) instead of O(n)
+        the time series is written by a binary writer (as a (n_probes, n_variables, 1) solution) and can be read by a reader, and the solution can also be passed to another writer
+        the discrete Fourier transform of the signals can be accumulated on the fly at given frequencies (trapezoidal rule on the samples)
+            U(f) = int u(t) exp(-2*pi*i*f*t) dt
+        the transform (and the state of the writers) is saved in checkpoints, so that it is resumed when restarting
+    '''
+    def __init__(self, name, freq, _var, disc, x, fdft = None, writer = None):
+        Output.__init__(self, name, freq)
+        self.writer = writer # other writer
+        self.x = np.atleast_1d(np.asarray(x, dtype=float)) # positions of probes
+        self.shape = disc.shape # shape of the solution (elements, variables, evaluation points)
+        self.elms, self.w = self.__locate(disc)
+        self.wrt = BinaryWriter(name, 1, _var, types.SimpleNamespace(shape=(len(self.x), disc.shape[1], 1), x=self.x[:, None])) # writer of time series
+        self.fdft = None if fdft is None else np.atleast_1d(np.asarray(fdft, dtype=float)) # frequencies of discrete Fourier transform
+        self.dft = None # discrete Fourier transform of signals at each frequency
+        self.last = None # time and (weighted) signals of last sample
+    def __str__(self):
+        return 'Probes (' + str(len(self.x)) + ' positions, ' + self.wrt.fname + ')'
+
+    def __locate(self, disc):
+        '''Find the element holding each position, and compute the interpolation weights from the evaluation points of the element
+            xi = 2 * (x - x_0) / (x_n - x_0) - 1
+        '''
+        xmin = np.min(disc.x, axis=1)
+        xmax = np.max(disc.x, axis=1)
+        inside = (xmin[None, :] <= self.x[:, None]) & (self.x[:, None] <= xmax[None, :])
+        if not np.all(np.any(inside, axis=1)):
+            raise RuntimeError('Probe positions ' + str(self.x[~np.any(inside, axis=1)]) + ' are outside the domain!')
+        elms = np.argmax(inside, axis=1) # first element holding each position
+        xi = 2 * (self.x - disc.x[elms, 0]) / (disc.x[elms, -1] - disc.x[elms, 0]) - 1
+        ep = next(iter(disc.elements.values())).ep # evaluation points
+        return elms, Lagrange(np.clip(xi, -1., 1.), ep.x).mat
+
+    def save(self, nt, t, u, force = False):
+        '''Sample the solution and write the samples to disk, every freq iterations or if forced
+        '''
+        if nt % self.freq == 0 or force:
+            ue = np.asarray(u).reshape(self.shape + np.shape(u)[1:])
+            vals = np.einsum('kj,kvj...->kv...', self.w, ue[self.elms]) # (probes, variables, members)
+            self.wrt.save(nt, t, vals.reshape((-1,) + np.shape(u)[1:]), force=True)
+            if self.fdft is not None:
+                self.__transform(t, vals)
+        if self.writer is not None:
+            self.writer.save(nt, t, u, force=force)
+
+    def __transform(self, t, vals):
+        '''Accumulate the discrete Fourier transform of the signals with the trapezoidal rule, skipping samples not later than the last one
+            U(f) += (t - t_last) / 2 * (u_last * exp(-2*pi*i*f*t_last) + u * exp(-2*pi*i*f*t))
+        '''
+        wu = np.exp(-2j * np.pi * self.fdft * t).reshape((-1,) + (1,) * vals.ndim) * vals
+        if self.dft is None:
+            self.dft = np.zeros(wu.shape, dtype=complex)
+        elif t > self.last[0]:
+            self.dft += 0.5 * (t - self.last[0]) * (self.last[1] + wu)
+        else:
+            return
+        self.last = (t, wu)
+
+    def state(self):
+        '''Return the discrete Fourier transform and the last sample, and the state of the writer of time series and of the other writer
+        '''
+        return {'dft': self.dft, 'last': self.last, 'series': self.wrt.state(), 'writer': None if self.writer is None else self.writer.state()}
+
+    def restore(self, state):
+        '''Restore the discrete Fourier transform and the last sample, and the state of the writer of time series and of the other writer, from a checkpoint
+        '''
+        self.dft, self.last = state['dft'], state['last']
+        self.wrt.restore(state['series'])
+        if self.writer is not None:
+            self.writer.restore(state['writer'])
+
+    def close(self):
+        '''Close the time series, and the other writer
+        '''
+        self.wrt.close()
+        if self.writer is not None:
+            self.writer.close()
+
+class Line(Probe):
+    '''Sample the solution at n equally spaced positions along the line from x0 to x1
+    '''
+    def __init__(self, name, freq, _var, disc, x0, x1, n, fdft = None, writer = None):
+        Probe.__init__(self, name, freq, _var, disc, np.linspace(x0, x1, n), fdft, writer)
+    def __str__(self):
+        return 'Line probe (' + str(len(self.x)) + ' positions, ' + self.wrt.fname + ')'
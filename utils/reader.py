@@ -0,0 +1,165 @@
+# -*- coding: utf8 -*-
+# test encoding: à-é-è-ô-ï-€
+
+# Copyright 2021 Adrien Crovato
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+## Reader
+# Adrien Crovato
+
+import os
+import glob
+import types
+import numpy as np
+from utils.writer import BinaryWriter, header, record, index, decode
+
+class Reader:
+    '''Read the results written by a binary writer
+        the file is memory-mapped, so that the solution is only read from disk when accessed
+        the solution is exposed as a (n_snapshots, n_elements, n_variables, order+1) array (with the members along a trailing dimension for an ensemble), and slices by time, variable or position are views of the file
+        if the solution is encoded, it is exposed as an array-like object decoding the snapshots when they are accessed, and slices are copies
+    '''
+    def __init__(self, path):
+        if os.path.isdir(path):
+            fnames = glob.glob(os.path.join(glob.escape(path), '*.bin'))
+            if len(fnames) != 1:
+                raise RuntimeError('Directory ' + path + ' must contain exactly one binary result file (found ' + str(len(fnames)) + ')!')
+            path = fnames[0]
+        self.fname = path # name of file
+        with open(self.fname, 'rb') as f:
+            count, hsize, desc, self.x = header(f)
+        self.vars = desc['vars'] # list of names of the variables
+        if 'codec' in desc:
+            self.u = Snapshots(self.fname, hsize, count, desc) # solution
+            self.t = self.u.t # time of each snapshot
+            self.it = self.u.it # iteration of each snapshot
+            return
+        count = min(count, max(0, os.path.getsize(self.fname) - hsize) // record(desc).itemsize) # ignore an interrupted last record
+        if count > 0:
+            self.data = np.memmap(self.fname, dtype=record(desc), mode='r', offset=hsize, shape=(count,)) # records
+        else:
+            self.data = np.zeros(0, dtype=record(desc))
+        self.u = self.data['u'] # solution
+        self.t = self.data['t'] # time of each snapshot
+        self.it = self.data['nt'] # iteration of each snapshot
+    def __str__(self):
+        return 'Reader (' + self.fname + ', ' + str(len(self.t)) + ' snapshots)'
+
+    def select(self, tmin = None, tmax = None, var = None, xmin = None, xmax = None):
+        '''Select the solution between tmin and tmax, for variable var, on the elements lying (even partially) between xmin and xmax
+            the times, the coordinates and the solution are returned as views of the file if the selected elements are contiguous
+        '''
+        # time window (times are increasing)
+        i0 = 0 if tmin is None else np.searchsorted(self.t, tmin, side='left')
+        i1 = len(self.t) if tmax is None else np.searchsorted(self.t, tmax, side='right')
+        # elements
+        sel = np.ones(len(self.x), dtype=bool)
+        if xmin is not None:
+            sel &= np.max(self.x, axis=1) >= xmin
+        if xmax is not None:
+            sel &= np.min(self.x, axis=1) <= xmax
+        elms = np.flatnonzero(sel)
+        if len(elms) and elms[-1] - elms[0] + 1 == len(elms):
+            elms = slice(elms[0], elms[-1] + 1)
+        # variable
+        v = slice(None) if var is None else self.vars.index(var)
+        return self.t[i0:i1], self.x[elms], self.u[i0:i1][:, elms, v]
+
+class Snapshots:
+    '''Encoded snapshots of a binary file, decoded when accessed
+        the snapshots are indexed as a (n_snapshots, ...) array, the snapshots encoded as a difference being decoded from the previous full snapshot
+    '''
+    def __init__(self, fname, hsize, count, desc):
+        self.fname = fname # name of file
+        self.desc = desc # description of the data
+        self.rdt = record(desc) # data type of record headers
+        with open(fname, 'rb') as f:
+            self.offs, _ = index(f, hsize, count, desc)
+            count = len(self.offs)
+            recs = np.zeros(count, dtype=self.rdt) # record headers
+            for k, off in enumerate(self.offs):
+                f.seek(off)
+                recs[k] = np.frombuffer(f.read(self.rdt.itemsize), dtype=self.rdt)[0]
+        self.t = recs['t'] # time of each snapshot
+        self.it = recs['nt'] # iteration of each snapshot
+        self.kind = recs['kind'] # kind of each snapshot (0: full, n: difference with the prediction from the n previous snapshots)
+        self.shape = (count,) + tuple(desc['shape'])
+        self.ndim = len(self.shape)
+        self.cache = (None, []) # last decoded snapshot and the codes of the snapshots preceding and including it
+    def __str__(self):
+        return 'Encoded snapshots (' + str(self.desc['codec']) + ')'
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, key):
+        '''Decode the snapshots selected by the first index, then apply the other indices
+        '''
+        key = key if isinstance(key, tuple) else (key,)
+        sel = np.arange(self.shape[0])[key[0]]
+        u = np.array([self.__decode(k) for k in np.ravel(sel)]).reshape(np.shape(sel) + self.shape[1:])
+        return u[(Ellipsis,) + key[1:]] if np.ndim(sel) == 0 else u[(slice(None),) + key[1:]]
+
+    def __array__(self, dtype = None, copy = None):
+        return np.asarray(self[:], dtype=dtype)
+
+    def __decode(self, k):
+        '''Decode snapshot k, starting from the last full snapshot (or from the last decoded one if it precedes k)
+        '''
+        k0 = k
+        while self.kind[k0] != 0:
+            k0 -= 1
+        if self.cache[0] is not None and k0 <= self.cache[0] < k:
+            k0, prev = self.cache[0] + 1, self.cache[1]
+        else:
+            prev = []
+        with open(self.fname, 'rb') as f:
+            for j in range(k0, k + 1):
+                f.seek(self.offs[j])
+                size = int(np.frombuffer(f.read(self.rdt.itemsize), dtype=self.rdt)['size'][0])
+                u, codes = decode(f.read(size), prev[len(prev) - self.kind[j]:] if self.kind[j] else [], self.desc)
+                prev = (prev + [codes])[-2:]
+        self.cache = (k, prev)
+        return u
+
+def convert(name, order, out = None):
+    '''Convert the results written as text files by a writer to a binary file
+        name is the base name of the text files, order is the order of the discretization (which is not stored in the text files), and out is the base name of the binary file (name if not given)
+        each column of the text files is converted to a variable
+    '''
+    # list files, ordered by iteration and by number within an iteration
+    def key(f):
+        nums = os.path.basename(f)[len(os.path.basename(name))+1:-4].split('_')
+        return int(nums[0]), int(nums[1]) if len(nums) > 1 else -1
+    fnames = sorted(glob.glob(glob.escape(name) + '_[0-9]*.dat'), key=key)
+    if not fnames:
+        raise RuntimeError('No text result file named ' + name + '_*.dat!')
+    # read variables and coordinates from the first file
+    with open(fnames[0]) as f:
+        lines = [next(f) for _ in range(5)]
+    cols = lines[4].split()[1:]
+    data = np.loadtxt(fnames[0], skiprows=5, ndmin=2)
+    x = data[:, 0].reshape(-1, order + 1)
+    disc = types.SimpleNamespace(shape=(len(x), len(cols), order + 1), x=x) # discretization-like description of the data
+    wrt = BinaryWriter(out if out else name, 1, cols, disc)
+    if os.path.isfile(wrt.fname):
+        os.remove(wrt.fname)
+    for fn in fnames:
+        with open(fn) as f:
+            nt, t = [next(f) for _ in range(3)][2].split()
+        data = np.loadtxt(fn, skiprows=5, ndmin=2)
+        u = np.moveaxis(data[:, 1:].reshape(len(x), order + 1, len(cols)), -1, 1) # (elements, variables, nodes)
+        wrt.save(int(nt), float(t), u.reshape(-1), force=True)
+    wrt.close()
+    return wrt.fname
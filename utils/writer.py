@@ -18,23 +18,75 @@
 ## Writer
 # Adrien Crovato
 
-class Writer:
-    def __init__(self, name, freq, _var, disc):
+import os
+import json
+import zlib
+import lzma
+import queue
+import threading
+import numpy as np
+
+# Base class
+class Output:
+    '''Save the results every freq iterations or if forced, close the output at the end of the time integration, and save the internal state in checkpoints so that it is restored when restarting
+    '''
+    def __init__(self, name, freq):
         self.name = name # base name of file
         self.freq = freq # save frequency
+    def __str__(self):
+        raise RuntimeError('Writer not implemented!')
+
+    def save(self, nt, t, u, force = False):
+        '''Save the results, every freq iterations or if forced
+        '''
+        raise RuntimeError('Writer not implemented!')
+
+    def close(self):
+        '''Close the output (nothing to do by default)
+        '''
+        pass
+
+    def state(self):
+        '''Return the internal state of the writer, saved in checkpoints (nothing to save by default)
+        '''
+        return {}
+
+    def restore(self, state):
+        '''Restore the internal state of the writer from a checkpoint
+        '''
+        for k, v in state.items():
+            setattr(self, k, v)
+
+# Text
+class Writer(Output):
+    '''Write results to one text file per saved snapshot, each file being complete once written
+    '''
+    def __init__(self, name, freq, _var, disc):
+        Output.__init__(self, name, freq)
         self.vars = _var # list of names of the variables
         self.rows = [] # list of unknown indices
         self.x = [] # list of coordinates
+        self.nt = None # last saved iteration
+        self.cnt = 0 # number of files saved at last saved iteration
         for e in disc.elements.values():
             self.rows.append(e.rows)
             self.x.append(e.evalx())
+    def __str__(self):
+        return 'Text writer (' + self.name + '_*.dat)'
 
-    def save(self, nt, t, u):
-        '''Write results to disk
+    def save(self, nt, t, u, force = False):
+        '''Write results to disk, every freq iterations or if forced
+            for an ensemble, each variable is written for each member
         '''
-        if nt % self.freq == 0:
-            # Open file
-            f = open(self.name + '_{0:06d}'.format(nt) + '.dat', 'w+')
+        if nt % self.freq == 0 or force:
+            # Open file (several files saved at the same iteration are numbered)
+            if nt == self.nt:
+                self.cnt += 1
+                f = open(self.name + '_{0:06d}_{1:d}'.format(nt, self.cnt) + '.dat', 'w+')
+            else:
+                self.nt = nt
+                self.cnt = 0
+                f = open(self.name + '_{0:06d}'.format(nt) + '.dat', 'w+')
             # Write header
             f.write('$Info\n')
             f.write('      Iteration            Time\n')
@@ -42,14 +94,357 @@ class Writer:
             # Write data
             f.write('$Solution\n')
             f.write('              x')
+            nm = len(u[0]) if np.ndim(u) > 1 else 0 # number of members
             for v in self.vars:
-                f.write(' {0:>15s}'.format(v))
+                if nm:
+                    for m in range(nm):
+                        f.write(' {0:>15s}'.format(v + '_' + str(m)))
+                else:
+                    f.write(' {0:>15s}'.format(v))
             f.write('\n')
             for i in range(len(self.x)):
                 for j in range(len(self.x[i])):
                     f.write('{0:15.6f}'.format(self.x[i][j]))
                     for v in range(len(self.vars)):
-                        f.write(' {0:15.6f}'.format(u[self.rows[i][v][j]]))
+                        for uv in (u[self.rows[i][v][j]] if nm else [u[self.rows[i][v][j]]]):
+                            f.write(' {0:15.6f}'.format(uv))
                     f.write('\n')
             # Close file
             f.close()
+
+# Binary
+class BinaryWriter(Output):
+    '''Write results to a single binary file, appending one record per saved snapshot
+        the file starts with a header (magic string, number of records, size of header, description of the data as JSON and coordinates of the evaluation points), followed by the records
+        by default, each record holds the iteration, the time and the solution in full precision (or in single precision if dtype is '<f4'), so that the offset of record k is header + k * record
+        the solution can also be encoded, each record then holding the iteration, the time, the size and the kind (number of snapshots used for prediction) of the encoded solution, followed by it
+        - quantized with a step 2*tol, so that the error is lower than tol, if tol is given
+        - as the difference (or the bitwise XOR, if not quantized) with its prediction from the previous snapshot (if delta is 1) or from the linear extrapolation of the two previous snapshots (if delta is 2), a full snapshot being written every key snapshots
+        - compressed with zlib or lzma, if codec is given
+        the file is grown by chunks of records, and the number of records in the header is updated once the record is written
+        if the file already exists and holds the same data, it is appended, the records at or after the first saved iteration being discarded (e.g. when restarting)
+        the number of records and the previous snapshots are saved in checkpoints, so that the records saved after the checkpoint are discarded and the encoding is resumed when restarting
+    '''
+    magic = b'DGFLOBIN' # magic string
+    align = 64 # alignment of the records
+    def __init__(self, name, freq, _var, disc, chunk = 256, dtype = '<f8', tol = None, delta = 0, codec = None, key = 100):
+        Output.__init__(self, name, freq)
+        self.fname = name + '.bin' # name of file
+        self.vars = _var # list of names of the variables
+        self.chunk = chunk # number of records by which the file is grown
+        self.shape = disc.shape # shape of the solution (elements, variables, evaluation points)
+        self.x = disc.x # coordinates of evaluation points
+        self.enc = {'dtype': dtype, 'tol': tol, 'delta': delta, 'codec': codec, 'key': key} # encoding
+        self.encoded = tol is not None or delta > 0 or codec is not None # whether the solution is encoded
+        self.f = None # file
+        self.rec = None # record buffer
+        self.hsize = 0 # size of header
+        self.count = 0 # number of records
+        self.end = 0 # end of last record
+        self.cap = 0 # end of preallocated records
+        self.its = [] # iteration of each record
+        self.offs = [] # offset of each record
+        self.prev = [] # codes of the previous snapshots (delta encoding)
+        self.nkey = 0 # number of snapshots since last full snapshot
+        self.reopened = False # whether an existing file was reopened and no snapshot was saved since
+        self.saved = None # state restored from a checkpoint
+    def __str__(self):
+        return 'Binary writer (' + self.fname + ')'
+
+    def save(self, nt, t, u, force = False):
+        '''Append results to the file, every freq iterations or if forced
+        '''
+        if nt % self.freq == 0 or force:
+            u = np.asarray(u)
+            if self.f is None:
+                self.__open(u.shape[1:])
+            # discard the records of a previous or interrupted run saved after the checkpoint restored (or at or after the first saved iteration), once the file is reopened (several snapshots can be saved at the same iteration afterwards)
+            if self.reopened:
+                self.reopened = False
+                count = int(np.searchsorted(self.its, nt, side='left'))
+                if self.saved is not None and self.saved['count'] <= count:
+                    self.__discard(self.saved['count'])
+                    self.prev, self.nkey = self.saved['prev'], self.saved['nkey']
+                else:
+                    self.__discard(count)
+                self.saved = None
+            # fill record
+            if self.encoded:
+                if self.nkey >= self.enc['key']:
+                    self.prev = []
+                data, codes = encode(u, self.prev, self.desc)
+                self.rec[0] = (nt, t, len(data), len(self.prev))
+                self.prev = (self.prev + [codes])[-self.enc['delta']:] if self.enc['delta'] else []
+                self.nkey = self.nkey + 1 if self.rec[0]['kind'] else 1
+                buf = self.rec.tobytes() + data
+                size = len(buf)
+            else:
+                self.rec['nt'] = nt
+                self.rec['t'] = t
+                self.rec['u'] = u.reshape(self.rec['u'].shape)
+                buf = self.rec.data
+                size = self.rec.nbytes
+            # grow file
+            if self.end + size > self.cap:
+                self.cap = self.end + self.chunk * size
+                self.f.truncate(self.cap)
+            # write record, then number of records
+            self.f.seek(self.end)
+            self.f.write(buf)
+            self.its.append(nt)
+            self.offs.append(self.end)
+            self.count += 1
+            self.end += size
+            self.f.seek(len(self.magic))
+            self.f.write(np.uint64(self.count).tobytes())
+
+    def close(self):
+        '''Remove the preallocated records, and close the file
+        '''
+        if self.f is not None:
+            self.f.truncate(self.end)
+            self.f.close()
+            self.f = None
+
+    def state(self):
+        '''Return the number of records, the codes of the previous snapshots and the number of snapshots since last full snapshot, saved in checkpoints
+        '''
+        return {'count': self.count, 'prev': list(self.prev), 'nkey': self.nkey}
+
+    def restore(self, state):
+        '''Restore the internal state of the writer from a checkpoint, which is used on the next save once the file is reopened
+        '''
+        self.saved = state
+
+    def __open(self, mshape):
+        '''Open the file, for data with given shape per member
+        '''
+        self.desc = {'vars': self.vars, 'shape': list(self.shape) + list(mshape), 'dtype': self.enc['dtype']}
+        if self.encoded:
+            self.desc.update(self.enc)
+        self.rec = np.zeros(1, dtype=record(self.desc))
+        self.prev = []
+        if os.path.isfile(self.fname):
+            self.f = open(self.fname, 'r+b')
+            try:
+                count, hsize, fdesc, _ = header(self.f)
+            except RuntimeError:
+                fdesc = None
+            if fdesc == self.desc:
+                self.hsize = hsize
+                self.offs, self.its = index(self.f, hsize, count, self.desc)
+                self.count = len(self.its)
+                self.end = self.cap = self.offs[-1] + self.__size(self.offs[-1]) if self.count else hsize
+                self.reopened = True
+                return
+            self.f.close()
+        # write new header
+        self.f = open(self.fname, 'w+b')
+        js = json.dumps(self.desc).encode()
+        xsize = -(-(4 * 8 + len(js)) // 8) * 8 # size of header before coordinates (aligned)
+        self.hsize = -(-(xsize + self.x.nbytes) // self.align) * self.align
+        self.f.write(self.magic + np.array([0, self.hsize, len(js)], dtype='<u8').tobytes() + js)
+        self.f.seek(xsize)
+        self.f.write(np.ascontiguousarray(self.x, dtype='<f8').tobytes())
+        self.f.truncate(self.hsize)
+        self.saved = None
+        self.count = 0
+        self.end = self.cap = self.hsize
+        self.its = []
+        self.offs = []
+
+    def __discard(self, count):
+        '''Discard the records after the first count ones, the next snapshot being then full
+        '''
+        if count < self.count:
+            self.count = count
+            self.end = self.offs[count]
+            del self.its[count:]
+            del self.offs[count:]
+        self.prev = []
+        self.nkey = 0
+
+    def __size(self, off):
+        '''Compute the size of the record at given offset
+        '''
+        if not self.encoded:
+            return self.rec.itemsize
+        self.f.seek(off)
+        return self.rec.itemsize + int(np.frombuffer(self.f.read(self.rec.itemsize), dtype=self.rec.dtype)['size'][0])
+
+# Background
+class AsyncWriter(Output):
+    '''Write results in a background thread, using another writer
+        the solution is copied to a buffer taken from a pool of nbuf reusable buffers, which is handed to the thread and given back once written
+        the solver only waits when all the buffers are in use (backpressure), and close waits until all the results have been written
+    '''
+    def __init__(self, writer, nbuf = 4):
+        Output.__init__(self, writer.name, writer.freq)
+        self.writer = writer # writer used by the thread
+        self.nbuf = nbuf # number of buffers
+        self.free = queue.Queue() # buffers available
+        self.todo = queue.Queue() # results to be written
+        self.thread = None # background thread
+        self.error = None # exception raised in the thread
+        self.nwait = 0 # number of times the solver waited for a buffer
+    def __str__(self):
+        return 'Asynchronous ' + str(self.writer)
+
+    def save(self, nt, t, u, force = False):
+        '''Copy the results to a free buffer and queue them, every freq iterations or if forced
+        '''
+        if nt % self.freq == 0 or force:
+            self.__check()
+            if self.thread is None:
+                self.__start(u)
+            try:
+                buf = self.free.get_nowait()
+            except queue.Empty:
+                self.nwait += 1
+                buf = self.free.get()
+            if buf.shape != np.shape(u):
+                buf = np.empty(np.shape(u))
+            buf[...] = u
+            self.todo.put((nt, t, buf))
+
+    def close(self):
+        '''Wait until all the results have been written, stop the thread and close the writer
+        '''
+        if self.thread is not None:
+            self.todo.put(None)
+            self.thread.join()
+            self.thread = None
+        self.writer.close()
+        self.__check()
+
+    def state(self):
+        '''Wait until the queued results have been written, and return the internal state of the writer
+        '''
+        if self.thread is not None:
+            self.todo.join()
+        self.__check()
+        return self.writer.state()
+
+    def restore(self, state):
+        '''Restore the internal state of the writer from a checkpoint
+        '''
+        self.writer.restore(state)
+
+    def __start(self, u):
+        '''Allocate the buffers and start the thread
+        '''
+        self.free = queue.Queue()
+        for _ in range(self.nbuf):
+            self.free.put(np.empty(np.shape(u)))
+        self.thread = threading.Thread(target=self.__work, daemon=True)
+        self.thread.start()
+
+    def __work(self):
+        '''Write the queued results until asked to stop
+        '''
+        while 1:
+            item = self.todo.get()
+            if item is None:
+                self.todo.task_done()
+                break
+            if self.error is None:
+                try:
+                    self.writer.save(item[0], item[1], item[2], force=True)
+                except Exception as e:
+                    self.error = e
+            self.free.put(item[2])
+            self.todo.task_done()
+
+    def __check(self):
+        '''Raise the exception raised in the thread, if any
+        '''
+        if self.error is not None:
+            e, self.error = self.error, None
+            raise RuntimeError('Background writer failed!') from e
+
+def record(desc):
+    '''Build the data type of a record from the description of the data
+        the solution is not part of the record if it is encoded
+    '''
+    if 'codec' in desc:
+        return np.dtype([('nt', '<i8'), ('t', '<f8'), ('size', '<i8'), ('kind', '<i8')])
+    return np.dtype([('nt', '<i8'), ('t', '<f8'), ('u', desc['dtype'], tuple(desc['shape']))])
+
+def index(f, hsize, count, desc):
+    '''Build the index of the records of a binary file, and return the offset and the iteration of each record
+        the records of an encoded solution are read one after the other
+        only the records which are complete are indexed, if the file is shorter than expected
+    '''
+    rdt = record(desc)
+    if 'codec' not in desc:
+        f.seek(hsize)
+        its = np.fromfile(f, dtype=rdt, count=count)['nt'].tolist()
+        return [hsize + k * rdt.itemsize for k in range(len(its))], its
+    fsize = os.fstat(f.fileno()).st_size
+    offs, its = [], []
+    off = hsize
+    for _ in range(count):
+        f.seek(off)
+        buf = f.read(rdt.itemsize)
+        if len(buf) < rdt.itemsize:
+            break
+        rec = np.frombuffer(buf, dtype=rdt)[0]
+        if off + rdt.itemsize + int(rec['size']) > fsize:
+            break
+        offs.append(off)
+        its.append(int(rec['nt']))
+        off += rdt.itemsize + int(rec['size'])
+    return offs, its
+
+def encode(u, prev, desc):
+    '''Encode a snapshot, as the difference with its prediction from the codes prev of the previous snapshots if given
+        the prediction is the last snapshot (one previous snapshot) or the linear extrapolation of the last two (two previous snapshots)
+        the encoded bytes and the codes of the snapshot are returned
+    '''
+    if desc['tol'] is not None:
+        codes = np.round(np.asarray(u, dtype=float) / (2 * desc['tol'])).astype('<i8') # quantized
+    else:
+        codes = np.asarray(u, dtype=desc['dtype'])
+    data = codes
+    if prev:
+        pred = prev[-1] if len(prev) == 1 else 2 * prev[-1] - prev[-2]
+        data = codes - pred if desc['tol'] is not None else codes.view('<u' + str(codes.itemsize)) ^ pred.view('<u' + str(codes.itemsize)) # bit patterns
+    data = np.ascontiguousarray(data.reshape(-1).view('u1').reshape(-1, data.itemsize).T).tobytes() # bytes of same significance grouped together
+    if desc['codec'] == 'zlib':
+        data = zlib.compress(data)
+    elif desc['codec'] == 'lzma':
+        data = lzma.compress(data)
+    elif desc['codec'] is not None:
+        raise RuntimeError('Unknown codec ' + str(desc['codec']) + '!')
+    return data, codes
+
+def decode(data, prev, desc):
+    '''Decode a snapshot, encoded as the difference with its prediction from the codes prev of the previous snapshots if given
+        the snapshot and its codes are returned
+    '''
+    if desc['codec'] == 'zlib':
+        data = zlib.decompress(data)
+    elif desc['codec'] == 'lzma':
+        data = lzma.decompress(data)
+    dt = np.dtype('<i8' if desc['tol'] is not None else desc['dtype'])
+    codes = np.frombuffer(data, dtype='u1').reshape(dt.itemsize, -1).T.copy().view(dt).reshape(desc['shape']) # values from grouped bytes
+    if prev:
+        pred = prev[-1] if len(prev) == 1 else 2 * prev[-1] - prev[-2]
+        codes = codes + pred if desc['tol'] is not None else (codes.view('<u' + str(dt.itemsize)) ^ pred.view('<u' + str(dt.itemsize))).view(dt)
+    if desc['tol'] is not None:
+        return codes * (2 * desc['tol']), codes
+    return codes.astype(float), codes
+
+def header(f):
+    '''Read the header of a binary file, and return the number of records, the size of the header, the description of the data and the coordinates of the evaluation points
+    '''
+    f.seek(0)
+    if f.read(len(BinaryWriter.magic)) != BinaryWriter.magic:
+        raise RuntimeError('File ' + f.name + ' is not a binary result file!')
+    count, hsize, jsize = np.frombuffer(f.read(3 * 8), dtype='<u8').astype(int)
+    desc = json.loads(f.read(jsize).decode())
+    xsize = -(-(4 * 8 + jsize) // 8) * 8
+    f.seek(xsize)
+    x = np.frombuffer(f.read(8 * desc['shape'][0] * desc['shape'][2]), dtype='<f8').reshape(desc['shape'][0], desc['shape'][2])
+    f.seek(hsize)
+    return count, hsize, desc, x